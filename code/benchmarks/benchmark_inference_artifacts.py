@@ -0,0 +1,112 @@
+"""
+This script compares the cold-start and per-sample latency of the generator as a Keras
+.h5 model and as the inference artifacts written by export_inference_model.py
+(SavedModel, TFLite and int8 TFLite).
+
+- Cold start: time from launching a fresh Python process to its first generated sample
+  (imports, model loading and first inference), measured in a subprocess per format.
+- Per-sample latency: median time of a batch after warm-up, divided by the batch size,
+  for batch sizes 1 and --batch-size.
+
+Example:
+    python benchmark_inference_artifacts.py --model ../models/generator.h5 \
+        --artifacts ../models/inference --batch-size 16
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Code run in a fresh process: loads one format and times its first and later batches
+WORKER_CODE = r'''
+import sys, time, json
+start = time.perf_counter()
+import numpy as np
+fmt, path, functions_dir, noise_dim, batch_size, repeats = sys.argv[1:7]
+noise_dim, batch_size, repeats = int(noise_dim), int(batch_size), int(repeats)
+sys.path.insert(0, functions_dir)
+if fmt == 'keras':
+    from tensorflow.keras.models import load_model
+    model = load_model(path, compile=False)
+    run = lambda z: np.asarray(model(z, training=False))
+else:
+    from inference_artifact import load_inference_artifact
+    run = load_inference_artifact(path)
+one = np.random.default_rng(0).standard_normal((1, noise_dim), dtype=np.float32)
+run(one)
+cold_start = time.perf_counter() - start
+
+results = {'cold_start_s': cold_start}
+for size in sorted({1, batch_size}):
+    z = np.random.default_rng(1).standard_normal((size, noise_dim), dtype=np.float32)
+    run(z)
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        run(z)
+        times.append(time.perf_counter() - t)
+    results[f'ms_per_sample_b{size}'] = 1e3 * float(np.median(times)) / size
+print('RESULT ' + json.dumps(results))
+'''
+
+
+def benchmark_format(fmt, path, noise_dim, batch_size, repeats):
+    """
+    Runs the benchmark of one format in a fresh Python process.
+
+    Returns:
+        dict: The cold-start time (s) and the per-sample latencies (ms).
+    """
+
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER_CODE, fmt, path, FUNCTIONS_DIR,
+         str(noise_dim), str(batch_size), str(repeats)],
+        capture_output=True, text=True, env=env, check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare cold-start and per-sample latency of the generator artifacts.")
+    parser.add_argument('--model', default=os.path.join(BASE_DIR, 'models', 'generator.h5'))
+    parser.add_argument('--artifacts', default=os.path.join(BASE_DIR, 'models', 'inference'),
+                        help="Output directory of export_inference_model.py.")
+    parser.add_argument('--noise-dim', type=int, default=128)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    candidates = {
+        'keras': args.model,
+        'savedmodel': os.path.join(args.artifacts, 'savedmodel'),
+        'tflite': os.path.join(args.artifacts, 'generator.tflite'),
+        'tflite_int8': os.path.join(args.artifacts, 'generator_int8.tflite'),
+    }
+
+    results = {}
+    for fmt, path in candidates.items():
+        if os.path.exists(path):
+            results[fmt] = benchmark_format(
+                'keras' if fmt == 'keras' else 'artifact', path,
+                args.noise_dim, args.batch_size, args.repeats)
+
+    print(f"\nInference artifacts (median of {args.repeats} batches):")
+    print(f"  {'format':>12} {'cold start (s)':>15} {'ms/sample b=1':>14} "
+          f"{f'ms/sample b={args.batch_size}':>15}")
+    for fmt, r in results.items():
+        print(f"  {fmt:>12} {r['cold_start_s']:>15.2f} {r['ms_per_sample_b1']:>14.1f} "
+              f"{r[f'ms_per_sample_b{args.batch_size}']:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+This script benchmarks the vectorized `decimate_data` and `split_data` functions
+against the previous loop-based implementations (kept below as references) on a
+synthetic corpus of zero-padded LB coefficient recordings, and checks that both
+implementations produce identical results.
+
+To keep the memory footprint of a 1000-recording corpus small, the recordings
+are views into a shared pool of random coefficients separated by zero gaps,
+so each recording has zero-padding at both ends.
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+
+from preprocessing import decimate_data, split_data  # noqa: E402
+
+
+def reference_split_data(coeffs, seed=42):
+    """Previous loop-based implementation of `split_data`."""
+
+    coeffs2 = []
+    for mat in np.array(coeffs):
+        split_matrices = np.array_split(mat, 4, axis=1)
+        coeffs2.extend(split_matrices)
+    coeffs2 = np.array(coeffs2)
+
+    data = []
+    for mat in coeffs2:
+        proportion_of_zeros = np.sum(mat == 0) / mat.size
+        if proportion_of_zeros <= 0.05:
+            mat = mat / np.max(abs(mat)) / 2 + 0.5 * np.ones(mat.shape)
+            data.append(mat)
+    data = np.array(data)
+
+    np.random.seed(seed)
+    shuffled_indices = np.random.permutation(len(data))
+    data = data[shuffled_indices]
+
+    return data
+
+
+def reference_decimate_data(coeffs, seed=42):
+    """Previous loop-based implementation of `decimate_data`."""
+
+    trimmed_coeffs = []
+    for mat in coeffs:
+        first_row = mat[0, :]
+        nonzero_indices = np.where(first_row != 0)[0]
+        if nonzero_indices.size == 0:
+            continue
+        start_idx = nonzero_indices[0]
+        end_idx = nonzero_indices[-1] + 1
+        trimmed_coeffs.append(mat[:, start_idx:end_idx])
+
+    coeffs2 = [m[:, ::2] for m in trimmed_coeffs]
+
+    data = []
+    for mat in coeffs2:
+        num_chunks = mat.shape[1] // 2500
+        for i in range(num_chunks):
+            chunk = mat[:, i*2500: (i+1)*2500]
+            chunk = chunk / np.max(abs(chunk)) / 2 + 0.5 * np.ones(chunk.shape)
+            data.append(chunk)
+
+    np.random.seed(seed)
+    shuffled_indices = np.random.permutation(len(data))
+    data = np.array(data)
+    data = data[shuffled_indices]
+
+    return data
+
+
+def make_corpus(num_recordings, length, padding, rows=128, seed=0):
+    """
+    Builds a synthetic corpus of `num_recordings` recordings of shape
+    (rows, length), each with `padding` zero columns at both ends. The
+    recordings are overlapping views into a shared pool of coefficients.
+    """
+
+    rng = np.random.default_rng(seed)
+    period = length - padding
+    num_blocks = 64
+    pool = np.zeros((rows, num_blocks * period + padding))
+    for b in range(num_blocks):
+        start = b * period + padding
+        pool[:, start:start + period - padding] = rng.standard_normal(
+            (rows, period - padding))
+
+    return [pool[:, (i % (num_blocks - 1)) * period:(i % (num_blocks - 1)) * period + length]
+            for i in range(num_recordings)]
+
+
+def timeit(fn, *args, repeats=3):
+    """Returns the result and the best wall time of `repeats` calls."""
+
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the vectorized preprocessing functions.")
+    parser.add_argument('--recordings', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=5400,
+                        help="Columns per recording, including zero padding.")
+    parser.add_argument('--padding', type=int, default=100)
+    parser.add_argument('--reference-recordings', type=int, default=100,
+                        help="Recordings used to time and check the reference "
+                             "implementations, which hold several float64 "
+                             "copies of the corpus in memory.")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.recordings, args.length, args.padding)
+    subset = corpus[:args.reference_recordings]
+    print(f"Synthetic corpus: {args.recordings} recordings of 128x{args.length} "
+          f"({args.padding} zero columns at both ends)")
+
+    # Split data needs a number of columns divisible by 4
+    split_length = args.length - args.length % 4
+    split_corpus = [m[:, :split_length] for m in corpus]
+    split_subset = split_corpus[:args.reference_recordings]
+
+    for name, fn, ref_fn, full, part in [
+            ('decimate_data', decimate_data, reference_decimate_data, corpus, subset),
+            ('split_data', split_data, reference_split_data, split_corpus, split_subset)]:
+
+        # Correctness on the reference subset
+        ref = ref_fn(part, 42)
+        same64 = np.array_equal(fn(part, 42, np.float64), ref)
+        diff32 = np.max(np.abs(fn(part, 42, np.float32) - ref)) if ref.size else 0.0
+
+        # Timing
+        _, t_ref = timeit(ref_fn, part, 42, repeats=args.repeats)
+        _, t_new_part = timeit(fn, part, 42, repeats=args.repeats)
+        out, t_new = timeit(fn, full, 42, repeats=args.repeats)
+
+        print(f"\n{name}:")
+        print(f"  identical to reference (float64): {same64}")
+        print(f"  max abs difference (float32):     {diff32:.2e}")
+        print(f"  reference  ({len(part):5d} recordings): {t_ref:8.3f} s "
+              f"({len(part) / t_ref:8.1f} recordings/s)")
+        print(f"  vectorized ({len(part):5d} recordings): {t_new_part:8.3f} s "
+              f"({len(part) / t_new_part:8.1f} recordings/s, {t_ref / t_new_part:.1f}x)")
+        print(f"  vectorized ({len(full):5d} recordings): {t_new:8.3f} s "
+              f"({len(full) / t_new:8.1f} recordings/s), output {out.shape} {out.dtype}")
+
+
+if __name__ == '__main__':
+    main()
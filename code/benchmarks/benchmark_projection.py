@@ -0,0 +1,93 @@
+"""
+This script benchmarks the Psi_lb projection: loading the conversion matrix (parsing
+Psi_lb.mat with scipy.io against memory-mapping the cached .npy file) and converting
+coefficient samples into signals and back, comparing the previous per-sample float64
+products with the batched float32/float64 transforms of `projection.LBProjection`.
+
+Random coefficients are used, so no patient data is needed. The results of the batched
+transforms are checked against the per-sample float64 reference.
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+
+from projection import DEFAULT_PSI_PATH, LBProjection, load_psi  # noqa: E402
+
+
+def best_time(fn, repeats):
+    """Returns the fastest of `repeats` runs of `fn` (s)."""
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Psi_lb projection.")
+    parser.add_argument('--psi', default=DEFAULT_PSI_PATH)
+    parser.add_argument('--num-samples', type=int, default=64)
+    parser.add_argument('--time-steps', type=int, default=2500)
+    parser.add_argument('--threads', type=int, default=None,
+                        help="BLAS threads (needs threadpoolctl).")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    # %% ---- Loading the conversion matrix ----
+    import scipy.io as sio
+    load_mat = best_time(lambda: np.array(sio.loadmat(args.psi)['Psi_lb']), args.repeats)
+    load_psi(args.psi)  # Writes the .npy cache if needed
+    load_cached = best_time(lambda: load_psi(args.psi), args.repeats)
+    print(f"Loading Psi_lb: .mat {load_mat * 1e3:.2f} ms, cached .npy {load_cached * 1e3:.2f} ms")
+
+    # %% ---- Forward and inverse transforms ----
+    projection = LBProjection(load_psi(args.psi))
+    Psi_lb = np.array(projection.Psi_lb)
+    coeffs = np.random.default_rng(0).random(
+        (args.num_samples, projection.num_modes, args.time_steps), dtype=np.float32)
+    reference = np.stack([Psi_lb @ ((sample - 0.5) * 2) for sample in coeffs])
+
+    results = {
+        'forward, per-sample float64': best_time(
+            lambda: [Psi_lb @ ((sample - 0.5) * 2) for sample in coeffs], args.repeats),
+    }
+    for dtype in (np.float64, np.float32):
+        name = np.dtype(dtype).name
+        signals = projection.forward(coeffs, dtype=dtype, denormalize=True,
+                                     num_threads=args.threads)
+        error = np.max(np.abs(signals - reference))
+        results[f'forward, batched {name} (max error {error:.1e})'] = best_time(
+            lambda: projection.forward(coeffs, dtype=dtype, denormalize=True,
+                                       num_threads=args.threads), args.repeats)
+        for method in ('pinv', 'qr'):
+            recovered = projection.inverse(reference, dtype=dtype, normalize=True,
+                                           method=method, num_threads=args.threads)
+            error = np.max(np.abs(recovered - coeffs))
+            results[f'inverse, {method} {name} (max error {error:.1e})'] = best_time(
+                lambda: projection.inverse(reference, dtype=dtype, normalize=True,
+                                           method=method, num_threads=args.threads),
+                args.repeats)
+
+    print(f"\nProjection of {args.num_samples} samples of {args.time_steps} time steps:")
+    for name, seconds in results.items():
+        print(f"  {name:>45}: {seconds * 1e3:8.1f} ms "
+              f"({args.num_samples / seconds:8.1f} samples/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+This script benchmarks the throughput of the WGAN-GP training step in its three
+execution modes: eager, graph-compiled (`tf.function`) and XLA-compiled (`jit_compile`),
+optionally under a mixed-precision policy ('mixed_float16' or 'mixed_bfloat16').
+
+Random data in the [0, 1] range is used, so no patient data is needed. For each mode,
+fresh generator and critic models are built, the step is warmed up (tracing and
+compilation are excluded from the timing) and then timed over a number of steps.
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.optimizers import Adam
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+
+from generators import build_generator  # noqa: E402
+from discriminators import disc_model_critic  # noqa: E402
+from training import make_train_step, read_and_reset_losses  # noqa: E402
+
+
+def benchmark_mode(X, rows, cols, latent_dim, batch_size, steps, warmup, n_critic,
+                   compile_step, jit_compile, mixed_precision=None, fused_critic=True,
+                   generator_arch='wcgan'):
+    """
+    Times the training step for one execution mode.
+
+    Args:
+        X (np.ndarray): Random training data of shape (n, rows, cols, 1).
+        rows (int): The number of rows of the samples.
+        cols (int): The number of columns of the samples.
+        latent_dim (int): The dimension of the latent space.
+        batch_size (int): The number of samples per batch.
+        steps (int): The number of timed steps.
+        warmup (int): The number of untimed warm-up steps.
+        n_critic (int): The number of critic updates per generator update.
+        compile_step (bool): Whether the step is compiled with `tf.function`.
+        jit_compile (bool): Whether the step is compiled with XLA.
+        mixed_precision (str, optional): The mixed-precision policy, or None for float32.
+        fused_critic (bool, optional): Whether the critic runs a single fused forward
+                                       pass per update. Defaults to True.
+        generator_arch (str, optional): The generator architecture. Defaults to 'wcgan'.
+
+    Returns:
+        float: The number of training steps per second.
+    """
+
+    tf.keras.backend.clear_session()
+    tf.random.set_seed(0)
+
+    tf.keras.mixed_precision.set_global_policy(mixed_precision or 'float32')
+    generator = build_generator(generator_arch, latent_dim)
+    discriminator = disc_model_critic(rows, cols)
+    tf.keras.mixed_precision.set_global_policy('float32')
+
+    optimizer_g = Adam(learning_rate=1e-4, beta_1=0.5, clipvalue=1.0)
+    optimizer_d = Adam(learning_rate=1e-4, beta_1=0.5, clipvalue=1.0)
+    if mixed_precision == 'mixed_float16':
+        optimizer_g = tf.keras.mixed_precision.LossScaleOptimizer(optimizer_g)
+        optimizer_d = tf.keras.mixed_precision.LossScaleOptimizer(optimizer_d)
+
+    train_step, loss_accumulators = make_train_step(
+        generator, discriminator, optimizer_d, optimizer_g, latent_dim,
+        n_critic=n_critic, lambda_gp=5,
+        compile_step=compile_step, jit_compile=jit_compile, fused_critic=fused_critic)
+
+    batch = tf.constant(X[:batch_size])
+
+    # Warm-up: tracing, compilation and optimizer slot creation
+    for _ in range(warmup):
+        train_step(batch)
+    read_and_reset_losses(loss_accumulators)
+
+    # Timed steps. Reading the losses forces the pending work to finish
+    start = time.perf_counter()
+    for _ in range(steps):
+        train_step(batch)
+    read_and_reset_losses(loss_accumulators)
+    elapsed = time.perf_counter() - start
+
+    return steps / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark eager vs compiled WGAN-GP training steps.")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--n-critic', type=int, default=5)
+    parser.add_argument('--modes', nargs='+', default=['eager', 'graph', 'xla'],
+                        choices=['eager', 'graph', 'xla'])
+    parser.add_argument('--mixed-precision', default=None,
+                        choices=['mixed_float16', 'mixed_bfloat16'])
+    parser.add_argument('--unfused-critic', action='store_true',
+                        help="Call the critic separately on real, fake and interpolated samples")
+    parser.add_argument('--generator', default='wcgan', choices=['wcgan', 'subpixel'],
+                        help="Generator architecture.")
+    args = parser.parse_args()
+
+    # Input data and latent noise vector dimensions (fixed by the architectures)
+    ROWS, COLS = 128, 2500
+    NOISE_DIM = 128
+
+    rng = np.random.default_rng(0)
+    X = rng.random((args.batch_size, ROWS, COLS, 1), dtype=np.float32)
+
+    modes = {
+        'eager': (False, False),
+        'graph': (True, False),
+        'xla': (True, True),
+    }
+
+    results = {}
+    for mode in args.modes:
+        compile_step, jit_compile = modes[mode]
+        results[mode] = benchmark_mode(
+            X, ROWS, COLS, NOISE_DIM, args.batch_size, args.steps, args.warmup,
+            args.n_critic, compile_step, jit_compile, args.mixed_precision,
+            fused_critic=not args.unfused_critic, generator_arch=args.generator)
+
+    print(f"\nTraining step throughput (batch size {args.batch_size}, "
+          f"n_critic {args.n_critic}, policy {args.mixed_precision or 'float32'}, "
+          f"{'unfused' if args.unfused_critic else 'fused'} critic, "
+          f"{args.generator} generator):")
+    reference = results.get('eager')
+    for mode, steps_per_sec in results.items():
+        line = (f"  {mode:>5}: {steps_per_sec:8.3f} steps/s, "
+                f"{steps_per_sec * args.batch_size:9.2f} samples/s")
+        if reference:
+            line += f"  ({steps_per_sec / reference:.2f}x eager)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+This script checks the import-time budget of the light modules and entry points, i.e.
+the ones that must not pull in the heavy dependencies (TensorFlow, Keras, matplotlib,
+IPython), such as the projection-only CLI (project_signals.py).
+
+Each module is imported in a fresh interpreter with `python -X importtime`, and its
+report is parsed to get:
+    - the cumulative import time of the module (all its top-level imports), and
+    - the set of packages it imported, which must not contain a heavy dependency.
+The wall-clock startup time of the projection CLI (`project_signals.py --help`,
+including the interpreter start) is checked too.
+
+The script exits with a nonzero status if any budget is exceeded, so it can be run
+in CI or before a release.
+
+Example:
+    python benchmarks/check_import_time.py --repeats 3
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Packages that the light modules must import lazily (only where they are used)
+HEAVY_PACKAGES = ('tensorflow', 'keras', 'matplotlib', 'IPython', 'matlab')
+
+# Import-time budget (s) of each light module, from `-X importtime`
+LIGHT_MODULES = {
+    'functions': 0.1,
+    'generate_temporal_noise_signals': 0.4,
+    'visualization': 0.4,
+    'preprocessing': 0.6,
+    'load_data': 0.8,
+    'noise_export': 0.8,
+    'inference_artifact': 0.4,
+    'projection': 0.4,
+    'generator_server': 0.6,
+    'project_signals': 0.7,
+}
+
+# Wall-clock budget (s) of starting the projection-only CLI
+CLI_STARTUP_BUDGET = 1.0
+
+
+def import_report(module):
+    """
+    Imports `module` in a fresh interpreter with `-X importtime`.
+
+    Args:
+        module (str): The module name (from the code or functions directory).
+
+    Returns:
+        tuple: The cumulative import time (s) and the set of imported packages.
+    """
+
+    code = (f"import sys; sys.path[:0] = [{BASE_DIR!r}, {FUNCTIONS_DIR!r}]; "
+            f"import {module}")
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True, cwd=BASE_DIR).stderr
+
+    # Lines are "import time: <self us> | <cumulative us> | <indented name>"; the
+    # imports at the top level (no indentation) add up to the total time
+    total_us, packages = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):
+            total_us += int(cumulative)
+        packages.add(name.strip().split('.')[0])
+    return total_us / 1e6, packages
+
+
+def cli_startup_time():
+    """Returns the wall-clock time (s) of running `project_signals.py --help`."""
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(BASE_DIR, 'project_signals.py'), '--help'],
+                   capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget.")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Runs per module (the fastest one is kept).")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':>32} {'import (s)':>11} {'budget (s)':>11}  heavy imports")
+    for module, budget in LIGHT_MODULES.items():
+        reports = [import_report(module) for _ in range(args.repeats)]
+        seconds = min(seconds for seconds, _ in reports)
+        heavy = sorted(set(HEAVY_PACKAGES) & reports[0][1])
+        ok = seconds <= budget and not heavy
+        print(f"{module:>32} {seconds:>11.3f} {budget:>11.2f}  "
+              f"{', '.join(heavy) or '-'}{'' if ok else '  FAIL'}")
+        if not ok:
+            failures.append(module)
+
+    startup = min(cli_startup_time() for _ in range(args.repeats))
+    ok = startup <= CLI_STARTUP_BUDGET
+    print(f"\nproject_signals.py startup: {startup:.3f} s "
+          f"(budget {CLI_STARTUP_BUDGET:.2f} s){'' if ok else '  FAIL'}")
+    if not ok:
+        failures.append('project_signals.py startup')
+
+    if failures:
+        print(f"\nImport-time budget exceeded: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nAll import-time budgets met.")
+
+
+if __name__ == '__main__':
+    main()
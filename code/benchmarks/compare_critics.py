@@ -0,0 +1,127 @@
+"""
+This script compares critic configurations built with `discriminators.build_critic`
+against the original `disc_model_critic`, to choose a critic that fits longer windows
+or bigger batches in the same memory budget.
+
+For each configuration and window length it reports the number of parameters and the
+time of one critic update (critic loss, gradient penalty, backward pass and Adam step,
+graph-compiled, after warm-up) on random data, so no patient data is needed.
+
+Example:
+    python compare_critics.py --batch-size 8 --cols 2500 5000 --steps 3
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+from discriminators import (build_critic, critic_losses_fused, disc_model_critic,  # noqa: E402
+                            gradient_penalty, is_batch_dependent)
+
+# Compared configurations: None is the original critic, otherwise `build_critic` arguments
+CONFIGS = {
+    'current': None,
+    'gap-d2': {'head': 'gap'},
+    'gap-d4': {'depth': 4, 'head': 'gap'},
+    'gap-d4-layer': {'depth': 4, 'head': 'gap', 'norm': 'layer'},
+    'gap-d4-spectral': {'depth': 4, 'head': 'gap', 'norm': 'spectral'},
+    'mbstd-d4': {'depth': 4, 'head': 'minibatch_std'},
+}
+
+
+def time_critic_update(critic, batch_size, rows, cols, steps, warmup, lambda_gp=5):
+    """
+    Times the critic update of the WGAN-GP training step.
+
+    Args:
+        critic (keras.Model): The critic.
+        batch_size (int): The number of real (and fake) samples per update.
+        rows (int): The number of rows of the samples.
+        cols (int): The number of columns of the samples.
+        steps (int): The number of timed updates.
+        warmup (int): The number of untimed warm-up updates.
+        lambda_gp (float, optional): The gradient penalty coefficient. Defaults to 5.
+
+    Returns:
+        float: The mean time of an update, in seconds.
+    """
+
+    optimizer = tf.keras.optimizers.Adam(learning_rate=1e-4, beta_1=0.5)
+    fused = not is_batch_dependent(critic)
+
+    @tf.function
+    def critic_update(real, fake):
+        with tf.GradientTape() as tape:
+            if fused:
+                critic_loss, gp = critic_losses_fused(critic, real, fake, lambda_gp)
+            else:
+                critic_loss = (tf.reduce_mean(critic(fake, training=True))
+                               - tf.reduce_mean(critic(real, training=True)))
+                gp = gradient_penalty(critic, real, fake, lambda_gp)
+            loss = critic_loss + gp
+        grads = tape.gradient(loss, critic.trainable_variables)
+        optimizer.apply_gradients(zip(grads, critic.trainable_variables))
+        return loss
+
+    rng = np.random.default_rng(0)
+    real = tf.constant(rng.random((batch_size, rows, cols, 1), dtype=np.float32))
+    fake = tf.constant(rng.random((batch_size, rows, cols, 1), dtype=np.float32))
+
+    for _ in range(warmup):
+        critic_update(real, fake).numpy()
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        critic_update(real, fake).numpy()
+    return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare parameters and update time of critic configurations.")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=128)
+    parser.add_argument('--cols', type=int, nargs='+', default=[2500],
+                        help="Window lengths (columns) to compare.")
+    parser.add_argument('--steps', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--configs', nargs='+', default=list(CONFIGS), choices=list(CONFIGS))
+    args = parser.parse_args()
+
+    results = []
+    for cols in args.cols:
+        for name in args.configs:
+            tf.keras.backend.clear_session()
+            config = CONFIGS[name]
+            if config is None:
+                critic = disc_model_critic(args.rows, cols)
+            else:
+                critic = build_critic(args.rows, cols, **config)
+            update_time = time_critic_update(
+                critic, args.batch_size, args.rows, cols, args.steps, args.warmup)
+            results.append((cols, name, critic.count_params(), update_time))
+
+    print(f"\nCritic comparison (batch size {args.batch_size}, {args.rows} rows):")
+    print(f"  {'cols':>6} {'config':>16} {'params':>10} {'ms/update':>10} {'vs current':>11}")
+    reference = {cols: t for cols, name, _, t in results if name == 'current'}
+    for cols, name, params, update_time in results:
+        line = f"  {cols:>6} {name:>16} {params:>10,d} {update_time * 1e3:>10.1f}"
+        if cols in reference:
+            line += f" {reference[cols] / update_time:>10.2f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+This script compares the generator architectures registered in `generators.py`
+(`GENERATOR_ARCHITECTURES`) to help choose a speed/quality trade-off.
+
+For each architecture it reports:
+- The number of parameters.
+- The forward FLOPs per sample, counted analytically layer by layer (2 FLOPs per
+  multiply-accumulate of the Dense, Conv2D and Conv2DTranspose layers).
+- The largest activation of a sample (elements of the biggest layer output), which
+  drives the activation memory of training.
+- The inference latency per batch and per sample (graph-compiled, after warm-up).
+
+Sample quality is not measured here: it requires trained models of each architecture
+(see validation.py).
+
+Example:
+    python compare_generators.py --batch-size 16 --repeats 5
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import Conv2D, Conv2DTranspose, Dense
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+from generators import GENERATOR_ARCHITECTURES, build_generator  # noqa: E402
+
+
+def count_flops(model):
+    """
+    Counts the forward FLOPs per sample of the Dense, Conv2D and Conv2DTranspose
+    layers of a model (2 FLOPs per multiply-accumulate). Normalization and
+    activation layers are negligible and not counted.
+
+    Args:
+        model (keras.Model): The model.
+
+    Returns:
+        int: The number of FLOPs per sample.
+    """
+
+    macs = 0
+    for layer in model.layers:
+        if isinstance(layer, Dense):
+            macs += int(np.prod(layer.kernel.shape))
+        elif isinstance(layer, Conv2DTranspose):
+            # Each input pixel is scattered through the whole kernel
+            in_h, in_w = layer.input_shape[1:3]
+            macs += in_h * in_w * int(np.prod(layer.kernel.shape))
+        elif isinstance(layer, Conv2D):
+            out_h, out_w = layer.output_shape[1:3]
+            macs += out_h * out_w * int(np.prod(layer.kernel.shape))
+    return 2 * macs
+
+
+def largest_activation(model):
+    """Returns the number of elements of the largest layer output of a sample."""
+
+    return max(int(np.prod(layer.output_shape[1:])) for layer in model.layers)
+
+
+def time_generator(model, latent_dim, batch_size, repeats):
+    """
+    Measures the inference latency of a generator on a batch of latent vectors.
+
+    Args:
+        model (keras.Model): The generator.
+        latent_dim (int): The dimension of the latent space.
+        batch_size (int): The number of samples per batch.
+        repeats (int): The number of timed batches.
+
+    Returns:
+        float: The median latency of a batch, in seconds.
+    """
+
+    forward = tf.function(lambda z: model(z, training=False))
+    noise = tf.random.normal((batch_size, latent_dim))
+
+    # Warm-up (tracing)
+    forward(noise).numpy()
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        forward(noise).numpy()
+        times.append(time.perf_counter() - start)
+
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare FLOPs, parameters and latency of the generator architectures.")
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--noise-dim', type=int, default=128)
+    parser.add_argument('--archs', nargs='+', default=list(GENERATOR_ARCHITECTURES),
+                        choices=list(GENERATOR_ARCHITECTURES))
+    args = parser.parse_args()
+
+    results = {}
+    for arch in args.archs:
+        tf.keras.backend.clear_session()
+        model = build_generator(arch, args.noise_dim)
+        if model.output_shape[1:] != (128, 2500, 1):
+            raise ValueError(f"'{arch}' generates {model.output_shape[1:]} samples")
+
+        latency = time_generator(model, args.noise_dim, args.batch_size, args.repeats)
+        results[arch] = {
+            'params': model.count_params(),
+            'gflops': count_flops(model) / 1e9,
+            'activation_mb': largest_activation(model) * 4 / 2**20,
+            'batch_ms': latency * 1e3,
+            'sample_ms': latency * 1e3 / args.batch_size,
+        }
+
+    print(f"\nGenerator comparison (batch size {args.batch_size}, float32):")
+    print(f"  {'arch':>10} {'params':>10} {'GFLOPs/sample':>14} "
+          f"{'max act. (MB)':>14} {'ms/batch':>10} {'ms/sample':>10}")
+    for arch, r in results.items():
+        print(f"  {arch:>10} {r['params']:>10,d} {r['gflops']:>14.2f} "
+              f"{r['activation_mb']:>14.1f} {r['batch_ms']:>10.1f} {r['sample_ms']:>10.2f}")
+
+    # Relative cost against the original architecture
+    reference = results.get('wcgan')
+    if reference:
+        for arch, r in results.items():
+            if arch != 'wcgan':
+                print(f"  {arch}: {reference['gflops'] / r['gflops']:.2f}x fewer FLOPs, "
+                      f"{reference['sample_ms'] / r['sample_ms']:.2f}x faster than wcgan")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+This script load-tests a running generator server (serve_generator.py) on localhost.
+
+A number of concurrent clients, each with its own keep-alive connection, send
+/generate requests for a few samples each. The script reports the client-side p50/p99
+latency and the throughput, together with the server metrics (/metrics), such as the
+mean micro-batch size. Running it with 1 client and then with many shows the effect
+of micro-batching.
+
+Example:
+    python serve_generator.py --port 8765 &
+    python benchmarks/load_test_server.py --port 8765 --clients 16 --requests 50 --count 2
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import http.client
+import io
+import json
+import socket
+import threading
+import time
+
+import numpy as np
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, path, timeout=60):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def connect(args):
+    """Opens a keep-alive connection to the server."""
+
+    if args.unix_socket:
+        return UnixHTTPConnection(args.unix_socket)
+    return http.client.HTTPConnection(args.host, args.port, timeout=60)
+
+
+def get(connection, path):
+    """Sends a GET request and returns the status and body of the response."""
+
+    connection.request('GET', path)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def run_client(args, client_idx, latencies, errors):
+    """
+    Sends `args.requests` requests from one client, recording their latencies.
+
+    Each client requests its own samples of the seed stream, so no two requests
+    are identical.
+    """
+
+    connection = connect(args)
+    for i in range(args.requests):
+        start = (client_idx * args.requests + i) * args.count
+        path = (f"/generate?seed={args.seed}&start={start}&count={args.count}"
+                f"&outputs={args.outputs}")
+        request_start = time.perf_counter()
+        try:
+            status, body = get(connection, path)
+        except (OSError, http.client.HTTPException):
+            errors.append(client_idx)
+            connection.close()
+            connection = connect(args)
+            continue
+        latency = time.perf_counter() - request_start
+        if status != 200:
+            errors.append(client_idx)
+            continue
+        if args.check:
+            arrays = np.load(io.BytesIO(body))
+            assert all(arrays[name].shape[0] == args.count for name in arrays.files)
+        latencies.append(latency)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the generator server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None)
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent clients.")
+    parser.add_argument('--requests', type=int, default=20, help="Requests per client.")
+    parser.add_argument('--count', type=int, default=1, help="Samples per request.")
+    parser.add_argument('--outputs', default='coeffs,signals')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--check', action='store_true', help="Decode and check the responses.")
+    args = parser.parse_args()
+
+    # Wait until the server is ready
+    for _ in range(600):
+        try:
+            connection = connect(args)
+            if get(connection, '/health')[0] == 200:
+                break
+        except OSError:
+            time.sleep(0.5)
+    else:
+        raise RuntimeError("The server is not reachable")
+    server_before = json.loads(get(connection, '/metrics')[1])
+
+    latencies, errors = [], []
+    threads = [threading.Thread(target=run_client, args=(args, i, latencies, errors))
+               for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    server_after = json.loads(get(connection, '/metrics')[1])
+    connection.close()
+
+    latencies_ms = np.array(latencies) * 1e3
+    batches = server_after['batches'] - server_before['batches']
+    samples = server_after['samples'] - server_before['samples']
+    print(f"\nLoad test: {args.clients} clients x {args.requests} requests "
+          f"x {args.count} samples ({args.outputs})")
+    print(f"  Requests:   {len(latencies)} ok, {len(errors)} errors in {elapsed:.2f} s")
+    if len(latencies):
+        print(f"  Latency:    p50 {np.percentile(latencies_ms, 50):.1f} ms, "
+              f"p99 {np.percentile(latencies_ms, 99):.1f} ms (client side)")
+    print(f"  Throughput: {len(latencies) / elapsed:.1f} requests/s, "
+          f"{len(latencies) * args.count / elapsed:.1f} samples/s")
+    if batches:
+        print(f"  Server:     {batches} micro-batches, mean size {samples / batches:.1f} samples, "
+              f"p50 {server_after['latency_p50_ms']:.1f} ms, "
+              f"p99 {server_after['latency_p99_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+This script runs the end-to-end benchmark suite of the pipeline, on a synthetic corpus of
+LB-coefficient recordings (so no patient data is needed), and compares the results with a
+stored baseline to flag performance regressions.
+
+Stages (each run in a fresh Python process, so that its peak RSS is its own):
+    - load_data:  reading the corpus of .mat files (`load_data.load_data`, no cache).
+    - decimate:   `preprocessing.decimate_data` on the loaded recordings.
+    - train_step: one critic update and one generator update (`training.make_train_step`
+                  with n_critic=1, compiled with `tf.function`).
+    - generate:   batched generation of coefficient samples with the generator.
+    - project:    the Psi_lb projection of the generated samples into signals
+                  (`projection.LBProjection.forward`, float32).
+
+For each stage, the script records the best wall-clock time of --repeats runs (after one
+untimed warm-up run, which also excludes tracing and compilation), the throughput, the
+peak RSS of the process and the peak of the allocations traced by `tracemalloc` during
+one run (NumPy arrays are traced, TensorFlow tensors are not).
+
+The results are written as JSON (--output). With --baseline, every stage whose time or
+peak RSS exceeds the baseline by more than --tolerance is flagged as a regression and the
+script exits with a nonzero status. Use --update-baseline to store the results as the
+new baseline (baselines are machine specific).
+
+Example:
+    python benchmarks/run_benchmarks.py --output results.json --update-baseline baseline.json
+    # ... change preprocessing.py, training.py or generators.py ...
+    python benchmarks/run_benchmarks.py --baseline baseline.json
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Define directories
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+
+# Input data and latent noise vector dimensions (fixed by the architectures)
+ROWS, COLS = 128, 2500
+NOISE_DIM = 128
+
+STAGES = ('load_data', 'decimate', 'train_step', 'generate', 'project')
+
+
+def write_corpus(corpus_dir, num_recordings, length, padding, seed=0):
+    """
+    Writes a synthetic corpus of .mat files with the 'signal' struct read by
+    `load_data`: random LB coefficients of shape (ROWS, length), with `padding`
+    zero columns at both ends, and all leads active.
+    """
+
+    import scipy.io as sio
+
+    rng = np.random.default_rng(seed)
+    for i in range(num_recordings):
+        coeffs = np.zeros((ROWS, length))
+        coeffs[:, padding:length - padding] = rng.standard_normal((ROWS, length - 2 * padding))
+        signal = {'coeffs_lb': coeffs, 'leadStatus': np.ones((1, ROWS))}
+        sio.savemat(os.path.join(corpus_dir, f'recording_{i:04d}.mat'), {'signal': signal})
+
+
+def quiet_load_data(corpus_dir, n_workers):
+    """Loads the coefficients of the corpus without the progress messages."""
+
+    from load_data import load_data
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        coeffs, = load_data(corpus_dir, fields=('coeffs_lb',), n_workers=n_workers)
+    return coeffs
+
+
+def setup_stage(stage, config):
+    """
+    Prepares a stage (untimed).
+
+    Args:
+        stage (str): The name of the stage.
+        config (dict): The benchmark configuration.
+
+    Returns:
+        tuple: The function running the stage once, the number of items it processes
+               and their unit.
+    """
+
+    if stage == 'load_data':
+        return (lambda: quiet_load_data(config['corpus_dir'], config['load_workers']),
+                config['recordings'], 'recordings')
+
+    if stage == 'decimate':
+        from preprocessing import decimate_data
+        coeffs = quiet_load_data(config['corpus_dir'], config['load_workers'])
+        return lambda: decimate_data(coeffs, seed=42), len(coeffs), 'recordings'
+
+    if stage == 'train_step':
+        import tensorflow as tf
+        from tensorflow.keras.optimizers import Adam
+        from generators import build_generator
+        from discriminators import disc_model_critic
+        from training import make_train_step, read_and_reset_losses
+
+        tf.random.set_seed(0)
+        generator = build_generator(config['generator'], NOISE_DIM)
+        discriminator = disc_model_critic(ROWS, COLS)
+        train_step, loss_accumulators = make_train_step(
+            generator, discriminator,
+            Adam(learning_rate=1e-4, beta_1=0.5, clipvalue=1.0),
+            Adam(learning_rate=1e-4, beta_1=0.5, clipvalue=1.0),
+            NOISE_DIM, n_critic=1, lambda_gp=5)
+        batch = tf.constant(np.random.default_rng(0).random(
+            (config['batch_size'], ROWS, COLS, 1), dtype=np.float32))
+
+        def run():
+            train_step(batch)
+            # Reading the losses forces the pending work to finish
+            read_and_reset_losses(loss_accumulators)
+
+        return run, config['batch_size'], 'samples'
+
+    if stage == 'generate':
+        from generators import build_generator
+        from generate_temporal_noise_signals import latent_vectors
+
+        generator = build_generator(config['generator'], NOISE_DIM)
+        num_samples, batch_size = config['samples'], config['batch_size']
+
+        def run():
+            for first in range(0, num_samples, batch_size):
+                latents = latent_vectors(0, first, min(batch_size, num_samples - first),
+                                         NOISE_DIM)
+                np.asarray(generator(latents, training=False))
+
+        return run, num_samples, 'samples'
+
+    if stage == 'project':
+        from projection import get_projection
+
+        projection = get_projection()
+        coeffs = np.random.default_rng(0).random(
+            (config['samples'], ROWS, COLS), dtype=np.float32)
+        return (lambda: projection.forward(coeffs, dtype=np.float32, denormalize=True),
+                config['samples'], 'samples')
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def measure_stage(stage, config):
+    """
+    Runs and measures a stage in the current process.
+
+    Returns:
+        dict: The time, throughput and memory use of the stage.
+    """
+
+    run, items, unit = setup_stage(stage, config)
+
+    # Warm-up run (tracing, compilation, caches)
+    run()
+
+    times = []
+    for _ in range(config['repeats']):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    # Allocations of one more run (tracemalloc slows down the run, so it is not timed)
+    tracemalloc.start()
+    run()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = min(times)
+    return {
+        'seconds': seconds,
+        'median_seconds': float(np.median(times)),
+        'throughput': items / seconds,
+        'unit': f'{unit}/s',
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'tracemalloc_peak_mb': traced_peak / 2**20,
+    }
+
+
+def run_stage_process(stage, config):
+    """Runs `measure_stage` in a fresh Python process and returns its results."""
+
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', stage, json.dumps(config)],
+        capture_output=True, text=True, env=env, check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):])
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compares the time and peak RSS of each stage with the baseline.
+
+    Args:
+        results (dict): The current results.
+        baseline (dict): The baseline results.
+        tolerance (float): The relative increase flagged as a regression.
+
+    Returns:
+        list of str: The regressions found.
+    """
+
+    regressions = []
+    print(f"\nComparison with the baseline (tolerance {tolerance:.0%}):")
+    print(f"  {'stage':>10} {'time':>8} {'peak RSS':>9}")
+    for stage, current in results['stages'].items():
+        reference = baseline['stages'].get(stage)
+        if reference is None:
+            print(f"  {stage:>10}  (not in the baseline)")
+            continue
+        time_ratio = current['seconds'] / reference['seconds']
+        rss_ratio = current['peak_rss_mb'] / reference['peak_rss_mb']
+        flags = []
+        if time_ratio > 1 + tolerance:
+            flags.append('time')
+        if rss_ratio > 1 + tolerance:
+            flags.append('memory')
+        print(f"  {stage:>10} {time_ratio:>7.2f}x {rss_ratio:>8.2f}x"
+              f"{'  REGRESSION (' + ', '.join(flags) + ')' if flags else ''}")
+        regressions.extend(f"{stage} {flag}" for flag in flags)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite.")
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--recordings', type=int, default=32,
+                        help="Recordings of the synthetic corpus.")
+    parser.add_argument('--length', type=int, default=5400,
+                        help="Columns per recording, including zero padding.")
+    parser.add_argument('--padding', type=int, default=100)
+    parser.add_argument('--load-workers', type=int, default=1,
+                        help="Worker processes of load_data.")
+    parser.add_argument('--generator', default='wcgan', choices=['wcgan', 'subpixel'])
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help="Batch size of the training step and of the generation.")
+    parser.add_argument('--samples', type=int, default=32,
+                        help="Samples generated and projected.")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=None, help="JSON file of the results.")
+    parser.add_argument('--baseline', default=None, help="JSON file of the baseline.")
+    parser.add_argument('--update-baseline', default=None,
+                        help="Also write the results to this baseline file.")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Relative increase of time or peak RSS flagged as a regression.")
+    parser.add_argument('--worker', nargs=2, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Stage process: measure one stage and print its results
+    if args.worker:
+        stage, config = args.worker
+        print('RESULT ' + json.dumps(measure_stage(stage, json.loads(config))))
+        return
+
+    config = {
+        'recordings': args.recordings, 'length': args.length, 'padding': args.padding,
+        'load_workers': args.load_workers, 'generator': args.generator,
+        'batch_size': args.batch_size, 'samples': args.samples, 'repeats': args.repeats,
+    }
+    results = {
+        'config': config,
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                    'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'stages': {},
+    }
+
+    # %% ---- Run the stages ----
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        if {'load_data', 'decimate'} & set(args.stages):
+            write_corpus(corpus_dir, args.recordings, args.length, args.padding)
+        print(f"{'stage':>10} {'time (s)':>9} {'throughput':>20} {'peak RSS (MB)':>14} "
+              f"{'traced (MB)':>12}")
+        for stage in args.stages:
+            r = run_stage_process(stage, dict(config, corpus_dir=corpus_dir))
+            results['stages'][stage] = r
+            print(f"{stage:>10} {r['seconds']:>9.3f} {r['throughput']:>9.1f} {r['unit']:<10} "
+                  f"{r['peak_rss_mb']:>14.1f} {r['tracemalloc_peak_mb']:>12.1f}")
+
+    # %% ---- Write and compare the results ----
+    for path in (args.output, args.update_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['config'] != config:
+            print("\nWarning: the baseline was measured with a different configuration")
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+This script evaluates a trained generator by comparing the distribution of its samples with
+that of the real noise chunks, to gate model promotion on it.
+
+The real chunks are read from the per-recording chunk cache (the same shuffled chunks as
+`decimate_data`), and the generated samples are produced from the latent seed stream, both in
+batches: the statistics of each set are accumulated in one streaming pass
+(`evaluation.evaluate_batches`), so thousands of samples are compared with the memory of one
+batch. The metrics (per-mode and per-lead PSD, amplitude histograms, inter-lead correlations,
+RFF-MMD and sliced Wasserstein distances) are written as JSON.
+
+With --real-baseline, two disjoint halves of the real chunks are also compared with each other,
+which gives the values of the metrics for a perfect generator with this number of samples (a
+reference for the thresholds). With --max, the script exits with a nonzero status if a metric
+exceeds its threshold.
+
+Example:
+    python evaluate_generator.py --num-real 4096 --num-generated 4096 --output evaluation.json \
+        --max signals.sliced_wasserstein=0.5 --max coeffs.psd_log_rmse=0.2
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Define directories
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, 'models')
+DATA_DIR = os.path.join(SCRIPT_DIR, 'utils')
+FUNCTIONS_DIR = os.path.join(SCRIPT_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+from chunk_cache import build_chunk_cache  # noqa: E402
+from evaluation import evaluate_batches  # noqa: E402
+from generate_temporal_noise_signals import latent_vectors  # noqa: E402
+from projection import get_projection  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare the statistics of generated and real noise samples.")
+    parser.add_argument('--model', default=None,
+                        help="Generator: inference artifact (.tflite or SavedModel) or Keras "
+                             "model. Defaults to models/inference/generator.tflite if it "
+                             "exists, otherwise models/generator.h5.")
+    parser.add_argument('--data', default=os.path.join(SCRIPT_DIR, 'data', 'LBcoeffs'),
+                        help="Directory of the real .mat recordings.")
+    parser.add_argument('--chunk-cache', default=os.path.join(SCRIPT_DIR, 'data', 'chunk_cache'),
+                        help="Directory of the chunk cache (see chunk_cache.py).")
+    parser.add_argument('--psi', default=os.path.join(DATA_DIR, 'Psi_lb.mat'),
+                        help="Path to the Psi_lb conversion matrix.")
+    parser.add_argument('--no-signals', action='store_true',
+                        help="Only compare the LB coefficients, not the projected signals.")
+    parser.add_argument('--num-real', type=int, default=4096)
+    parser.add_argument('--num-generated', type=int, default=4096)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=42,
+                        help="Seed of the real chunk order and of the latent stream.")
+    parser.add_argument('--noise-dim', type=int, default=128)
+    parser.add_argument('--real-baseline', action='store_true',
+                        help="Also compare two halves of the real chunks with each other.")
+    parser.add_argument('--output', default=None, help="JSON file of the metrics.")
+    parser.add_argument('--max', action='append', default=[], metavar='DOMAIN.METRIC=VALUE',
+                        help="Threshold of a metric, e.g. signals.sliced_wasserstein=0.5.")
+    return parser.parse_args()
+
+
+def load_generator(path):
+    """Returns a function mapping latent vectors to coefficient samples (batch, modes, time)."""
+
+    if path is None:
+        artifact_path = os.path.join(MODELS_DIR, 'inference', 'generator.tflite')
+        path = artifact_path if os.path.exists(artifact_path) \
+            else os.path.join(MODELS_DIR, 'generator.h5')
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model not found in: {path}")
+
+    if path.endswith(('.h5', '.keras')):
+        from tensorflow.keras.models import load_model
+        model = load_model(path, compile=False)
+        return lambda latents: np.asarray(model(latents, training=False))[..., 0]
+
+    from inference_artifact import load_inference_artifact
+    artifact = load_inference_artifact(path)
+    return lambda latents: np.asarray(artifact(latents)['coeffs'])
+
+
+def real_batches(chunks, start, stop, batch_size):
+    """Yields the real chunks `start` to `stop - 1`, in batches."""
+
+    for first in range(start, stop, batch_size):
+        yield chunks[first:min(first + batch_size, stop)]
+
+
+def generated_batches(generate, num_samples, batch_size, seed, noise_dim):
+    """Yields generated samples of the latent seed stream, in batches."""
+
+    for first in range(0, num_samples, batch_size):
+        count = min(batch_size, num_samples - first)
+        yield generate(latent_vectors(seed, first, count, noise_dim))
+
+
+def check_thresholds(report, thresholds):
+    """Returns the failures of the `DOMAIN.METRIC=VALUE` thresholds."""
+
+    failures = []
+    for threshold in thresholds:
+        name, value = threshold.split('=')
+        domain, metric = name.split('.')
+        if domain not in report['generated'] or metric not in report['generated'][domain]:
+            raise ValueError(f"Unknown metric: {name}")
+        current = report['generated'][domain][metric]
+        if current > float(value):
+            failures.append(f"{name} = {current:.4g} > {float(value):.4g}")
+    return failures
+
+
+def main():
+    args = parse_args()
+
+    # %% ---- Real chunks, generator and conversion matrix ----
+    chunks = build_chunk_cache(args.data, args.chunk_cache).shuffled(args.seed)
+    num_real = min(args.num_real, len(chunks))
+    if num_real < args.num_real:
+        print(f"Only {num_real} real chunks are available")
+    generate = load_generator(args.model)
+    projection = None if args.no_signals else get_projection(args.psi)
+
+    # %% ---- Generated vs real ----
+    start = time.perf_counter()
+    report = {'config': vars(args), 'generated': evaluate_batches(
+        real_batches(chunks, 0, num_real, args.batch_size),
+        generated_batches(generate, args.num_generated, args.batch_size, args.seed,
+                          args.noise_dim),
+        projection=projection, sketch_seed=args.seed)}
+
+    # %% ---- Real vs real (reference values) ----
+    if args.real_baseline:
+        half = num_real // 2
+        report['real_baseline'] = evaluate_batches(
+            real_batches(chunks, 0, half, args.batch_size),
+            real_batches(chunks, half, 2 * half, args.batch_size),
+            projection=projection, sketch_seed=args.seed)
+    report['seconds'] = time.perf_counter() - start
+
+    # %% ---- Report ----
+    print(f"Evaluation of {args.num_generated} generated vs {num_real} real samples "
+          f"({report['seconds']:.1f} s):")
+    for domain, metrics in report['generated'].items():
+        for metric, value in metrics.items():
+            if isinstance(value, float):
+                reference = report.get('real_baseline', {}).get(domain, {}).get(metric)
+                print(f"  {domain + '.' + metric:>28}: {value:10.4g}"
+                      + (f"   (real vs real: {reference:.4g})" if reference is not None else ""))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_thresholds(report, args.max)
+    if failures:
+        print(f"\nThresholds exceeded: {'; '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
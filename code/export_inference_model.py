@@ -0,0 +1,144 @@
+"""
+This script exports the trained generator to inference-only artifacts, so that inference
+jobs do not need to load the Keras .h5 model and its training-time machinery.
+
+The BatchNormalization layers are folded into the preceding (transposed) convolutions, and
+the (x - 0.5) * 2 denormalization and the Psi_lb projection can be fused into the graph
+(--fuse-psi), so that the artifact directly returns temporal noise signals. The exported
+artifacts are:
+    - savedmodel/: a SavedModel with a 'serving_default' signature (latents -> coeffs[, signals]).
+    - generator.tflite: the same graph as a TFLite flatbuffer.
+    - generator_int8.tflite (--quantize): TFLite with dynamic-range int8 weights.
+    - generator.onnx (--onnx): ONNX, if the optional tf2onnx package is installed.
+
+After exporting, every artifact is checked against the Keras model on random latent
+vectors (maximum absolute error of the coefficients and signals). Use
+benchmarks/benchmark_inference_artifacts.py to compare their cold-start and per-sample
+latency.
+
+Example:
+    python export_inference_model.py --output ../models/inference --fuse-psi --quantize
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Define directories
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, 'models')
+DATA_DIR = os.path.join(SCRIPT_DIR, 'utils')
+FUNCTIONS_DIR = os.path.join(SCRIPT_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Export the generator to SavedModel / TFLite / ONNX inference artifacts.")
+    parser.add_argument('--model', default=os.path.join(MODELS_DIR, 'generator.h5'),
+                        help="Path to the trained generator.")
+    parser.add_argument('--psi', default=os.path.join(DATA_DIR, 'Psi_lb.mat'),
+                        help="Path to the Psi_lb conversion matrix.")
+    parser.add_argument('--output', default=os.path.join(MODELS_DIR, 'inference'),
+                        help="Output directory of the artifacts.")
+    parser.add_argument('--fuse-psi', action='store_true',
+                        help="Fuse the denormalization and Psi_lb projection into the graph.")
+    parser.add_argument('--no-fold-bn', action='store_true',
+                        help="Keep the BatchNormalization layers.")
+    parser.add_argument('--quantize', action='store_true',
+                        help="Also export a TFLite model with dynamic-range int8 weights.")
+    parser.add_argument('--onnx', action='store_true', help="Also export to ONNX (tf2onnx).")
+    parser.add_argument('--check-samples', type=int, default=8,
+                        help="Number of samples of the accuracy check.")
+    return parser.parse_args()
+
+
+def check_accuracy(model, Psi_lb, artifact_path, num_samples, seed=0):
+    """
+    Compares the outputs of an exported artifact with those of the Keras model.
+
+    Args:
+        model (keras.Model): The Keras generator.
+        Psi_lb (np.ndarray or None): The fused conversion matrix, if any.
+        artifact_path (str): The SavedModel directory or .tflite file.
+        num_samples (int): The number of random latent vectors.
+        seed (int, optional): Seed of the latent vectors. Defaults to 0.
+
+    Returns:
+        dict: The maximum absolute error of each output.
+    """
+
+    from generate_temporal_noise_signals import latent_vectors, project_coefficients
+    from inference_artifact import load_inference_artifact
+
+    latents = latent_vectors(seed, 0, num_samples, model.input_shape[-1])
+    reference = {'coeffs': np.asarray(model(latents, training=False))[..., 0]}
+    if Psi_lb is not None:
+        reference['signals'] = project_coefficients(reference['coeffs'], Psi_lb)
+
+    outputs = load_inference_artifact(artifact_path)(latents)
+    return {name: float(np.max(np.abs(outputs[name] - reference[name])))
+            for name in reference}
+
+
+def main():
+    args = parse_args()
+
+    # %% ---- Load the generator model and conversion matrix ----
+    if not os.path.exists(args.model):
+        raise FileNotFoundError(f"Model not found in: {args.model}")
+
+    from tensorflow.keras.models import load_model
+    from model_export import export_onnx, export_saved_model, export_tflite
+
+    model = load_model(args.model, compile=False)
+    Psi_lb = None
+    if args.fuse_psi:
+        from projection import get_projection
+        Psi_lb = get_projection(args.psi).matrix(np.float64)
+
+    # %% ---- Export ----
+    os.makedirs(args.output, exist_ok=True)
+    fold_bn = not args.no_fold_bn
+    artifacts = {}
+
+    saved_model_dir = os.path.join(args.output, 'savedmodel')
+    export_saved_model(model, saved_model_dir, Psi_lb=Psi_lb, fold_bn=fold_bn)
+    artifacts['savedmodel'] = saved_model_dir
+
+    tflite_path = os.path.join(args.output, 'generator.tflite')
+    export_tflite(saved_model_dir, tflite_path)
+    artifacts['tflite'] = tflite_path
+
+    if args.quantize:
+        tflite_int8_path = os.path.join(args.output, 'generator_int8.tflite')
+        export_tflite(saved_model_dir, tflite_int8_path, quantize=True)
+        artifacts['tflite_int8'] = tflite_int8_path
+
+    if args.onnx:
+        onnx_path = os.path.join(args.output, 'generator.onnx')
+        try:
+            export_onnx(model, onnx_path, Psi_lb=Psi_lb, fold_bn=fold_bn)
+            print(f"Exported {onnx_path}")
+        except ImportError as e:
+            print(f"Skipping the ONNX export: {e}")
+
+    # %% ---- Accuracy check ----
+    print(f"\nAccuracy against the Keras model ({args.check_samples} samples, max abs error):")
+    for name, path in artifacts.items():
+        errors = check_accuracy(model, Psi_lb, path, args.check_samples)
+        size = os.path.getsize(path) if os.path.isfile(path) else sum(
+            os.path.getsize(os.path.join(root, f))
+            for root, _, files in os.walk(path) for f in files)
+        print(f"  {name:>12}: " + ", ".join(f"{k} {v:.2e}" for k, v in errors.items())
+              + f"  ({size / 2**20:.1f} MB) -> {path}")
+
+
+if __name__ == '__main__':
+    main()
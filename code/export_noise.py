@@ -0,0 +1,97 @@
+"""
+This script exports large synthetic BSPM noise corpora to disk. It drives the trained
+generator and the Psi_lb projection in batches and writes chunked, compressed shards
+(HDF5 or Zarr, with plain .npy files as a fallback).
+
+With --workers N, the shards are generated by a pool of N processes (each one loading the
+generator once, with pinned thread counts), which is the recommended mode on multi-core
+CPU boxes without GPU.
+
+The job is resumable: a manifest in the output directory records the seed, the model
+hash and the finished shards, so running the same command again after an interruption
+only generates the missing shards.
+
+Example:
+    python export_noise.py --output ../data/synthetic --num-samples 100000 --shard-size 1024 --workers 8
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Define directories
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, 'models')
+DATA_DIR = os.path.join(SCRIPT_DIR, 'utils')
+FUNCTIONS_DIR = os.path.join(SCRIPT_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+from noise_export import export_noise, file_sha256  # noqa: E402
+from inference_farm import export_noise_parallel  # noqa: E402
+from projection import get_projection  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Export generated BSPM noise samples to sharded files.")
+    parser.add_argument('--model', default=os.path.join(MODELS_DIR, 'generator.h5'),
+                        help="Path to the trained generator.")
+    parser.add_argument('--psi', default=os.path.join(DATA_DIR, 'Psi_lb.mat'),
+                        help="Path to the Psi_lb conversion matrix.")
+    parser.add_argument('--output', required=True, help="Output directory.")
+    parser.add_argument('--num-samples', type=int, required=True)
+    parser.add_argument('--shard-size', type=int, default=1024)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--noise-dim', type=int, default=128)
+    parser.add_argument('--format', default='auto', choices=['auto', 'hdf5', 'zarr', 'npy'])
+    parser.add_argument('--outputs', nargs='+', default=['coeffs', 'signals'],
+                        choices=['coeffs', 'signals'])
+    parser.add_argument('--dtype', default='float32', choices=['float32', 'float64'])
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of generation processes (1 runs in this process).")
+    parser.add_argument('--intra-op-threads', type=int, default=None,
+                        help="Intra-op threads per worker (default: CPUs / workers).")
+    parser.add_argument('--inter-op-threads', type=int, default=1,
+                        help="Inter-op threads per worker.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # %% ---- Load the generator model and conversion matrix ----
+    if not os.path.exists(args.model):
+        raise FileNotFoundError(f"Model not found in: {args.model}")
+
+    # Psi_lb in the precision of the stored signals
+    Psi_lb = get_projection(args.psi).matrix(np.dtype(args.dtype))
+    model_hash = file_sha256(args.model)
+
+    # %% ---- Export ----
+    if args.workers > 1:
+        # Each worker process loads the generator itself
+        export_noise_parallel(
+            args.model, Psi_lb, args.output, args.num_samples, model_hash,
+            n_workers=args.workers, intra_op_threads=args.intra_op_threads,
+            inter_op_threads=args.inter_op_threads,
+            noise_dim=args.noise_dim, shard_size=args.shard_size, batch_size=args.batch_size,
+            seed=args.seed, fmt=args.format, outputs=tuple(args.outputs),
+            dtype=np.dtype(args.dtype))
+    else:
+        from tensorflow.keras.models import load_model
+        model = load_model(args.model, compile=False)
+        export_noise(
+            model, Psi_lb, args.output, args.num_samples, model_hash,
+            noise_dim=args.noise_dim, shard_size=args.shard_size, batch_size=args.batch_size,
+            seed=args.seed, fmt=args.format, outputs=tuple(args.outputs),
+            dtype=np.dtype(args.dtype))
+
+
+if __name__ == '__main__':
+    main()
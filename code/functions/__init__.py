@@ -0,0 +1,35 @@
+"""
+Custom functions of the BSPM noise GAN.
+
+The modules are written to be imported as top-level modules (the scripts add this
+directory to `sys.path`). Importing this package is cheap: the modules are only
+imported when accessed (e.g. `functions.training`), so that heavy dependencies
+such as TensorFlow or matplotlib are only loaded by the code that needs them.
+"""
+
+import importlib
+import os
+import sys
+
+FUNCTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The modules import each other as top-level modules
+if FUNCTIONS_DIR not in sys.path:
+    sys.path.append(FUNCTIONS_DIR)
+
+__all__ = sorted(
+    name[:-3] for name in os.listdir(FUNCTIONS_DIR)
+    if name.endswith('.py') and not name.startswith('_'))
+
+
+def __getattr__(name):
+    # Import the module on first access, as the same top-level module the scripts use
+    if name in __all__:
+        module = importlib.import_module(name)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,174 @@
+import os
+import sys
+import queue
+import threading
+import subprocess
+import numpy as np
+
+
+class AsyncArtifactWriter:
+    """
+    Background I/O worker for the training loop.
+
+    Model weights are snapshotted on the calling thread (a copy of the NumPy
+    weights) and written to disk by a single background thread, using a shadow
+    copy of each model, so that saving never blocks the training steps. The
+    loss log is append-only. The queue is bounded, so at most `max_pending`
+    snapshots are kept in memory if the disk falls behind.
+    """
+
+    def __init__(self, max_pending=2):
+        """
+        Args:
+            max_pending (int, optional): The maximum number of pending write tasks.
+                                         Defaults to 2.
+        """
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._shadow_models = {}
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='artifact-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                self._queue.task_done()
+                return
+            try:
+                task()
+            except Exception as e:  # Reported on the training thread
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _submit(self, task):
+        if self._error is not None:
+            raise RuntimeError("Background artifact writing failed") from self._error
+        self._queue.put(task)
+
+    def save_model(self, model, path):
+        """
+        Snapshots the weights of `model` and saves the model to `path` in the
+        background. The file is written under a temporary name and then renamed,
+        so `path` always holds a complete model.
+
+        Args:
+            model (tf.keras.Model): The model to save.
+            path (str): The destination path (.h5).
+        """
+
+        import tensorflow as tf
+
+        # The shadow model is only used by the background thread
+        key = id(model)
+        if key not in self._shadow_models:
+            self._shadow_models[key] = tf.keras.models.clone_model(model)
+        shadow = self._shadow_models[key]
+        weights = model.get_weights()
+
+        def task():
+            shadow.set_weights(weights)
+            root, ext = os.path.splitext(path)
+            tmp_path = root + '.tmp' + ext
+            shadow.save(tmp_path)
+            os.replace(tmp_path, path)
+
+        self._submit(task)
+
+    def append_line(self, path, line, header=None):
+        """
+        Appends a line to a text log in the background, writing `header` first
+        if the file does not exist yet.
+
+        Args:
+            path (str): The path to the log file.
+            line (str): The line to append (without newline).
+            header (str, optional): The header line of a new file. Defaults to None.
+        """
+
+        def task():
+            new_file = not os.path.exists(path)
+            with open(path, 'a') as f:
+                if new_file and header is not None:
+                    f.write(header + '\n')
+                f.write(line + '\n')
+
+        self._submit(task)
+
+    def call(self, fn, *args, **kwargs):
+        """Runs an arbitrary I/O function in the background."""
+
+        self._submit(lambda: fn(*args, **kwargs))
+
+    def flush(self):
+        """Waits until all the pending tasks are written."""
+
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("Background artifact writing failed") from self._error
+
+    def close(self):
+        """Writes the pending tasks and stops the background thread."""
+
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+
+class FigureRenderer:
+    """
+    Renders figures of generated samples in separate Python processes, so that
+    matplotlib never stalls the training steps.
+
+    Each figure is rendered by a fresh interpreter that only imports NumPy,
+    matplotlib (non-interactive backend) and `visualization`. It does not
+    re-import the training script, so this is safe on every platform even if
+    that script has no `if __name__ == '__main__':` guard.
+    """
+
+    def __init__(self, max_running=2):
+        """
+        Args:
+            max_running (int, optional): The maximum number of rendering processes
+                                         running at the same time. Defaults to 2.
+        """
+
+        self.max_running = max_running
+        self._processes = []
+
+    def submit(self, samples, epoch, path, vmin=0.0, vmax=1.0):
+        """
+        Renders a grid of generated samples to `path` (.png) in the background.
+
+        Args:
+            samples (np.ndarray): The generated samples, of shape (n, rows, cols, 1).
+            epoch (int): The (1-based) epoch number, used in the titles.
+            path (str): The path of the figure.
+            vmin (float, optional): The lower limit of the color scale. Defaults to 0.
+            vmax (float, optional): The upper limit of the color scale. Defaults to 1.
+        """
+
+        # Bound the number of rendering processes running at the same time
+        self._processes = [p for p in self._processes if p.poll() is None]
+        while len(self._processes) >= self.max_running:
+            self._processes.pop(0).wait()
+
+        data_path = os.path.splitext(path)[0] + '.samples.npz'
+        np.savez(data_path, samples=samples, epoch=epoch, vmin=vmin, vmax=vmax)
+
+        functions_dir = os.path.dirname(os.path.abspath(__file__))
+        code = ("import sys; sys.path.insert(0, sys.argv[1]); "
+                "import matplotlib; matplotlib.use('Agg'); "
+                "from visualization import render_generated_samples; "
+                "render_generated_samples(sys.argv[2], sys.argv[3])")
+        self._processes.append(subprocess.Popen(
+            [sys.executable, '-c', code, functions_dir, data_path, path]))
+
+    def close(self):
+        """Waits for the running rendering processes."""
+
+        for process in self._processes:
+            process.wait()
+        self._processes = []
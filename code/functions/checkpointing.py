@@ -0,0 +1,158 @@
+import os
+import glob
+import json
+import numpy as np
+import tensorflow as tf
+
+
+def build_checkpoint(generator, discriminator, optimizer_g, optimizer_d, rng):
+    """
+    Builds the `tf.train.Checkpoint` holding the full state of a WGAN-GP training run.
+
+    The checkpoint tracks both models, both optimizers (including their slots,
+    iteration counters and learning rates), the TensorFlow random generator used
+    for the latent vectors and gradient penalty, and the scalar state of the
+    training loop (next epoch, LR scheduler counters, best generator loss, best
+    quality metric and early stopping counter).
+    The loss histories and the NumPy RNG state are not tensors, so they are saved
+    in a JSON file next to each checkpoint (see `save_checkpoint`).
+
+    Args:
+        generator (tf.keras.Model): The generator model.
+        discriminator (tf.keras.Model): The discriminator (critic) model.
+        optimizer_g (tf.keras.optimizers.Optimizer): The optimizer for the generator.
+        optimizer_d (tf.keras.optimizers.Optimizer): The optimizer for the critic.
+        rng (tf.random.Generator): The random generator of the training step.
+
+    Returns:
+        tuple: A tuple containing:
+            - checkpoint (tf.train.Checkpoint): The checkpoint object.
+            - loop_state (dict): The `tf.Variable` holding each scalar of the
+                                 training loop state.
+    """
+
+    # Create the optimizer variables now, so they can be restored immediately
+    for optimizer, model in ((optimizer_g, generator), (optimizer_d, discriminator)):
+        if hasattr(optimizer, 'build'):
+            optimizer.build(model.trainable_variables)
+
+    loop_state = {
+        'epoch': tf.Variable(0, dtype=tf.int64, trainable=False),
+        'patience_counter': tf.Variable(0, dtype=tf.int64, trainable=False),
+        'previous_loss': tf.Variable(float('inf'), dtype=tf.float64, trainable=False),
+        'best_gen_loss': tf.Variable(float('inf'), dtype=tf.float64, trainable=False),
+        'best_quality': tf.Variable(float('inf'), dtype=tf.float64, trainable=False),
+        'evals_without_improvement': tf.Variable(0, dtype=tf.int64, trainable=False),
+    }
+
+    checkpoint = tf.train.Checkpoint(
+        generator=generator, discriminator=discriminator,
+        optimizer_g=optimizer_g, optimizer_d=optimizer_d,
+        rng=rng, **loop_state)
+
+    return checkpoint, loop_state
+
+
+def _history_path(checkpoint_path):
+    """Returns the path of the JSON file with the non-tensor state of a checkpoint."""
+
+    return checkpoint_path + '.history.json'
+
+
+def save_checkpoint(manager, epoch, histories):
+    """
+    Saves a checkpoint of the training state after `epoch` (0-based) and the
+    JSON file with its loss histories and NumPy RNG state. The JSON files of
+    the checkpoints rotated out by the manager are deleted.
+
+    Args:
+        manager (tf.train.CheckpointManager): The checkpoint manager.
+        epoch (int): The last completed epoch.
+        histories (dict): The lists of per-epoch values (losses, learning rates).
+
+    Returns:
+        str: The path of the saved checkpoint.
+    """
+
+    checkpoint_path = manager.save(checkpoint_number=epoch + 1)
+
+    mt_name, mt_keys, mt_pos, mt_has_gauss, mt_gauss = np.random.get_state()
+    state = {
+        'histories': {name: [float(v) for v in values] for name, values in histories.items()},
+        'numpy_rng': [mt_name, mt_keys.tolist(), int(mt_pos), int(mt_has_gauss), float(mt_gauss)],
+    }
+    tmp_path = _history_path(checkpoint_path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _history_path(checkpoint_path))
+
+    # Remove the JSON files of the rotated checkpoints
+    kept = {_history_path(path) for path in manager.checkpoints}
+    for path in glob.glob(os.path.join(manager.directory, '*.history.json')):
+        if path not in kept:
+            os.remove(path)
+
+    return checkpoint_path
+
+
+def restore_checkpoint(manager):
+    """
+    Restores the latest checkpoint of a manager, if any, together with its loss
+    histories and NumPy RNG state.
+
+    Args:
+        manager (tf.train.CheckpointManager): The checkpoint manager.
+
+    Returns:
+        dict or None: The restored lists of per-epoch values, or None if there is
+                      no checkpoint to restore.
+    """
+
+    checkpoint_path = manager.latest_checkpoint
+    if checkpoint_path is None:
+        return None
+
+    manager.checkpoint.restore(checkpoint_path).assert_existing_objects_matched()
+
+    with open(_history_path(checkpoint_path)) as f:
+        state = json.load(f)
+    mt_name, mt_keys, mt_pos, mt_has_gauss, mt_gauss = state['numpy_rng']
+    np.random.set_state((mt_name, np.array(mt_keys, dtype=np.uint32),
+                         mt_pos, mt_has_gauss, mt_gauss))
+
+    print(f"Restored checkpoint '{checkpoint_path}'")
+
+    return state['histories']
+
+
+def truncate_epoch_log(path, last_epoch):
+    """
+    Removes the records of a per-epoch log after `last_epoch`, e.g. the epochs logged
+    after the checkpoint that training resumes from, so that they are not logged
+    twice. The log is either a CSV file with a header line whose first column is the
+    1-based epoch, or a JSON lines file ('.jsonl') whose records have an 'epoch' key.
+    The file is replaced atomically.
+
+    Args:
+        path (str): The log file. Nothing is done if it does not exist.
+        last_epoch (int): The last epoch to keep.
+    """
+
+    if not os.path.exists(path):
+        return
+
+    with open(path) as f:
+        lines = f.readlines()
+    if path.endswith('.jsonl'):
+        kept = [line for line in lines
+                if line.strip() and json.loads(line)['epoch'] <= last_epoch]
+    else:
+        kept = lines[:1] + [line for line in lines[1:]
+                            if line.strip() and int(line.split(',', 1)[0]) <= last_epoch]
+    if len(kept) == len(lines):
+        return
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.writelines(kept)
+    os.replace(tmp_path, path)
@@ -0,0 +1,253 @@
+import os
+import json
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from load_data import load_mat_file
+from preprocessing import recording_chunks
+
+
+MANIFEST_NAME = 'manifest.json'
+
+# Version of the chunk format, part of the cache keys
+CHUNK_CACHE_VERSION = 1
+
+
+def _params_digest(params):
+    """Returns a short digest of the preprocessing parameters."""
+
+    text = json.dumps(dict(params, version=CHUNK_CACHE_VERSION), sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def _content_sha256(path):
+    """Returns the SHA-256 hash of the content of a file, read in blocks."""
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _process_recording(path, chunks_dir, params, params_digest):
+    """
+    Hashes a recording and, if its chunks are not cached yet, loads, preprocesses
+    and caches them. Runs in a worker process.
+
+    Returns:
+        dict: The manifest entry of the recording.
+    """
+
+    sha256 = _content_sha256(path)
+    key = f"{sha256[:32]}_{params_digest}"
+    chunk_path = os.path.join(chunks_dir, key + '.npy')
+
+    # The content may be unchanged (e.g. a touched or renamed file)
+    if os.path.exists(chunk_path):
+        num_chunks = int(np.load(chunk_path, mmap_mode='r').shape[0])
+    else:
+        mat = load_mat_file(path, fields=('coeffs_lb',))['coeffs_lb']
+        chunks = recording_chunks(mat, **params)
+        # Written under a temporary name, so the cache never holds partial files
+        tmp_path = f"{chunk_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, chunks)
+        os.replace(tmp_path, chunk_path)
+        num_chunks = len(chunks)
+
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256,
+            'key': key, 'num_chunks': num_chunks}
+
+
+def build_chunk_cache(dataset_path, cache_dir, factor=2, window=2500, pad_threshold=0.0,
+                      n_workers=None, prune=True):
+    """
+    Updates the per-recording cache of preprocessed chunks and returns an index over
+    them.
+
+    Every recording (.mat file) is preprocessed on its own with
+    `preprocessing.recording_chunks` (trimming, decimation, chunking and normalization)
+    and its float32 chunks are stored in a .npy file keyed by the SHA-256 hash of the
+    file content and the preprocessing parameters. Only new or changed recordings are
+    loaded and preprocessed: a recording whose size and modification time match the
+    manifest is not even read, and one whose content hash is already cached is not
+    preprocessed again.
+
+    Args:
+        dataset_path (str): The directory of the .mat files.
+        cache_dir (str): The directory of the cache.
+        factor (int, optional): The decimation factor. Defaults to 2.
+        window (int, optional): The number of columns of each chunk. Defaults to 2500.
+        pad_threshold (float, optional): The first-row magnitude up to which the columns
+                                         at both ends count as padding. Defaults to 0.0.
+        n_workers (int, optional): The number of worker processes preprocessing the new
+                                   recordings. Defaults to None (one per CPU). Use 1 to
+                                   process them serially.
+        prune (bool, optional): Whether to delete the cached chunks that no recording
+                                uses anymore (removed recordings, other parameters).
+                                Defaults to True.
+
+    Returns:
+        ChunkIndex: The index over the chunks of all recordings, in recording order
+                    (sorted file names, like `load_data`).
+    """
+
+    params = {'factor': factor, 'window': window, 'pad_threshold': pad_threshold}
+    params_digest = _params_digest(params)
+    chunks_dir = os.path.join(cache_dir, 'chunks')
+    os.makedirs(chunks_dir, exist_ok=True)
+
+    manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)['recordings']
+
+    # Recordings whose size, modification time and parameters are unchanged are hits
+    file_names = sorted(f for f in os.listdir(dataset_path) if f.endswith('.mat'))
+    entries, pending = {}, []
+    for name in file_names:
+        stat = os.stat(os.path.join(dataset_path, name))
+        entry = manifest.get(name)
+        if entry is not None and entry['size'] == stat.st_size and \
+                entry['mtime_ns'] == stat.st_mtime_ns and \
+                entry['key'].endswith(params_digest) and \
+                os.path.exists(os.path.join(chunks_dir, entry['key'] + '.npy')):
+            entries[name] = entry
+        else:
+            pending.append(name)
+
+    # Hash and, if needed, preprocess the new or changed recordings
+    if pending:
+        print(f"Preprocessing {len(pending)} new or changed recordings "
+              f"({len(entries)} cached)...")
+        paths = [os.path.join(dataset_path, name) for name in pending]
+        args = (paths, [chunks_dir] * len(paths), [params] * len(paths),
+                [params_digest] * len(paths))
+        if n_workers == 1 or len(paths) == 1:
+            results = list(map(_process_recording, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                results = list(executor.map(_process_recording, *args))
+        entries.update(zip(pending, results))
+
+    # The manifest is replaced atomically
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'params': params, 'recordings': entries}, f)
+    os.replace(tmp_path, manifest_path)
+
+    if prune:
+        used = {entries[name]['key'] + '.npy' for name in file_names}
+        for name in os.listdir(chunks_dir):
+            if name.endswith('.npy') and name not in used:
+                os.remove(os.path.join(chunks_dir, name))
+
+    return ChunkIndex([os.path.join(chunks_dir, entries[name]['key'] + '.npy')
+                       for name in file_names], file_names)
+
+
+class ChunkIndex:
+    """
+    Read-only, array-like view of the chunks cached by `build_chunk_cache`, stored in
+    one memory-mapped .npy file per recording.
+
+    It has a `shape`, a `dtype` and a length, and supports integer, slice and
+    integer-array indexing (e.g. a batch of shuffled indices), gathering the requested
+    chunks from the recording files. It can be passed wherever a memory-mapped array
+    of samples is accepted (e.g. `input_pipeline.make_training_dataset`). Shuffling
+    (`shuffled`) only permutes an index: no data is copied.
+    """
+
+    def __init__(self, chunk_paths, sources=None, order=None, channel_axis=False):
+        """
+        Args:
+            chunk_paths (list of str): The .npy file of the chunks of each recording.
+            sources (list of str, optional): The name of each recording.
+            order (np.ndarray, optional): The global chunk index of each sample.
+                                          Defaults to None (recording order).
+            channel_axis (bool, optional): Whether samples have a trailing channel
+                                           axis, (rows, cols, 1). Defaults to False.
+        """
+
+        self.chunk_paths = list(chunk_paths)
+        self.sources = list(sources) if sources is not None else self.chunk_paths
+        self._arrays = [np.load(path, mmap_mode='r') for path in self.chunk_paths]
+        self.offsets = np.cumsum([0] + [len(a) for a in self._arrays])
+        num_chunks = int(self.offsets[-1])
+        self.order = np.arange(num_chunks) if order is None else np.asarray(order)
+        self.channel_axis = channel_axis
+
+        sample_shape = next((a.shape[1:] for a in self._arrays if len(a)), (128, 2500))
+        self.sample_shape = tuple(sample_shape) + ((1,) if channel_axis else ())
+        self.dtype = next((a.dtype for a in self._arrays), np.dtype(np.float32))
+
+    @property
+    def num_recordings(self):
+        return len(self.chunk_paths)
+
+    @property
+    def shape(self):
+        return (len(self.order),) + self.sample_shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _view(self, order=None, channel_axis=None):
+        view = ChunkIndex.__new__(ChunkIndex)
+        view.__dict__.update(self.__dict__)
+        if order is not None:
+            view.order = order
+        if channel_axis is not None and channel_axis != self.channel_axis:
+            view.channel_axis = channel_axis
+            view.sample_shape = self.sample_shape + (1,) if channel_axis \
+                else self.sample_shape[:-1]
+        return view
+
+    def shuffled(self, seed=42):
+        """
+        Returns a view of the samples in shuffled order. The order is the same as
+        that of `preprocessing.decimate_data` with the same seed.
+        """
+
+        np.random.seed(seed)
+        return self._view(order=self.order[np.random.permutation(len(self.order))])
+
+    def with_channel_axis(self):
+        """Returns a view whose samples have a trailing channel axis, (rows, cols, 1)."""
+
+        return self._view(channel_axis=True)
+
+    def source(self, i):
+        """Returns the recording name and chunk position of sample `i`."""
+
+        chunk = int(self.order[i])
+        rec = int(np.searchsorted(self.offsets, chunk, side='right') - 1)
+        return self.sources[rec], chunk - int(self.offsets[rec])
+
+    def __getitem__(self, idx):
+        single = np.isscalar(idx) or (isinstance(idx, np.ndarray) and idx.ndim == 0)
+        chunks = np.atleast_1d(self.order[idx])
+
+        # Gather the chunks, grouped by recording file
+        out = np.empty((len(chunks),) + self.sample_shape[:2], dtype=self.dtype)
+        recs = np.searchsorted(self.offsets, chunks, side='right') - 1
+        for rec in np.unique(recs):
+            mask = recs == rec
+            local = chunks[mask] - self.offsets[rec]
+            out[mask] = self._arrays[rec][local]
+
+        if self.channel_axis:
+            out = out[..., None]
+        return out[0] if single else out
+
+    def __array__(self, dtype=None):
+        array = self[np.arange(len(self))]
+        return array if dtype is None else array.astype(dtype, copy=False)
@@ -1,8 +1,14 @@
 from keras.models import Sequential
 from keras.layers import Dense, Flatten, LeakyReLU, Dropout, Conv2D
+from keras.layers import GlobalAveragePooling2D, GroupNormalization, Layer
 import tensorflow as tf
 
 
+# Scale applied to the critic output before computing the gradient penalty
+# gradients of a float16 critic, so that they do not underflow in float16
+FLOAT16_GP_GRAD_SCALE = 2.0 ** 10
+
+
 def disc_model_critic(rows, cols):
     """
     Constructs a discriminator (critic) model for a Wasserstein Generative Adversarial Network 
@@ -41,7 +47,8 @@ def disc_model_critic(rows, cols):
     # Final Dense layer: Outputs a single scalar value. No activation is used
     # because for a WGAN critic, this output represents a raw "score" or "criticism"
     # rather than a probability
-    model.add(Dense(1))  # No activation function for critic output
+    # The output layer is kept in float32 under mixed-precision policies
+    model.add(Dense(1, dtype='float32'))  # No activation function for critic output
 
     # Prints a summary of the model's architecture, including layer types,
     # output shapes, and number of parameters
@@ -51,7 +58,186 @@ def disc_model_critic(rows, cols):
     return model
 
 
-def gradient_penalty(critic, real_imgs, fake_imgs, lambda_gp):
+class MinibatchStdDev(Layer):
+    """
+    Minibatch standard deviation layer: appends to each sample a feature map with
+    the standard deviation of the features across the batch, averaged over all
+    positions and channels. It lets the critic detect a lack of diversity among
+    generated samples (mode collapse).
+
+    Its output depends on the whole batch, so the critic must be evaluated on
+    real and generated samples separately (see `is_batch_dependent`).
+    """
+
+    def call(self, inputs):
+        # Standard deviation of each feature across the batch, averaged to one scalar
+        # (in float32: the epsilon underflows in float16)
+        std = tf.sqrt(tf.math.reduce_variance(tf.cast(inputs, tf.float32), axis=0) + 1e-8)
+        mean_std = tf.reduce_mean(std)
+        std_map = tf.ones_like(inputs[..., :1]) * tf.cast(mean_std, inputs.dtype)
+        return tf.concat([inputs, std_map], axis=-1)
+
+    def compute_output_shape(self, input_shape):
+        return input_shape[:-1] + (input_shape[-1] + 1,)
+
+
+class SpectralNormConv2D(Conv2D):
+    """
+    Conv2D layer with a spectrally normalized kernel: the kernel is divided by an
+    estimate of its largest singular value, obtained by power iteration, so the
+    layer is (approximately) 1-Lipschitz.
+
+    The normalization is part of the forward pass, so the gradients flow through
+    the singular value estimate (including the double-backprop of the gradient
+    penalty). The power-iteration vector is a non-trainable weight, updated in
+    training calls. Under mixed precision, the kernel and the vector are not
+    autocast: the estimate and the normalization are computed in float32, and
+    only the normalized kernel is cast to the compute dtype.
+    """
+
+    def __init__(self, *args, power_iterations=1, **kwargs):
+        if power_iterations < 1:
+            raise ValueError(
+                f"power_iterations must be at least 1, got {power_iterations}")
+        super().__init__(*args, **kwargs)
+        self.power_iterations = power_iterations
+
+    def add_weight(self, name=None, *args, **kwargs):
+        # The kernel is read in float32 (see `call`), not autocast to float16
+        if name in ('kernel', 'vector_u'):
+            kwargs['experimental_autocast'] = False
+        return super().add_weight(name, *args, **kwargs)
+
+    def build(self, input_shape):
+        super().build(input_shape)
+        self.vector_u = self.add_weight(
+            name='vector_u', shape=(1, self.filters), dtype=tf.float32,
+            initializer=tf.keras.initializers.RandomNormal(), trainable=False)
+
+    def call(self, inputs, training=None):
+        # Power iteration on the (kernel_h * kernel_w * in_channels, filters) matrix
+        kernel = tf.cast(self.kernel, tf.float32)
+        weights = tf.reshape(kernel, [-1, self.filters])
+        vector_u = tf.cast(self.vector_u, tf.float32)
+        for _ in range(self.power_iterations):
+            vector_v = tf.math.l2_normalize(tf.matmul(vector_u, weights, transpose_b=True))
+            vector_u = tf.math.l2_normalize(tf.matmul(vector_v, weights))
+        vector_u = tf.stop_gradient(vector_u)
+        vector_v = tf.stop_gradient(vector_v)
+        sigma = tf.matmul(tf.matmul(vector_v, weights), vector_u, transpose_b=True)[0, 0]
+        if training:
+            self.vector_u.assign(vector_u)
+
+        kernel = tf.cast(kernel / sigma, self.compute_dtype)
+        outputs = self.convolution_op(inputs, kernel)
+        if self.use_bias:
+            outputs = tf.nn.bias_add(outputs, self.bias)
+        if self.activation is not None:
+            outputs = self.activation(outputs)
+        return outputs
+
+    def get_config(self):
+        config = super().get_config()
+        config['power_iterations'] = self.power_iterations
+        return config
+
+
+# Custom layers needed to load a saved critic, e.g.
+# `load_model(path, custom_objects=CRITIC_CUSTOM_OBJECTS)`
+CRITIC_CUSTOM_OBJECTS = {'MinibatchStdDev': MinibatchStdDev,
+                         'SpectralNormConv2D': SpectralNormConv2D}
+
+
+def build_critic(rows, cols, depth=2, base_width=8, widths=None, kernel_size=5,
+                 head='flatten', norm=None, dropout=0.3):
+    """
+    Constructs a configurable critic for the WGAN-GP.
+
+    The critic is a stack of `depth` stride-2 convolutional blocks (convolution,
+    optional normalization, Leaky ReLU and dropout) followed by a head producing
+    one scalar score per sample. With the default arguments, it has the same
+    architecture as `disc_model_critic`.
+
+    The 'flatten' head feeds every feature of the last block to a Dense layer, so
+    its parameters grow linearly with the number of columns. The 'gap' and
+    'minibatch_std' heads average the features over all positions first, so their
+    size does not depend on the input length, which allows training on longer
+    windows or with bigger batches in the same memory budget (a deeper critic is
+    then recommended, to keep a large receptive field).
+
+    Batch normalization is not offered, since it breaks the per-sample gradient
+    penalty of WGAN-GP; 'layer' normalization (over all positions and channels of
+    a sample) and 'spectral' normalization of the convolution kernels are.
+
+    Args:
+        rows (int): The number of rows (height) of the input images/data samples.
+        cols (int): The number of columns (width) of the input images/data samples.
+        depth (int, optional): The number of convolutional blocks. Defaults to 2.
+        base_width (int, optional): The filters of the first block, doubled at every
+                                    block. Defaults to 8.
+        widths (list of int, optional): The filters of each block, overriding `depth`
+                                        and `base_width`. Defaults to None.
+        kernel_size (int, optional): The kernel size of the convolutions. Defaults to 5.
+        head (str, optional): 'flatten' (Flatten + Dense), 'gap' (global average
+                              pooling + Dense) or 'minibatch_std' (minibatch standard
+                              deviation + global average pooling + Dense).
+                              Defaults to 'flatten'.
+        norm (str, optional): None, 'layer' or 'spectral'. Defaults to None.
+        dropout (float, optional): The dropout rate of each block (0 disables it).
+                                   Defaults to 0.3.
+
+    Returns:
+        keras.Model: A Keras Sequential model representing the discriminator (critic).
+    """
+
+    if head not in ('flatten', 'gap', 'minibatch_std'):
+        raise ValueError(f"Unknown critic head '{head}'")
+    if norm not in (None, 'layer', 'spectral'):
+        raise ValueError(f"Unknown critic normalization '{norm}'")
+    if widths is None:
+        widths = [base_width * 2**i for i in range(depth)]
+
+    model = Sequential()
+    model.add(tf.keras.Input(shape=(rows, cols, 1)))
+
+    # Convolutional blocks: downsample by 2 and extract features
+    for filters in widths:
+        conv_layer = SpectralNormConv2D if norm == 'spectral' else Conv2D
+        model.add(conv_layer(filters, kernel_size=kernel_size, strides=2, padding="same"))
+        if norm == 'layer':
+            # A single group normalizes over all positions and channels of a sample
+            model.add(GroupNormalization(groups=1))
+        model.add(LeakyReLU(alpha=0.2))  # Non-linear activation for GANs
+        if dropout:
+            model.add(Dropout(dropout))  # Regularization to prevent overfitting
+
+    # Head: one scalar score per sample, with no activation
+    if head == 'flatten':
+        model.add(Flatten())
+    else:
+        if head == 'minibatch_std':
+            model.add(MinibatchStdDev())
+        model.add(GlobalAveragePooling2D())
+    # The output layer is kept in float32 under mixed-precision policies
+    model.add(Dense(1, dtype='float32'))
+
+    print(f"######### Critic (discriminator) Summary #########")
+    model.summary()
+
+    return model
+
+
+def is_batch_dependent(critic):
+    """
+    Returns whether the output of a critic for a sample depends on the other
+    samples of the batch (e.g. with a `MinibatchStdDev` layer). Such a critic
+    cannot be evaluated on concatenated real, fake and interpolated samples.
+    """
+
+    return any(isinstance(layer, MinibatchStdDev) for layer in critic.layers)
+
+
+def gradient_penalty(critic, real_imgs, fake_imgs, lambda_gp, rng=None, grad_scale=None):
     """
     Calculates the Gradient Penalty (GP) for a WGAN-GP.
 
@@ -64,20 +250,29 @@ def gradient_penalty(critic, real_imgs, fake_imgs, lambda_gp):
         real_imgs (tf.Tensor): A batch of real images/data samples.
         fake_imgs (tf.Tensor): A batch of fake images/data samples generated by the generator.
         lambda_gp (float): The regularization coefficient for the gradient penalty.
+        rng (tf.random.Generator, optional): The random generator used to sample the
+                                             interpolation weights. Defaults to None
+                                             (TensorFlow's global generator).
+        grad_scale (float, optional): If given, the critic output is multiplied by this
+                                      factor before differentiating it, and the gradients
+                                      are divided by it in float32. Used with float16
+                                      critics to avoid underflow. Defaults to None.
 
     Returns:
         tf.Tensor: The calculated gradient penalty, scaled by `lambda_gp`.
     """
 
     # Generate random interpolation weights (alpha) for mixing real and fake images
-    # Alpha is sampled from a uniform distribution between 0 and 1
-    alpha = tf.random.uniform(
+    # Alpha is sampled from a uniform distribution between 0 and 1, with the
+    # data type of the samples
+    uniform = tf.random.uniform if rng is None else rng.uniform
+    alpha = uniform(
         [tf.shape(real_imgs)[0], 1, 1, 1], 0., 1.,
-        dtype=tf.float32  # Explicitly float32
+        dtype=real_imgs.dtype
     )
 
-    # Calculate (1 - alpha), explicitly ensuring it's float32
-    one_minus_alpha = tf.cast(1.0 - alpha, tf.float32)
+    # Calculate (1 - alpha)
+    one_minus_alpha = 1.0 - alpha
 
     # Create interpolated samples by linearly combining real and fake images
     interpolated_imgs = real_imgs * alpha + fake_imgs * \
@@ -88,10 +283,18 @@ def gradient_penalty(critic, real_imgs, fake_imgs, lambda_gp):
     with tf.GradientTape() as gp_tape:
         gp_tape.watch(interpolated_imgs)
         interpolated_pred = critic(interpolated_imgs, training=True)
+        if grad_scale is not None:
+            interpolated_pred = tf.cast(interpolated_pred, tf.float32) * grad_scale
 
     # Compute the gradients.
     grads = gp_tape.gradient(interpolated_pred, interpolated_imgs)
 
+    # The norm is always computed in float32, for numerical safety under
+    # mixed-precision policies
+    grads = tf.cast(grads, tf.float32)
+    if grad_scale is not None:
+        grads = grads / grad_scale
+
     # Calculate the L2 norm (magnitude) of the gradients for each interpolated sample
     norm = tf.sqrt(tf.reduce_sum(tf.square(grads), axis=[1, 2, 3]))
 
@@ -100,3 +303,67 @@ def gradient_penalty(critic, real_imgs, fake_imgs, lambda_gp):
     gp = tf.reduce_mean((norm - 1.0)**2)
 
     return gp * lambda_gp
+
+
+def critic_losses_fused(critic, real_imgs, fake_imgs, lambda_gp, rng=None, grad_scale=None):
+    """
+    Calculates the Wasserstein critic loss and the Gradient Penalty (GP) of a
+    WGAN-GP with a single forward pass of the critic.
+
+    Real, fake and interpolated samples are concatenated into one batch of
+    3 x batch_size samples, the critic is evaluated once, and its outputs are
+    split afterwards. The GP gradients are taken with respect to the interpolated
+    part of the batch inside the same forward pass, so when this function is
+    called within an outer `tf.GradientTape`, the critic update is differentiated
+    through a single (double-backprop) graph instead of three critic calls.
+
+    This is only equivalent to calling the critic separately on each part if the
+    critic processes each sample independently (no batch statistics across samples).
+
+    Args:
+        critic (tf.keras.Model): The discriminator (critic) model.
+        real_imgs (tf.Tensor): A batch of real images/data samples.
+        fake_imgs (tf.Tensor): A batch of fake images/data samples generated by the generator.
+        lambda_gp (float): The regularization coefficient for the gradient penalty.
+        rng (tf.random.Generator, optional): The random generator used to sample the
+                                             interpolation weights. Defaults to None
+                                             (TensorFlow's global generator).
+        grad_scale (float, optional): Scale of the critic output for the GP gradients,
+                                      as in `gradient_penalty`. Defaults to None.
+
+    Returns:
+        tuple: A tuple containing:
+            - critic_loss (tf.Tensor): The Wasserstein term, mean(fake) - mean(real).
+            - gp (tf.Tensor): The gradient penalty, scaled by `lambda_gp`.
+    """
+
+    batch_size = tf.shape(real_imgs)[0]
+
+    # Random interpolation weights and interpolated samples, as in `gradient_penalty`
+    uniform = tf.random.uniform if rng is None else rng.uniform
+    alpha = uniform([batch_size, 1, 1, 1], 0., 1., dtype=real_imgs.dtype)
+    interpolated_imgs = real_imgs * alpha + fake_imgs * (1.0 - alpha)
+
+    with tf.GradientTape() as gp_tape:
+        gp_tape.watch(interpolated_imgs)
+        # Single forward pass over [real, fake, interpolated]
+        predictions = critic(
+            tf.concat([real_imgs, fake_imgs, interpolated_imgs], axis=0), training=True)
+        real_pred, fake_pred, interpolated_pred = tf.split(
+            tf.cast(predictions, tf.float32), 3, axis=0)
+        if grad_scale is not None:
+            interpolated_pred = interpolated_pred * grad_scale
+
+    # Wasserstein distance term
+    critic_loss = tf.reduce_mean(fake_pred) - tf.reduce_mean(real_pred)
+
+    # Gradients of the interpolated predictions, computed in float32
+    grads = tf.cast(gp_tape.gradient(interpolated_pred, interpolated_imgs), tf.float32)
+    if grad_scale is not None:
+        grads = grads / grad_scale
+
+    # Gradient penalty term: (norm - 1.0)^2
+    norm = tf.sqrt(tf.reduce_sum(tf.square(grads), axis=[1, 2, 3]))
+    gp = tf.reduce_mean((norm - 1.0)**2)
+
+    return critic_loss, gp * lambda_gp
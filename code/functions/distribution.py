@@ -0,0 +1,106 @@
+import os
+import json
+import tensorflow as tf
+
+
+def make_strategy(kind=None, num_cpu_replicas=2):
+    """
+    Creates the `tf.distribute` strategy used for data-parallel training.
+
+    - 'mirrored': synchronous replicas on a single machine. If no GPU is available,
+      the CPU is split into `num_cpu_replicas` logical devices, one per replica.
+    - 'multi_worker': synchronous replicas across several processes or machines
+      (`MultiWorkerMirroredStrategy`), configured by the `TF_CONFIG` environment
+      variable of each worker. Ring all-reduce is used, which runs on CPU.
+
+    This function must be called at program startup, before any other TensorFlow
+    operation is run (logical devices and collective ops can only be configured
+    before the TensorFlow runtime is initialized).
+
+    Args:
+        kind (str, optional): 'mirrored', 'multi_worker' or None. Defaults to None.
+        num_cpu_replicas (int, optional): The number of CPU replicas of the 'mirrored'
+                                          strategy when no GPU is available. Defaults to 2.
+
+    Returns:
+        tf.distribute.Strategy or None: The strategy, or None for single-device training.
+    """
+
+    if kind is None:
+        return None
+
+    if kind == 'mirrored':
+        if tf.config.list_physical_devices('GPU') or num_cpu_replicas <= 1:
+            return tf.distribute.MirroredStrategy()
+
+        # Split the CPU into one logical device per replica
+        cpu = tf.config.list_physical_devices('CPU')[0]
+        tf.config.set_logical_device_configuration(
+            cpu, [tf.config.LogicalDeviceConfiguration()] * num_cpu_replicas)
+        devices = [device.name for device in tf.config.list_logical_devices('CPU')]
+        return tf.distribute.MirroredStrategy(devices=devices)
+
+    if kind == 'multi_worker':
+        communication = tf.distribute.experimental.CommunicationOptions(
+            implementation=tf.distribute.experimental.CommunicationImplementation.RING)
+        return tf.distribute.MultiWorkerMirroredStrategy(communication_options=communication)
+
+    raise ValueError(f"Unknown distribution strategy '{kind}'")
+
+
+def worker_id(strategy):
+    """
+    Returns the task type and index of this process in a multi-worker cluster,
+    or (None, 0) for single-process training.
+    """
+
+    resolver = getattr(strategy, 'cluster_resolver', None)
+    if resolver is None or not resolver.cluster_spec().as_dict():
+        return None, 0
+    return resolver.task_type, resolver.task_id or 0
+
+
+def is_chief(strategy):
+    """
+    Returns whether this process writes the training artifacts (models, logs,
+    figures and checkpoints). This is the 'chief' task, or worker 0 if the cluster
+    has no chief. Single-process training is always the chief.
+    """
+
+    task_type, task_id = worker_id(strategy)
+    if task_type in (None, 'chief'):
+        return True
+    cluster = strategy.cluster_resolver.cluster_spec().as_dict()
+    return task_type == 'worker' and task_id == 0 and 'chief' not in cluster
+
+
+def local_tf_config(num_workers, worker_index, base_port=12345, host='localhost'):
+    """
+    Returns the `TF_CONFIG` value (JSON string) of one worker of a cluster of
+    `num_workers` processes running on the same host, as used to test
+    `MultiWorkerMirroredStrategy` with local processes.
+
+    Args:
+        num_workers (int): The number of worker processes.
+        worker_index (int): The index of this worker (0 is the chief).
+        base_port (int, optional): The port of worker 0; worker i uses
+                                   `base_port + i`. Defaults to 12345.
+        host (str, optional): The host name of the workers. Defaults to 'localhost'.
+
+    Returns:
+        str: The JSON `TF_CONFIG` of the worker.
+    """
+
+    return json.dumps({
+        'cluster': {'worker': [f'{host}:{base_port + i}' for i in range(num_workers)]},
+        'task': {'type': 'worker', 'index': worker_index},
+    })
+
+
+def default_strategy_kind():
+    """
+    Returns 'multi_worker' if this process was started with a `TF_CONFIG`
+    cluster definition (e.g. by `launch_multiworker.py`), and None otherwise.
+    """
+
+    return 'multi_worker' if os.environ.get('TF_CONFIG') else None
@@ -0,0 +1,409 @@
+import numpy as np
+from scipy import fft as sp_fft
+
+
+def welch_psd(batch, nperseg=250, fs=1.0):
+    """
+    Batched Welch power spectral density of every channel of every sample, with
+    non-overlapping Hann-windowed segments (mean-detrended) and one real FFT call.
+
+    Args:
+        batch (np.ndarray): The samples, of shape (batch, channels, time).
+        nperseg (int, optional): The length of the segments. Defaults to 250.
+        fs (float, optional): The sampling frequency. Defaults to 1.0 (the frequencies
+                              are then in cycles per sample).
+
+    Returns:
+        np.ndarray: The one-sided PSD, of shape (batch, channels, nperseg // 2 + 1).
+    """
+
+    batch_size, channels, time_steps = batch.shape
+    num_segments = time_steps // nperseg
+    segments = np.asarray(batch[..., :num_segments * nperseg], dtype=np.float32).reshape(
+        batch_size, channels, num_segments, nperseg)
+    window = np.hanning(nperseg + 2)[1:-1].astype(np.float32)
+    segments = (segments - segments.mean(axis=-1, keepdims=True)) * window
+
+    spectrum = sp_fft.rfft(segments, axis=-1, workers=-1)
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).mean(axis=2)
+    power /= fs * np.sum(window ** 2)
+
+    # One-sided spectrum: double all but the DC (and Nyquist) bins
+    power[..., 1:nperseg - nperseg // 2] *= 2
+    return power
+
+
+class FeatureSketch:
+    """
+    Shared random features of the distance metrics, so that the real and generated
+    sets are embedded identically.
+
+    Each sample is summarized by its log band powers (the Welch PSD of each channel
+    pooled into `num_bands` log-spaced frequency bands). These features are mapped to:
+        - random Fourier features (`rff`) of a Gaussian kernel, whose mean over a set
+          is its kernel mean embedding (MMD with one pass and constant memory), and
+        - random unit directions (`project`), for the sliced Wasserstein distance.
+    The kernel bandwidth defaults to the median pairwise distance of the first
+    batch of features seen (the median heuristic).
+    """
+
+    def __init__(self, num_bands=8, num_rff=512, num_projections=128, bandwidth=None,
+                 seed=0):
+        """
+        Args:
+            num_bands (int, optional): Frequency bands per channel. Defaults to 8.
+            num_rff (int, optional): The number of random Fourier features. Defaults to 512.
+            num_projections (int, optional): The number of random directions of the
+                                             sliced Wasserstein distance. Defaults to 128.
+            bandwidth (float, optional): The Gaussian kernel bandwidth. Defaults to None
+                                         (median heuristic).
+            seed (int, optional): Seed of the random features. Defaults to 0.
+        """
+
+        self.num_bands = num_bands
+        self.num_rff = num_rff
+        self.num_projections = num_projections
+        self.bandwidth = bandwidth
+        self.seed = seed
+        self._band_edges = None
+        self._rff_weights = None
+
+    def features(self, psd):
+        """Returns the log band-power features, of shape (batch, channels * num_bands)."""
+
+        if self._band_edges is None:
+            # Log-spaced bands over the non-DC frequency bins
+            num_freqs = psd.shape[-1]
+            edges = np.unique(np.geomspace(1, num_freqs, self.num_bands + 1).astype(int))
+            self._band_edges = edges[:-1]
+        bands = np.add.reduceat(psd, self._band_edges, axis=-1)
+        return np.log(bands + 1e-12).reshape(len(psd), -1)
+
+    def _fit(self, features):
+        rng = np.random.default_rng(self.seed)
+        dim = features.shape[1]
+        if self.bandwidth is None:
+            # Pairwise distances from the Gram matrix (at most 512 samples)
+            sample = features[:512].astype(np.float64)
+            sq_norms = (sample ** 2).sum(axis=1)
+            sq_distances = sq_norms[:, None] + sq_norms[None, :] - 2 * sample @ sample.T
+            upper = np.sqrt(np.maximum(sq_distances[np.triu_indices(len(sample), k=1)], 0))
+            self.bandwidth = float(np.median(upper)) if upper.size else 1.0
+            self.bandwidth = self.bandwidth or 1.0
+        self._rff_weights = rng.standard_normal((dim, self.num_rff)) / self.bandwidth
+        self._rff_phases = rng.uniform(0, 2 * np.pi, self.num_rff)
+        directions = rng.standard_normal((dim, self.num_projections))
+        self._directions = directions / np.linalg.norm(directions, axis=0)
+
+    def rff(self, features):
+        """Returns the random Fourier features, of shape (batch, num_rff)."""
+
+        if self._rff_weights is None:
+            self._fit(features)
+        return np.sqrt(2.0 / self.num_rff) * np.cos(
+            features @ self._rff_weights + self._rff_phases)
+
+    def project(self, features):
+        """Returns the projections on the random directions, of shape (batch, num_projections)."""
+
+        if self._rff_weights is None:
+            self._fit(features)
+        return features @ self._directions
+
+
+class StreamingStats:
+    """
+    One-pass statistics of a set of samples of shape (channels, time), accumulated
+    batch by batch, so that the set never has to be held in memory:
+        - the mean Welch PSD of each channel,
+        - the amplitude histogram (with underflow and overflow counts),
+        - the mean inter-channel correlation matrix,
+        - the kernel mean embedding (random Fourier features) and the projections
+          on the random directions of the shared `FeatureSketch` (a few floats per
+          sample).
+    """
+
+    def __init__(self, sketch, hist_range, num_bins=100, nperseg=250, fs=1.0):
+        """
+        Args:
+            sketch (FeatureSketch): The random features shared with the other set.
+            hist_range (tuple of float): The range of the amplitude histogram.
+            num_bins (int, optional): The number of histogram bins. Defaults to 100.
+            nperseg (int, optional): The Welch segment length. Defaults to 250.
+            fs (float, optional): The sampling frequency. Defaults to 1.0.
+        """
+
+        self.sketch = sketch
+        self.hist_range = tuple(hist_range)
+        self.num_bins = num_bins
+        self.nperseg = nperseg
+        self.fs = fs
+
+        self.count = 0
+        self.psd_sum = 0.0
+        self.hist = np.zeros(num_bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.corr_sum = 0.0
+        self.rff_sum = 0.0
+        self.projections = []
+
+    def update(self, batch):
+        """
+        Adds a batch of samples to the statistics.
+
+        Args:
+            batch (np.ndarray): The samples, of shape (batch, channels, time) or
+                                (batch, channels, time, 1).
+        """
+
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 4:
+            batch = batch[..., 0]
+        self.count += len(batch)
+
+        # Spectra, and the per-sample features of the distance metrics
+        psd = welch_psd(batch, self.nperseg, self.fs)
+        self.psd_sum = self.psd_sum + psd.sum(axis=0, dtype=np.float64)
+        features = self.sketch.features(psd)
+        self.rff_sum = self.rff_sum + self.sketch.rff(features).sum(axis=0)
+        self.projections.append(self.sketch.project(features).astype(np.float32))
+
+        # Amplitude histogram
+        lo, hi = self.hist_range
+        self.hist += np.histogram(batch, bins=self.num_bins, range=(lo, hi))[0]
+        self.underflow += int(np.count_nonzero(batch < lo))
+        self.overflow += int(np.count_nonzero(batch > hi))
+
+        # Per-sample correlation between channels (batched matrix product)
+        centered = batch - batch.mean(axis=-1, keepdims=True)
+        norms = np.sqrt(np.einsum('bct,bct->bc', centered, centered)) + 1e-12
+        centered /= norms[..., None]
+        self.corr_sum = self.corr_sum + np.matmul(
+            centered, centered.transpose(0, 2, 1)).sum(axis=0, dtype=np.float64)
+
+    @property
+    def psd(self):
+        """The mean PSD of each channel, of shape (channels, frequencies)."""
+        return self.psd_sum / self.count
+
+    @property
+    def frequencies(self):
+        return np.fft.rfftfreq(self.nperseg, d=1.0 / self.fs)
+
+    @property
+    def histogram(self):
+        """The normalized amplitude histogram (including the out-of-range mass)."""
+        total = self.hist.sum() + self.underflow + self.overflow
+        return self.hist / total
+
+    @property
+    def correlation(self):
+        """The mean inter-channel correlation matrix."""
+        return self.corr_sum / self.count
+
+    @property
+    def mean_embedding(self):
+        return self.rff_sum / self.count
+
+
+def _sliced_wasserstein(projections_a, projections_b, num_quantiles=256):
+    """Mean 1-Wasserstein distance over the random directions, from quantiles."""
+
+    q = (np.arange(num_quantiles) + 0.5) / num_quantiles
+    quantiles_a = np.quantile(projections_a, q, axis=0)
+    quantiles_b = np.quantile(projections_b, q, axis=0)
+    return float(np.mean(np.abs(quantiles_a - quantiles_b)))
+
+
+def compare_stats(real, generated):
+    """
+    Compares the statistics of the real and generated sets.
+
+    Args:
+        real (StreamingStats): The statistics of the real samples.
+        generated (StreamingStats): The statistics of the generated samples (with
+                                    the same `FeatureSketch` and histogram range).
+
+    Returns:
+        dict: The metrics (lower is better):
+            - psd_log_rmse: RMS difference of the log10 mean PSDs (all channels and
+              non-DC frequencies); psd_log_rmse_per_channel: the same per channel.
+            - histogram_tv / histogram_js: total variation distance and Jensen-Shannon
+              divergence (nats) of the amplitude histograms.
+            - correlation_mae: mean absolute difference of the off-diagonal entries of
+              the mean inter-channel correlation matrices.
+            - mmd_rff: squared MMD with a Gaussian kernel, from random Fourier features.
+            - sliced_wasserstein: sliced 1-Wasserstein distance of the log band-power
+              features.
+    """
+
+    log_diff = np.log10(real.psd[:, 1:] + 1e-20) - np.log10(generated.psd[:, 1:] + 1e-20)
+    p, q = real.histogram, generated.histogram
+    m = (p + q) / 2
+
+    def kl(a, b):
+        mask = a > 0
+        return float(np.sum(a[mask] * np.log(a[mask] / b[mask])))
+
+    off_diagonal = ~np.eye(len(real.correlation), dtype=bool)
+    embedding_diff = real.mean_embedding - generated.mean_embedding
+
+    return {
+        'num_real': real.count,
+        'num_generated': generated.count,
+        'psd_log_rmse': float(np.sqrt(np.mean(log_diff ** 2))),
+        'psd_log_rmse_per_channel': np.sqrt(np.mean(log_diff ** 2, axis=1)).tolist(),
+        'histogram_tv': float(0.5 * np.abs(p - q).sum()),
+        'histogram_js': 0.5 * kl(p, m) + 0.5 * kl(q, m),
+        'correlation_mae': float(np.mean(np.abs(
+            real.correlation - generated.correlation)[off_diagonal])),
+        'mmd_rff': float(embedding_diff @ embedding_diff),
+        'sliced_wasserstein': _sliced_wasserstein(
+            np.concatenate(real.projections), np.concatenate(generated.projections)),
+    }
+
+
+def evaluate_batches(real_batches, generated_batches, projection=None, sketch_seed=0,
+                     signal_range=None, num_bins=100, nperseg=250, fs=1.0):
+    """
+    Compares real and generated coefficient samples in one streaming pass over each
+    set: per-mode statistics of the LB coefficients and, with a projection, per-lead
+    statistics of the temporal signals. Only one batch of each set is in memory at a
+    time.
+
+    Args:
+        real_batches (iterable): Batches of real samples (normalized chunks, as returned
+                                 by `decimate_data`), of shape (batch, modes, time[, 1]).
+        generated_batches (iterable): Batches of generated samples, of the same shape.
+        projection (projection.LBProjection, optional): The Psi_lb projection of the
+                                                        signal statistics. Defaults to None
+                                                        (coefficient statistics only).
+        sketch_seed (int, optional): Seed of the random features. Defaults to 0.
+        signal_range (tuple of float, optional): The range of the signal histogram.
+                                                 Defaults to None (1.5 times the 99.9th
+                                                 amplitude percentile of the first real
+                                                 batch, symmetric).
+        num_bins (int, optional): The number of histogram bins. Defaults to 100.
+        nperseg (int, optional): The Welch segment length. Defaults to 250.
+        fs (float, optional): The sampling frequency. Defaults to 1.0.
+
+    Returns:
+        dict: The metrics of `compare_stats`, per domain ('coeffs' and 'signals').
+    """
+
+    domains = ['coeffs'] + (['signals'] if projection is not None else [])
+    stats = {}
+
+    def to_signals(batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 4:
+            batch = batch[..., 0]
+        return projection.forward(batch, dtype=np.float32, denormalize=True)
+
+    # The real set is processed first: it fixes the random features and histogram ranges
+    for name, batches in (('real', real_batches), ('generated', generated_batches)):
+        for batch in batches:
+            views = {'coeffs': batch}
+            if projection is not None:
+                views['signals'] = to_signals(batch)
+            for domain in domains:
+                if (domain, name) not in stats:
+                    if name == 'real':
+                        hist_range = (0.0, 1.0)
+                        if domain == 'signals':
+                            if signal_range is None:
+                                r = 1.5 * float(np.percentile(np.abs(views[domain]), 99.9))
+                                signal_range = (-r, r)
+                            hist_range = signal_range
+                        sketch = FeatureSketch(seed=sketch_seed)
+                    else:
+                        reference = stats[(domain, 'real')]
+                        hist_range, sketch = reference.hist_range, reference.sketch
+                    stats[(domain, name)] = StreamingStats(sketch, hist_range, num_bins,
+                                                           nperseg, fs)
+                stats[(domain, name)].update(views[domain])
+        if not any(key[1] == name for key in stats):
+            raise ValueError(f"No {name} samples to evaluate")
+
+    return {domain: compare_stats(stats[(domain, 'real')], stats[(domain, 'generated')])
+            for domain in domains}
+
+
+class QualityMonitor:
+    """
+    Cheap sample-quality metric for model selection during training: the distance
+    between a fixed subset of real samples and the samples generated from fixed
+    latent vectors, so that successive evaluations only differ by the generator.
+
+    The PSD and band-power features of the real subset are computed once. Each
+    evaluation generates the samples in batches and computes, with the same batched
+    Welch PSD as `StreamingStats`:
+        - sliced_wasserstein: the sliced 1-Wasserstein distance of the log band-power
+          features (see `FeatureSketch`), and
+        - psd_log_rmse: the RMS difference of the log10 mean PSDs of the modes.
+    """
+
+    METRICS = ('sliced_wasserstein', 'psd_log_rmse')
+
+    def __init__(self, real_samples, latent_dim, num_samples=256, batch_size=64,
+                 metric='sliced_wasserstein', seed=0, nperseg=250):
+        """
+        Args:
+            real_samples (np.ndarray): The fixed real subset, normalized to [0, 1], of
+                                       shape (samples, modes, time[, 1]).
+            latent_dim (int): The dimension of the latent space.
+            num_samples (int, optional): The number of generated samples per
+                                         evaluation. Defaults to 256.
+            batch_size (int, optional): The generation batch size. Defaults to 64.
+            metric (str, optional): The metric driving the model selection, one of
+                                    `METRICS`. Defaults to 'sliced_wasserstein'.
+            seed (int, optional): Seed of the latent vectors and random features.
+                                  Defaults to 0.
+            nperseg (int, optional): The Welch segment length. Defaults to 250.
+        """
+
+        from generate_temporal_noise_signals import latent_vectors
+
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric: {metric}. Use one of {self.METRICS}")
+        self.metric = metric
+        self.batch_size = batch_size
+        self.nperseg = nperseg
+        self.latents = latent_vectors(seed, 0, num_samples, latent_dim)
+        self.sketch = FeatureSketch(seed=seed)
+
+        real_psd = np.concatenate([
+            welch_psd(self._squeeze(real_samples[i:i + batch_size]), nperseg)
+            for i in range(0, len(real_samples), batch_size)])
+        self.real_mean_psd = real_psd.mean(axis=0)
+        self.real_projections = self.sketch.project(self.sketch.features(real_psd))
+
+    @staticmethod
+    def _squeeze(batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        return batch[..., 0] if batch.ndim == 4 else batch
+
+    def score(self, generator):
+        """
+        Evaluates a generator.
+
+        Args:
+            generator (callable): The generator model, called on batches of latent
+                                  vectors with `training=False`.
+
+        Returns:
+            dict: The value of each metric (lower is better).
+        """
+
+        psd = np.concatenate([
+            welch_psd(self._squeeze(generator(self.latents[i:i + self.batch_size],
+                                              training=False)), self.nperseg)
+            for i in range(0, len(self.latents), self.batch_size)])
+        log_diff = np.log10(self.real_mean_psd[:, 1:] + 1e-20) - \
+            np.log10(psd.mean(axis=0)[:, 1:] + 1e-20)
+        projections = self.sketch.project(self.sketch.features(psd))
+        return {
+            'sliced_wasserstein': _sliced_wasserstein(self.real_projections, projections),
+            'psd_log_rmse': float(np.sqrt(np.mean(log_diff ** 2))),
+        }
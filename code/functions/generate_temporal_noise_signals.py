@@ -39,14 +39,14 @@ def generate_temporal_noise_signals(model, Psi_lb, noise_dim, selected_case=1, s
     random_latent_vectors = np.random.normal(
         0, 1, (N, noise_dim))  # Ruido en distribución normal
 
-    # Use the generator model to create synthetic coefficient samples from the latent vectors
-    # `training=False` ensures that batch normalization layers (if any) use their
-    # population statistics, and dropout layers are inactive
-    generated_samples = model(random_latent_vectors, training=False)
-
-    # Extract the specific generated sample indicated by `selected_case`
-    # The shape changes from (N, 128, 2500, 1) to (128, 2500, 1
-    generated_samples = np.array(generated_samples[selected_case])
+    # Use the generator model to create the synthetic coefficient sample indicated
+    # by `selected_case` from its latent vector. `training=False` ensures that batch
+    # normalization layers (if any) use their population statistics, so each sample
+    # is independent of the rest of the batch and the other N - 1 are not generated
+    # The shape is (1, 128, 2500, 1)
+    generated_samples = model(
+        random_latent_vectors[selected_case:selected_case + 1], training=False)
+    generated_samples = np.array(generated_samples[0])
 
     # Remove the singleton dimension (e.g., (128, 2500, 1) becomes (128, 2500))
     # for easier matrix multiplication and plotting
@@ -61,3 +61,94 @@ def generate_temporal_noise_signals(model, Psi_lb, noise_dim, selected_case=1, s
     generated_noise = Psi_lb @ generated_sample_desnorm
 
     return generated_noise, generated_sample
+
+
+def latent_vectors(seed, start, count, noise_dim):
+    """
+    Returns the latent vectors of samples `start` to `start + count - 1` of the
+    seed stream defined by `seed`.
+
+    Each sample has its own random generator, seeded with (seed, sample index),
+    so any range of samples can be reproduced independently of the batch size
+    or of the order in which the ranges are generated.
+
+    Args:
+        seed (int): Seed of the stream of latent vectors.
+        start (int): Index of the first sample.
+        count (int): Number of samples.
+        noise_dim (int): The dimension of the latent space.
+
+    Returns:
+        np.ndarray: The float32 latent vectors, of shape (count, noise_dim).
+    """
+
+    vectors = np.empty((count, noise_dim), dtype=np.float32)
+    for i in range(count):
+        rng = np.random.default_rng([seed, start + i])
+        vectors[i] = rng.standard_normal(noise_dim, dtype=np.float32)
+    return vectors
+
+
+def project_coefficients(samples, Psi_lb):
+    """
+    Denormalizes a batch of generated coefficient samples and converts them into
+    temporal noise signals with a single batched matrix multiplication.
+
+    Args:
+        samples (np.ndarray): The generated coefficient samples in [0, 1], of shape
+                              (batch, modes, time) or (batch, modes, time, 1).
+        Psi_lb (np.ndarray): The Laplace-Beltrami conversion matrix, of shape
+                             (leads, modes).
+
+    Returns:
+        np.ndarray: The temporal noise signals, of shape (batch, leads, time).
+    """
+
+    if samples.ndim == 4:
+        samples = samples[..., 0]
+
+    # Denormalize the coefficients from [0, 1] to [-1, 1]
+    samples_desnorm = (samples - 0.5) * 2
+
+    # (leads, modes) @ (batch, modes, time) --> (batch, leads, time)
+    return np.matmul(Psi_lb, samples_desnorm)
+
+
+def generate_temporal_noise_batches(model, Psi_lb, noise_dim, num_samples,
+                                    batch_size=64, seed=42, start=0):
+    """
+    Generates synthetic coefficient samples and their temporal noise signals in
+    batches, yielding each batch as soon as it is ready.
+
+    Latent vectors are drawn from the seed stream of `latent_vectors`, so the
+    samples only depend on `seed` and their index, not on `batch_size`. Memory
+    use is bounded by one batch, regardless of the number of samples requested.
+
+    Args:
+        model (tf.keras.Model): The trained generator model (e.g., from a WGAN-GP).
+        Psi_lb (np.ndarray): The Laplace-Beltrami conversion matrix
+                             used to transform coefficient space data into
+                             temporal signal space.
+        noise_dim (int): The dimension of the latent space.
+        num_samples (int): The total number of samples to generate.
+        batch_size (int, optional): The number of samples per batch. Defaults to 64.
+        seed (int, optional): Seed of the stream of latent vectors. Defaults to 42.
+        start (int, optional): Index of the first sample in the stream. Defaults to 0.
+
+    Yields:
+        tuple: A tuple containing two NumPy arrays:
+            - generated_samples (np.ndarray): The generated coefficient samples in
+                                              [0, 1], of shape (batch, modes, time).
+            - generated_noise (np.ndarray): The temporal noise signals, of shape
+                                            (batch, leads, time).
+    """
+
+    for first in range(start, start + num_samples, batch_size):
+        count = min(batch_size, start + num_samples - first)
+        random_latent_vectors = latent_vectors(seed, first, count, noise_dim)
+
+        # (batch, 128, 2500, 1) --> (batch, 128, 2500)
+        generated_samples = np.asarray(
+            model(random_latent_vectors, training=False))[..., 0]
+
+        yield generated_samples, project_coefficients(generated_samples, Psi_lb)
@@ -0,0 +1,364 @@
+import io
+import os
+import json
+import time
+import queue
+import socket
+import threading
+import collections
+import socketserver
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+
+from generate_temporal_noise_signals import latent_vectors, project_coefficients
+
+
+class LatencyMetrics:
+    """
+    Thread-safe latency and throughput metrics of the generator server.
+
+    The latencies of the last `window` requests are kept to compute percentiles;
+    counters cover the whole lifetime of the server.
+    """
+
+    def __init__(self, window=10000):
+        """
+        Args:
+            window (int, optional): The number of recent requests used for the
+                                    latency percentiles. Defaults to 10000.
+        """
+
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._queue_waits = collections.deque(maxlen=window)
+        self.start_time = time.perf_counter()
+        self.requests = 0
+        self.samples = 0
+        self.batches = 0
+        self.batch_samples = 0
+        self.errors = 0
+
+    def record_request(self, latency, queue_wait, count):
+        """Records a served request, its latencies (seconds) and its number of samples."""
+
+        with self._lock:
+            self._latencies.append(latency)
+            self._queue_waits.append(queue_wait)
+            self.requests += 1
+            self.samples += count
+
+    def record_batch(self, count):
+        """Records a micro-batch of `count` samples run by the model."""
+
+        with self._lock:
+            self.batches += 1
+            self.batch_samples += count
+
+    def record_error(self):
+        """Records a failed request."""
+
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        """
+        Returns the current metrics.
+
+        Returns:
+            dict: Request, sample and batch counters, the mean micro-batch size,
+                  the p50/p99 request latency and queue wait (ms) of the recent
+                  requests, and the throughput (requests/s and samples/s) since
+                  the server started.
+        """
+
+        with self._lock:
+            latencies = np.array(self._latencies) * 1e3
+            queue_waits = np.array(self._queue_waits) * 1e3
+            elapsed = time.perf_counter() - self.start_time
+            metrics = {
+                'requests': self.requests,
+                'samples': self.samples,
+                'batches': self.batches,
+                'errors': self.errors,
+                'mean_batch_size': self.batch_samples / self.batches if self.batches else 0.0,
+                'uptime_s': elapsed,
+                'requests_per_s': self.requests / elapsed,
+                'samples_per_s': self.samples / elapsed,
+            }
+        for name, values in (('latency', latencies), ('queue_wait', queue_waits)):
+            for q in (50, 99):
+                metrics[f'{name}_p{q}_ms'] = float(np.percentile(values, q)) if len(values) else None
+        return metrics
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent generation requests into micro-batches for the generator.
+
+    Requests are queued by the server threads. A single worker thread owns the
+    model: it takes the first pending request, then keeps collecting requests
+    until the batch holds `max_batch_size` samples or `max_wait` seconds have
+    passed since that first request, and runs the generator once on all their
+    latent vectors. The Psi_lb projection is only computed for the requests that
+    ask for temporal signals.
+    """
+
+    def __init__(self, model, Psi_lb, noise_dim=128, max_batch_size=32, max_wait=0.005,
+                 metrics=None):
+        """
+        Args:
+            model (tf.keras.Model): The trained generator.
+            Psi_lb (np.ndarray): The Laplace-Beltrami conversion matrix.
+            noise_dim (int, optional): The dimension of the latent space. Defaults to 128.
+            max_batch_size (int, optional): The maximum number of samples per
+                                            micro-batch. Defaults to 32.
+            max_wait (float, optional): The maximum time (seconds) a request waits
+                                        for other requests to join its micro-batch.
+                                        Defaults to 0.005.
+            metrics (LatencyMetrics, optional): The metrics to update. Defaults to
+                                                new metrics.
+        """
+
+        import tensorflow as tf
+
+        self.Psi_lb = np.asarray(Psi_lb, dtype=np.float32)
+        self.noise_dim = noise_dim
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics or LatencyMetrics()
+
+        # Compiled forward pass, with an unknown batch dimension to avoid retracing
+        self._forward = tf.function(
+            lambda z: model(z, training=False),
+            input_signature=[tf.TensorSpec((None, noise_dim), tf.float32)])
+
+        self._queue = queue.Queue()
+        self._pending = None
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def warmup(self):
+        """Traces the forward pass, so that the first request is not slowed down."""
+
+        self._forward(np.zeros((1, self.noise_dim), dtype=np.float32))
+
+    def submit(self, seed, start=0, count=1, outputs=('coeffs', 'signals')):
+        """
+        Queues a request for `count` samples of the seed stream `seed`, starting at
+        sample `start` (the same stream as `noise_export`).
+
+        Args:
+            seed (int): Seed of the stream of latent vectors.
+            start (int, optional): Index of the first sample. Defaults to 0.
+            count (int, optional): The number of samples. Defaults to 1.
+            outputs (tuple of str, optional): 'coeffs' and/or 'signals'.
+                                              Defaults to both.
+
+        Returns:
+            concurrent.futures.Future: Resolves to a dict with the requested float32
+                                       arrays: 'coeffs' of shape (count, modes, time)
+                                       and/or 'signals' of shape (count, leads, time).
+        """
+
+        future = Future()
+        # The latent vectors are drawn on the calling thread, in parallel with the model
+        request = {
+            'latents': latent_vectors(seed, start, count, self.noise_dim),
+            'outputs': tuple(outputs),
+            'future': future,
+            'time': time.perf_counter(),
+        }
+        self._queue.put(request)
+        return future
+
+    def _next_batch(self):
+        """Collects the requests of the next micro-batch."""
+
+        if self._pending is not None:
+            first, self._pending = self._pending, None
+        elif self._closing:
+            return None
+        else:
+            first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        size = len(first['latents'])
+        deadline = first['time'] + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else \
+                    self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Closing: serve the collected requests, then stop
+                self._closing = True
+                break
+            if size + len(request['latents']) > self.max_batch_size:
+                # Keep it for the next micro-batch
+                self._pending = request
+                break
+            batch.append(request)
+            size += len(request['latents'])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            batch_start = time.perf_counter()
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                for request in batch:
+                    if not request['future'].done():
+                        self.metrics.record_error()
+                        request['future'].set_exception(e)
+                continue
+            done = time.perf_counter()
+            for request in batch:
+                self.metrics.record_request(done - request['time'],
+                                            batch_start - request['time'],
+                                            len(request['latents']))
+
+    def _run_batch(self, batch):
+        latents = np.concatenate([request['latents'] for request in batch])
+
+        # Requests bigger than a micro-batch are run in several model calls
+        coeffs = np.concatenate([
+            np.asarray(self._forward(latents[i:i + self.max_batch_size]))[..., 0]
+            for i in range(0, len(latents), self.max_batch_size)])
+        self.metrics.record_batch(len(latents))
+
+        offset = 0
+        for request in batch:
+            count = len(request['latents'])
+            request_coeffs = coeffs[offset:offset + count]
+            offset += count
+            result = {}
+            if 'coeffs' in request['outputs']:
+                result['coeffs'] = request_coeffs
+            if 'signals' in request['outputs']:
+                result['signals'] = project_coefficients(request_coeffs, self.Psi_lb)
+            request['future'].set_result(result)
+
+    def close(self):
+        """Serves the queued requests and stops the worker thread."""
+
+        self._queue.put(None)
+        self._thread.join()
+
+
+class GeneratorRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler of the generator server.
+
+    - GET /generate?seed=S&start=0&count=N&outputs=coeffs,signals returns an .npz
+      file with the requested arrays.
+    - GET /metrics returns the latency and throughput metrics as JSON.
+    - GET /health returns 'ok'.
+    """
+
+    # Keep-alive connections avoid a TCP handshake per request
+    protocol_version = 'HTTP/1.1'
+    max_count = 1024
+
+    def setup(self):
+        super().setup()
+        if self.connection.family != socket.AF_UNIX:
+            # Small responses are sent without waiting for more data (Nagle)
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/generate':
+            self._generate(parse_qs(url.query))
+        elif url.path == '/metrics':
+            self._send(200, json.dumps(self.server.batcher.metrics.snapshot()).encode(),
+                       'application/json')
+        elif url.path == '/health':
+            self._send(200, b'ok', 'text/plain')
+        else:
+            self._send(404, b'not found', 'text/plain')
+
+    def _generate(self, query):
+        try:
+            seed = int(query['seed'][0])
+            start = int(query.get('start', ['0'])[0])
+            count = int(query.get('count', ['1'])[0])
+            outputs = tuple(query.get('outputs', ['coeffs,signals'])[0].split(','))
+            if not 0 < count <= self.max_count or start < 0 or seed < 0:
+                raise ValueError("invalid seed, start or count")
+            if not outputs or set(outputs) - {'coeffs', 'signals'}:
+                raise ValueError("outputs must be 'coeffs' and/or 'signals'")
+        except (KeyError, ValueError) as e:
+            self._send(400, f"bad request: {e}".encode(), 'text/plain')
+            return
+
+        try:
+            result = self.server.batcher.submit(seed, start, count, outputs).result()
+        except Exception as e:
+            self._send(500, f"generation failed: {e}".encode(), 'text/plain')
+            return
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **result)
+        self._send(200, buffer.getvalue(), 'application/octet-stream')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate the latency of small requests
+        pass
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a Unix domain socket, one thread per connection."""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+def make_server(batcher, host='127.0.0.1', port=8765, unix_socket=None):
+    """
+    Creates the HTTP server of a micro-batcher, on a TCP port or a Unix socket.
+
+    Args:
+        batcher (MicroBatcher): The micro-batcher holding the model.
+        host (str, optional): The host to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): The TCP port to listen on. Defaults to 8765.
+        unix_socket (str, optional): The path of a Unix socket to listen on instead
+                                     of the TCP port. Defaults to None.
+
+    Returns:
+        socketserver.BaseServer: The server; call `serve_forever()` to run it.
+    """
+
+    if unix_socket is not None:
+        server = ThreadingUnixHTTPServer(unix_socket, GeneratorRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), GeneratorRequestHandler)
+        server.daemon_threads = True
+    server.batcher = batcher
+    return server
@@ -56,8 +56,9 @@ def gen_model_wcgan(latent_dim):
     model.add(Conv2D(1, kernel_size=1, padding="same"))
 
     # Sigmoid activation to scale output values to [0, 1], suitable for
-    # generating data that was normalized to this range.
-    model.add(Activation("sigmoid"))
+    # generating data that was normalized to this range. It is kept in float32
+    # under mixed-precision policies.
+    model.add(Activation("sigmoid", dtype='float32'))
 
     # Prints a summary of the model's architecture, including layer types,
     # output shapes, and number of parameters.
@@ -65,3 +66,93 @@ def gen_model_wcgan(latent_dim):
     model.summary()
 
     return model
+
+
+def gen_model_subpixel(latent_dim):
+    """
+    Constructs a parameter-efficient generator for the WGAN that produces the
+    (128, 2500, 1) samples directly, without computing and cropping extra columns.
+
+    The latent vector is projected to a (16, 125) grid and upsampled by (2, 2),
+    (2, 2) and (2, 5) to (128, 2500). Every upsampling is a transposed convolution
+    whose kernel size is a multiple of its strides, which is equivalent to a
+    sub-pixel convolution (a convolution at the input resolution followed by a
+    pixel shuffle): each output pixel gets the same number of kernel taps, so
+    there are no checkerboard artifacts. The last upsampling already has few
+    filters, and the full-resolution refinement is factorized into a temporal
+    (1 x 7) and a mode (3 x 1) convolution, instead of the two 3 x 3 transposed
+    convolutions of `gen_model_wcgan` at (128, 2560). Only standard Keras layers
+    are used, so the saved model can be loaded with `load_model`.
+
+    Args:
+        latent_dim (int): The dimensionality of the input latent vector (noise).
+
+    Returns:
+        keras.Model: A Keras Sequential model representing the generator.
+    """
+
+    model = Sequential()
+
+    # Initial Dense layer projecting the latent vector to a 16x125 grid
+    model.add(Dense(16 * 125 * 2, activation="relu", input_dim=latent_dim))
+    model.add(Reshape((16, 125, 2)))
+
+    # First upsampling block: 16x125 --> 32x250
+    model.add(Conv2DTranspose(128, kernel_size=4, strides=2, padding="same"))
+    model.add(BatchNormalization(momentum=0.8))  # Stabilizes training
+    model.add(LeakyReLU(alpha=0.2))  # Non-linear activation
+
+    # Second upsampling block: 32x250 --> 64x500
+    model.add(Conv2DTranspose(64, kernel_size=4, strides=2, padding="same"))
+    model.add(BatchNormalization(momentum=0.8))  # Stabilizes training
+    model.add(LeakyReLU(alpha=0.2))  # Non-linear activation
+
+    # Third upsampling block: 64x500 --> 128x2500 (x2 modes, x5 time)
+    model.add(Conv2DTranspose(16, kernel_size=(4, 5), strides=(2, 5), padding="same"))
+    model.add(BatchNormalization(momentum=0.8))  # Stabilizes training
+    model.add(LeakyReLU(alpha=0.2))  # Non-linear activation
+
+    # Factorized full-resolution refinement: temporal, then across modes
+    model.add(Conv2D(8, kernel_size=(1, 7), padding="same"))
+    model.add(LeakyReLU(alpha=0.2))  # Non-linear activation
+    model.add(Conv2D(8, kernel_size=(3, 1), padding="same"))
+    model.add(LeakyReLU(alpha=0.2))  # Non-linear activation
+
+    # Final convolutional layer to output a single channel image.
+    model.add(Conv2D(1, kernel_size=1, padding="same"))
+
+    # Sigmoid activation to scale output values to [0, 1], kept in float32
+    # under mixed-precision policies.
+    model.add(Activation("sigmoid", dtype='float32'))
+
+    print(f"######### Generator Summary #########")
+    model.summary()
+
+    return model
+
+
+# Generator architectures selectable by name (e.g. `train_wgan(..., generator_arch=...)`)
+GENERATOR_ARCHITECTURES = {
+    'wcgan': gen_model_wcgan,
+    'subpixel': gen_model_subpixel,
+}
+
+
+def build_generator(arch, latent_dim):
+    """
+    Builds a generator architecture by name.
+
+    Args:
+        arch (str): The name of the architecture, a key of `GENERATOR_ARCHITECTURES`
+                    ('wcgan' for the original model, 'subpixel' for the
+                    parameter-efficient one).
+        latent_dim (int): The dimensionality of the input latent vector (noise).
+
+    Returns:
+        keras.Model: The generator model.
+    """
+
+    if arch not in GENERATOR_ARCHITECTURES:
+        raise ValueError(f"Unknown generator architecture '{arch}', "
+                         f"expected one of {sorted(GENERATOR_ARCHITECTURES)}")
+    return GENERATOR_ARCHITECTURES[arch](latent_dim)
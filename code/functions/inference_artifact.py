@@ -0,0 +1,48 @@
+import os
+import numpy as np
+
+
+def load_inference_artifact(path, num_threads=None):
+    """
+    Loads an inference artifact written by `model_export` (SavedModel directory or
+    .tflite file) and returns a function running it.
+
+    TensorFlow is only imported here, when loading. TFLite models are run with the
+    standalone `tflite_runtime` interpreter if it is installed, which avoids
+    importing TensorFlow altogether.
+
+    Args:
+        path (str): The SavedModel directory or the .tflite file.
+        num_threads (int, optional): The threads of the TFLite interpreter. Defaults
+                                     to the number of CPUs.
+
+    Returns:
+        callable: Function taking float32 latent vectors of shape (batch, noise_dim)
+                  and returning a dict of NumPy arrays ('coeffs' and, if fused,
+                  'signals').
+    """
+
+    if os.path.isdir(path):
+        import tensorflow as tf
+        generate = tf.saved_model.load(path).signatures['serving_default']
+
+        def run(latents):
+            outputs = generate(latents=tf.constant(latents, dtype=tf.float32))
+            return {name: value.numpy() for name, value in outputs.items()}
+
+        return run
+
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+
+    # The signature runner resizes the input tensors to the batch size if needed
+    interpreter = Interpreter(model_path=path, num_threads=num_threads or os.cpu_count())
+    runner = interpreter.get_signature_runner('serving_default')
+
+    def run(latents):
+        return runner(latents=np.asarray(latents, dtype=np.float32))
+
+    return run
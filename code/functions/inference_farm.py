@@ -0,0 +1,135 @@
+import os
+import time
+import multiprocessing as mp
+import numpy as np
+
+from noise_export import prepare_export, record_shard, write_shard
+
+
+# Environment variables limiting the threads of the BLAS/OpenMP libraries used by
+# NumPy (Psi_lb projection) and TensorFlow in each worker
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+# State of each worker process, set once by `_init_worker`
+_worker = {}
+
+
+def _init_worker(model_path, Psi_lb, intra_op_threads, inter_op_threads):
+    """
+    Initializes a worker process: pins its TensorFlow thread pools and loads the
+    generator once, so that it is reused for all the shards of the worker.
+    """
+
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    from tensorflow.keras.models import load_model
+    _worker['model'] = load_model(model_path, compile=False)
+    _worker['Psi_lb'] = Psi_lb
+
+
+def _generate_shard(args):
+    """Generates one shard in a worker process and returns its manifest entry."""
+
+    shard_idx, start, count, kwargs = args
+    start_time = time.time()
+    entry = write_shard(_worker['model'], _worker['Psi_lb'], shard_idx=shard_idx,
+                        start=start, count=count, **kwargs)
+    return shard_idx, entry, time.time() - start_time
+
+
+def export_noise_parallel(model_path, Psi_lb, output_dir, num_samples, model_hash,
+                          n_workers=None, intra_op_threads=None, inter_op_threads=1,
+                          noise_dim=128, shard_size=1024, batch_size=64, seed=42,
+                          fmt='auto', outputs=('coeffs', 'signals'), dtype=np.float32):
+    """
+    Multi-process version of `noise_export.export_noise` for CPU generation boxes.
+
+    The pending shards of the job (i.e. ranges of the seed stream) are split
+    across a pool of worker processes. Each worker loads the generator from
+    `model_path` once, pins its intra-op and inter-op thread counts, and writes
+    its shards directly to disk; only the manifest entries are sent back. The
+    samples are identical to those of the single-process export, since the
+    latent vectors only depend on the seed and the sample index.
+
+    Workers are started with the 'spawn' method, so a script calling this
+    function must protect its entry point with `if __name__ == '__main__':`.
+
+    Args:
+        model_path (str): The path to the trained generator (.h5).
+        Psi_lb (np.ndarray): The Laplace-Beltrami conversion matrix.
+        output_dir (str): The directory where the shards and manifest are written.
+        num_samples (int): The total number of samples to generate.
+        model_hash (str): Hash of the generator model file (see `file_sha256`).
+        n_workers (int, optional): The number of worker processes. Defaults to None
+                                   (one per CPU).
+        intra_op_threads (int, optional): The intra-op threads of each worker.
+                                          Defaults to the number of CPUs divided
+                                          by the number of workers.
+        inter_op_threads (int, optional): The inter-op threads of each worker.
+                                          Defaults to 1.
+        noise_dim, shard_size, batch_size, seed, fmt, outputs, dtype:
+            As in `noise_export.export_noise`.
+
+    Returns:
+        dict: The final manifest of the job, with the aggregate throughput
+              ('samples_per_second') of this run.
+    """
+
+    start_time = time.time()
+    n_cpus = os.cpu_count() or 1
+    n_workers = n_workers or n_cpus
+    intra_op_threads = intra_op_threads or max(1, n_cpus // n_workers)
+
+    manifest, shards = prepare_export(
+        output_dir, num_samples, model_hash, noise_dim=noise_dim, shard_size=shard_size,
+        seed=seed, fmt=fmt, outputs=outputs, dtype=dtype)
+
+    kwargs = {'output_dir': output_dir, 'seed': seed, 'model_hash': model_hash,
+              'noise_dim': noise_dim, 'batch_size': batch_size,
+              'fmt': manifest['format'], 'outputs': outputs, 'dtype': dtype}
+    tasks = [(shard_idx, start, count, kwargs) for shard_idx, start, count in shards]
+
+    # The thread limits are set in the environment while the workers are spawned,
+    # so that they apply before NumPy and TensorFlow are imported in the workers
+    previous_env = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({'OMP_NUM_THREADS': str(intra_op_threads),
+                       'OPENBLAS_NUM_THREADS': str(intra_op_threads),
+                       'MKL_NUM_THREADS': str(intra_op_threads),
+                       'TF_NUM_INTRAOP_THREADS': str(intra_op_threads),
+                       'TF_NUM_INTEROP_THREADS': str(inter_op_threads)})
+    try:
+        pool = mp.get_context('spawn').Pool(
+            n_workers, initializer=_init_worker,
+            initargs=(model_path, Psi_lb, intra_op_threads, inter_op_threads))
+    finally:
+        for var, value in previous_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+    print(f"Generating with {n_workers} workers "
+          f"({intra_op_threads} intra-op / {inter_op_threads} inter-op threads each)")
+
+    generated = 0
+    generation_start = time.time()
+    with pool:
+        for shard_idx, entry, shard_time in pool.imap_unordered(_generate_shard, tasks):
+            record_shard(output_dir, manifest, shard_idx, entry)
+
+            generated += entry['count']
+            elapsed = time.time() - generation_start
+            print(f"Shard {shard_idx} done in {shard_time:.1f} s "
+                  f"({entry['count'] / shard_time:.1f} samples/s per worker), "
+                  f"aggregate {generated / elapsed:.1f} samples/s")
+
+    elapsed = time.time() - generation_start
+    samples_per_second = generated / elapsed if generated else 0.0
+    print(f"Export done in {time.time() - start_time:.2f} seconds: {generated} samples, "
+          f"aggregate {samples_per_second:.1f} samples/s")
+
+    return dict(manifest, samples_per_second=samples_per_second)
@@ -0,0 +1,124 @@
+import itertools
+import numpy as np
+import tensorflow as tf
+
+
+def make_training_dataset(X_train, batch_size, seed=None, cache=False,
+                          shuffle_buffer_size=None, drop_remainder=False):
+    """
+    Builds a `tf.data.Dataset` input pipeline that yields shuffled batches of
+    training samples, so that batch preparation overlaps with the training step.
+
+    Shuffling is done over sample indices, and each batch is then gathered from
+    `X_train` in a background thread and cast to float32. The samples are never
+    embedded in the graph, so `X_train` can be an in-memory array or a NumPy
+    memmap larger than the available RAM. Batches are prefetched with
+    `tf.data.AUTOTUNE`.
+
+    If `cache` is enabled, the individual float32 samples are cached after the
+    first epoch (in memory if `cache` is True, or in the file given by `cache`
+    if it is a string), and shuffling is then done over the cached samples.
+
+    Args:
+        X_train (np.ndarray): The training data of shape (n, rows, cols, 1),
+                              normalized to [0, 1].
+        batch_size (int): The number of samples per training batch.
+        seed (int, optional): Seed for the shuffling of the samples. Defaults to None.
+        cache (bool or str, optional): False to disable caching, True to cache the
+                                       samples in memory or a file path to cache
+                                       them on disk. Defaults to False.
+        shuffle_buffer_size (int, optional): Size of the shuffle buffer. Defaults to
+                                             the number of samples (a full shuffle).
+                                             When caching, the buffer holds samples
+                                             instead of indices, so a smaller buffer
+                                             may be needed to bound memory.
+        drop_remainder (bool, optional): Whether to drop the last incomplete batch.
+                                         Defaults to False.
+
+    Returns:
+        tf.data.Dataset: A dataset of float32 batches of shape (batch, rows, cols, 1).
+    """
+
+    num_samples = len(X_train)
+    sample_shape = tuple(X_train.shape[1:])
+    if shuffle_buffer_size is None:
+        shuffle_buffer_size = num_samples
+
+    # Gather samples from the host array (outside the graph)
+    def gather(indices):
+        return np.asarray(X_train[indices], dtype=np.float32)
+
+    def tf_gather(indices):
+        samples = tf.numpy_function(gather, [indices], tf.float32)
+        return tf.ensure_shape(samples, indices.shape[:1] + sample_shape)
+
+    indices = tf.data.Dataset.range(num_samples)
+
+    if cache:
+        # Load and cache individual samples, then shuffle and batch them
+        dataset = indices.map(tf_gather, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.cache('' if cache is True else cache)
+        dataset = dataset.shuffle(
+            shuffle_buffer_size, seed=seed, reshuffle_each_iteration=True)
+        dataset = dataset.batch(batch_size, drop_remainder=drop_remainder)
+    else:
+        # Shuffle and batch the indices, then gather each batch at once
+        dataset = indices.shuffle(
+            shuffle_buffer_size, seed=seed, reshuffle_each_iteration=True)
+        dataset = dataset.batch(batch_size, drop_remainder=drop_remainder)
+        dataset = dataset.map(tf_gather, num_parallel_calls=tf.data.AUTOTUNE)
+
+    # Overlap batch preparation with the training step
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def make_window_dataset(sampler, batch_size, seed=None):
+    """
+    Builds a `tf.data.Dataset` input pipeline that yields batches of random windows
+    of a `window_sampler.WindowSampler`, sampled in background threads and prefetched.
+
+    Each batch is drawn with its own random generator, seeded with (seed, iteration,
+    batch number), where the iteration counts the passes over the dataset (e.g. one
+    per epoch when `train_wgan` takes `steps_per_epoch` batches of it). The batches
+    therefore do not depend on the order in which the parallel map produces them,
+    and every epoch sees new windows. The dataset is infinite: take the number of
+    steps needed.
+
+    Args:
+        sampler (window_sampler.WindowSampler): The window sampler.
+        batch_size (int): The number of windows per training batch.
+        seed (int, optional): Seed of the windows. Defaults to None (random).
+
+    Returns:
+        tf.data.Dataset: A dataset of float32 batches of shape (batch, rows, window[, 1]).
+    """
+
+    if seed is None:
+        seed = int(np.random.randint(2**31))
+
+    # Number of the current pass over the dataset, advanced on the host each time a
+    # new iterator is created
+    iterations = itertools.count()
+
+    def next_iteration(_):
+        return np.int64(next(iterations))
+
+    def tf_next_iteration(_):
+        return tf.ensure_shape(tf.numpy_function(next_iteration, [_], tf.int64), ())
+
+    # Sample a batch on the host (outside the graph)
+    def sample(iteration, batch_number):
+        rng = np.random.default_rng([seed, int(iteration), int(batch_number)])
+        return sampler.sample(batch_size, rng)
+
+    def tf_sample(iteration, batch_number):
+        batch = tf.numpy_function(sample, [iteration, batch_number], tf.float32)
+        return tf.ensure_shape(batch, (batch_size,) + sampler.sample_shape)
+
+    dataset = tf.data.Dataset.range(1).map(tf_next_iteration)
+    dataset = dataset.flat_map(lambda iteration: tf.data.Dataset.range(2**62).map(
+        lambda batch_number: (iteration, batch_number)))
+    dataset = dataset.map(tf_sample, num_parallel_calls=tf.data.AUTOTUNE)
+
+    # Overlap batch preparation with the training step
+    return dataset.prefetch(tf.data.AUTOTUNE)
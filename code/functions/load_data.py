@@ -1,24 +1,189 @@
 import os
+import json
+import pickle
 import numpy as np
 import time
-# Don't forget to change directory to the MATLAB engine path to ensure it can be imported.
-import matlab.engine
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 
-def load_data(dataset_path):
+# Names of the fields of the 'signal' struct stored in the .mat files, indexed by
+# the names used in Python
+MAT_FIELDS = {
+    'coeffs_lb': 'coeffs_lb',
+    'noise': 'noise',
+    'ecg': 'ECG',
+    'lead_status': 'leadStatus',
+    'torso': 'torso',
+}
+
+# Fields returned by `load_data` when no specific fields are requested
+DEFAULT_FIELDS = ('coeffs_lb', 'noise', 'ecg', 'lead_status', 'torso')
+
+CACHE_MANIFEST = 'manifest.json'
+
+
+def _h5_to_numpy(item):
     """
-    Loads BSPM noise signals data from .mat files within a specified directory
-    using a MATLAB engine.
+    Converts an h5py dataset or group (MATLAB struct) into NumPy arrays, undoing
+    the transposition introduced by MATLAB's column-major storage.
+    """
+
+    import h5py
+
+    if isinstance(item, h5py.Group):
+        return {key: _h5_to_numpy(item[key]) for key in item.keys()}
+    return np.array(item).T
 
-    This function iterates through all .mat files in the given directory,
-    loads each file using a MATLAB engine instance, and extracts specific
-    noise signals and coefficients.
+
+def load_mat_file(file_path, fields=DEFAULT_FIELDS):
+    """
+    Loads the requested fields of the 'signal' struct from a single .mat file
+    without a MATLAB engine.
+
+    Files saved with MATLAB v5/v7 are read with `scipy.io.loadmat`. MATLAB v7.3
+    files, which are HDF5 files, are read with `h5py`.
+
+    Args:
+        file_path (str): The path to the .mat file.
+        fields (tuple of str, optional): The fields to load, among the keys of
+                                         `MAT_FIELDS`. Defaults to all of them.
+
+    Returns:
+        dict: A dictionary mapping each requested field to its NumPy array.
+    """
+
+    import h5py
+
+    if h5py.is_hdf5(file_path):
+        # MATLAB v7.3 files are not supported by scipy.io, read them as HDF5
+        with h5py.File(file_path, 'r') as f:
+            signal = f['signal']
+            return {field: _h5_to_numpy(signal[MAT_FIELDS[field]]) for field in fields}
+
+    import scipy.io as sio
+
+    mat = sio.loadmat(file_path, variable_names=['signal'])
+    signal = mat['signal'][0, 0]
+    return {field: np.array(signal[MAT_FIELDS[field]]) for field in fields}
+
+
+def _file_signature(dataset_path, file_names):
+    """
+    Returns the (name, size, modification time) signature of the data files,
+    used to validate the cache.
+    """
+
+    signature = []
+    for name in file_names:
+        stat = os.stat(os.path.join(dataset_path, name))
+        signature.append([name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def _read_cache(cache_dir, signature, fields):
+    """
+    Reads the requested fields that are in the cache, if it is valid for the
+    current data files. Returns a dictionary of the cached fields (empty on a
+    cache miss); the missing fields have to be loaded from the data files.
+    """
+
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest['files'] != signature:
+        return {}
+
+    data = {}
+    for field in fields:
+        if field not in manifest['fields']:
+            continue
+        if manifest['fields'][field] == 'npy':
+            # Consolidated array, concatenated along the last axis and memory-mapped.
+            # Each file's array is a view into it
+            values = np.load(os.path.join(cache_dir, field + '.npy'), mmap_mode='r')
+            offsets = np.load(os.path.join(cache_dir, field + '_offsets.npy'))
+            data[field] = [values[..., offsets[i]:offsets[i + 1]]
+                           for i in range(len(offsets) - 1)]
+        elif manifest['fields'][field] == 'npz':
+            with np.load(os.path.join(cache_dir, field + '.npz')) as npz:
+                data[field] = [npz[f'arr_{i}'] for i in range(len(signature))]
+        else:
+            with open(os.path.join(cache_dir, field + '.pkl'), 'rb') as f:
+                data[field] = pickle.load(f)
+    return data
+
+
+def _write_cache(cache_dir, signature, data):
+    """
+    Writes the loaded fields to the cache, one file per field, and updates the
+    manifest. Fields that are not numeric arrays (e.g. MATLAB structs) are pickled.
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+
+    # Keep the previously cached fields if they belong to the same data files
+    cached_fields = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['files'] == signature:
+            cached_fields = manifest['fields']
+
+    for field, arrays in data.items():
+        if not all(isinstance(a, np.ndarray) and a.dtype.kind in 'biufc' for a in arrays):
+            with open(os.path.join(cache_dir, field + '.pkl'), 'wb') as f:
+                pickle.dump(arrays, f, protocol=pickle.HIGHEST_PROTOCOL)
+            cached_fields[field] = 'pkl'
+        elif len({(a.shape[:-1], a.dtype) for a in arrays}) == 1 and all(a.ndim for a in arrays):
+            # Same shape except for the last axis: store as a single memory-mappable array
+            offsets = np.cumsum([0] + [a.shape[-1] for a in arrays])
+            np.save(os.path.join(cache_dir, field + '.npy'),
+                    np.concatenate(arrays, axis=-1))
+            np.save(os.path.join(cache_dir, field + '_offsets.npy'), offsets)
+            cached_fields[field] = 'npy'
+        else:
+            np.savez(os.path.join(cache_dir, field + '.npz'), *arrays)
+            cached_fields[field] = 'npz'
+
+    # The manifest is written last, so an interrupted write leaves an invalid cache
+    with open(manifest_path, 'w') as f:
+        json.dump({'files': signature, 'fields': cached_fields}, f)
+
+
+def load_data(dataset_path, fields=None, n_workers=None, cache_dir=None):
+    """
+    Loads BSPM noise signals data from .mat files within a specified directory.
+
+    This function reads all .mat files in the given directory in parallel with a
+    process pool (using `scipy.io`, or `h5py` for MATLAB v7.3 files) and extracts
+    only the requested fields of their 'signal' struct. If a cache directory is
+    given, the loaded fields are consolidated there after the first pass (one
+    memory-mappable .npy file per numeric field, non-numeric fields such as the
+    torso struct are pickled), and later calls read them from the cache as long as
+    the size and modification time of the .mat files are unchanged. Only the
+    requested fields missing from the cache are loaded from the .mat files.
+
+    Note that on platforms that start worker processes by spawning (Windows, macOS),
+    a script calling this function with `n_workers` > 1 must protect its entry point
+    with `if __name__ == '__main__':`.
 
     Args:
         dataset_path (str): The path to the directory containing the .mat data files.
+        fields (tuple of str, optional): The fields to load, among 'coeffs_lb', 'noise',
+                                         'ecg', 'lead_status' and 'torso'. Defaults to
+                                         None, which loads all of them in that order.
+        n_workers (int, optional): The number of worker processes. Defaults to None
+                                   (one per CPU). Use 1 to load the files serially.
+        cache_dir (str, optional): The directory of the on-disk cache. Defaults to
+                                   None (no cache).
 
     Returns:
-        tuple: A tuple containing five lists of NumPy arrays:
+        tuple: A tuple containing one list of NumPy arrays (one array per file)
+               for each requested field, in the requested order. By default:
             - coeffs_lb (list of np.ndarray): List of Laplace-Beltrami coefficients.
             - noise (list of np.ndarray): List of noise temporal signals.
             - ecg (list of np.ndarray): List of ECG signals.
@@ -29,28 +194,37 @@ def load_data(dataset_path):
     start_time = time.time()
     print("Loading data...")
 
-    # Initialize MATLAB engine
-    eng = matlab.engine.start_matlab()
-
-    # Create lists to store data
-    noise = []
-    ecg = []
-    lead_status = []
-    torso = []
-    coeffs_lb = []
-
-    # Load all data files
-    for files in os.listdir(dataset_path):
-        if files.endswith('.mat'):
-            # Load the .mat file using MATLAB engine
-            mat = eng.load(files)
-            # Extract the relevant data from the loaded .mat file
-            noise.append(np.array(mat['signal']['noise']))
-            ecg.append(np.array(mat['signal']['ECG']))
-            lead_status.append(np.array(mat['signal']['leadStatus']))
-            torso.append(np.array(mat['signal']['torso']))
-            coeffs_lb.append(np.array(mat['signal']['coeffs_lb']))
+    fields = tuple(DEFAULT_FIELDS if fields is None else fields)
+    unknown_fields = set(fields) - set(MAT_FIELDS)
+    if unknown_fields:
+        raise ValueError(f"Unknown fields: {sorted(unknown_fields)}")
+
+    # List all data files in a reproducible order
+    file_names = sorted(f for f in os.listdir(dataset_path) if f.endswith('.mat'))
+    signature = _file_signature(dataset_path, file_names)
+
+    # Try to read the requested fields from the cache
+    data = _read_cache(cache_dir, signature, fields) if cache_dir else {}
+    missing_fields = tuple(field for field in fields if field not in data)
+
+    if missing_fields:
+        file_paths = [os.path.join(dataset_path, name) for name in file_names]
+
+        # Load the fields that are not cached from all data files
+        if n_workers == 1:
+            loaded = [load_mat_file(path, missing_fields) for path in file_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                loaded = list(executor.map(load_mat_file, file_paths, repeat(missing_fields)))
+
+        loaded = {field: [mat[field] for mat in loaded] for field in missing_fields}
+        data.update(loaded)
+
+        if cache_dir:
+            _write_cache(cache_dir, signature, loaded)
+    else:
+        print("Data read from cache")
 
     print("Data loaded in %s seconds" % (time.time() - start_time))
 
-    return coeffs_lb, noise, ecg, lead_status, torso
+    return tuple(data[field] for field in fields)
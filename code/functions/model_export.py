@@ -0,0 +1,212 @@
+import os
+import json
+import numpy as np
+import tensorflow as tf
+
+
+# Name of the file describing an exported inference artifact
+ARTIFACT_INFO_NAME = 'artifact.json'
+
+
+def _fold_weights(layer, batch_norm):
+    """
+    Returns the kernel and bias of `layer` (Dense, Conv2D or Conv2DTranspose)
+    with the inference-mode BatchNormalization layer that follows it folded in.
+    """
+
+    # The weights are [gamma (if scale)], [beta (if center)], moving mean and variance
+    bn_weights = [w.astype(np.float64) for w in batch_norm.get_weights()]
+    gamma = bn_weights.pop(0) if batch_norm.scale else 1.0
+    beta = bn_weights.pop(0) if batch_norm.center else 0.0
+    moving_mean, moving_variance = bn_weights
+    scale = gamma / np.sqrt(moving_variance + batch_norm.epsilon)
+
+    weights = layer.get_weights()
+    kernel = weights[0].astype(np.float64)
+    bias = weights[1].astype(np.float64) if layer.use_bias else np.zeros(len(scale))
+
+    # The output channels are the last kernel axis, except for transposed convolutions
+    if isinstance(layer, tf.keras.layers.Conv2DTranspose):
+        kernel = kernel * scale[None, None, :, None]
+    else:
+        kernel = kernel * scale
+    bias = (bias - moving_mean) * scale + beta
+
+    return kernel.astype(np.float32), bias.astype(np.float32)
+
+
+def fold_batch_norm(model):
+    """
+    Returns an inference-only copy of a Sequential model in which every
+    BatchNormalization layer directly following a Dense, Conv2D or Conv2DTranspose
+    layer is folded into that layer's kernel and bias (using the moving statistics).
+
+    The folded model computes the same function as `model(x, training=False)`, with
+    fewer layers and no normalization at run time. Layers are otherwise copied with
+    their configuration and weights.
+
+    Args:
+        model (keras.Sequential): The trained model (e.g. the generator).
+
+    Returns:
+        keras.Sequential: The folded model.
+    """
+
+    if not isinstance(model, tf.keras.Sequential):
+        raise ValueError("Batch normalization folding needs a Sequential model")
+
+    foldable = (tf.keras.layers.Dense, tf.keras.layers.Conv2D, tf.keras.layers.Conv2DTranspose)
+    layers = model.layers
+    folded = tf.keras.Sequential(name=model.name + '_folded')
+    folded.add(tf.keras.Input(shape=model.input_shape[1:]))
+    weights = []
+
+    i = 0
+    while i < len(layers):
+        layer = layers[i]
+        following = layers[i + 1] if i + 1 < len(layers) else None
+        config = layer.get_config()
+
+        if isinstance(layer, foldable) and \
+                isinstance(following, tf.keras.layers.BatchNormalization) and \
+                layer.activation in (None, tf.keras.activations.linear):
+            # The folded layer always has a bias
+            config['use_bias'] = True
+            weights.append(_fold_weights(layer, following))
+            i += 2
+        else:
+            weights.append(layer.get_weights())
+            i += 1
+        folded.add(layer.__class__.from_config(config))
+
+    for layer, layer_weights in zip(folded.layers, weights):
+        layer.set_weights(layer_weights)
+
+    return folded
+
+
+class InferenceModule(tf.Module):
+    """
+    Inference-only wrapper of the generator, exported as a SavedModel.
+
+    Its `generate` function maps a batch of latent vectors to the coefficient
+    samples in [0, 1] ('coeffs', of shape (batch, modes, time)) and, if a Psi_lb
+    matrix is given, to the temporal noise signals ('signals', of shape
+    (batch, leads, time)), with the (x - 0.5) * 2 denormalization and the Psi_lb
+    projection fused into the same graph.
+    """
+
+    def __init__(self, model, Psi_lb=None):
+        """
+        Args:
+            model (keras.Model): The (folded) generator.
+            Psi_lb (np.ndarray, optional): The Laplace-Beltrami conversion matrix to
+                                           fuse into the graph. Defaults to None.
+        """
+
+        super().__init__()
+        self.model = model
+        self.Psi_lb = None if Psi_lb is None else tf.constant(Psi_lb, dtype=tf.float32)
+        noise_dim = model.input_shape[-1]
+        self.generate = tf.function(
+            self._generate,
+            input_signature=[tf.TensorSpec((None, noise_dim), tf.float32, name='latents')])
+
+    def _generate(self, latents):
+        coeffs = tf.cast(self.model(latents, training=False)[..., 0], tf.float32)
+        outputs = {'coeffs': coeffs}
+        if self.Psi_lb is not None:
+            # (leads, modes) @ (batch, modes, time) --> (batch, leads, time)
+            outputs['signals'] = tf.einsum('lm,bmt->blt', self.Psi_lb, (coeffs - 0.5) * 2)
+        return outputs
+
+
+def export_saved_model(model, output_dir, Psi_lb=None, fold_bn=True):
+    """
+    Exports the generator as an inference-only SavedModel, with a 'serving_default'
+    signature mapping 'latents' to 'coeffs' (and 'signals' if `Psi_lb` is given).
+
+    Args:
+        model (keras.Model): The trained generator.
+        output_dir (str): The SavedModel directory.
+        Psi_lb (np.ndarray, optional): The conversion matrix to fuse into the graph.
+                                       Defaults to None (coefficients only).
+        fold_bn (bool, optional): Whether to fold the BatchNormalization layers.
+                                  Defaults to True.
+
+    Returns:
+        InferenceModule: The exported module.
+    """
+
+    if fold_bn:
+        model = fold_batch_norm(model)
+    module = InferenceModule(model, Psi_lb)
+    tf.saved_model.save(module, output_dir,
+                        signatures={'serving_default': module.generate.get_concrete_function()})
+    _write_artifact_info(output_dir, 'savedmodel', model, Psi_lb)
+    return module
+
+
+def export_tflite(saved_model_dir, output_path, quantize=False):
+    """
+    Converts an exported SavedModel into a TFLite flatbuffer.
+
+    Args:
+        saved_model_dir (str): The SavedModel directory (see `export_saved_model`).
+        output_path (str): The path of the .tflite file.
+        quantize (bool, optional): If True, dynamic-range quantization is applied:
+                                   the weights are stored as int8 and dequantized
+                                   or used by hybrid kernels at run time, while
+                                   activations stay in float32. Defaults to False.
+
+    Returns:
+        int: The size of the .tflite file in bytes.
+    """
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    flatbuffer = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(flatbuffer)
+    return len(flatbuffer)
+
+
+def export_onnx(model, output_path, Psi_lb=None, fold_bn=True, opset=13):
+    """
+    Exports the generator to ONNX with `tf2onnx` (an optional dependency).
+
+    Args:
+        model (keras.Model): The trained generator.
+        output_path (str): The path of the .onnx file.
+        Psi_lb (np.ndarray, optional): The conversion matrix to fuse into the graph.
+                                       Defaults to None.
+        fold_bn (bool, optional): Whether to fold the BatchNormalization layers.
+                                  Defaults to True.
+        opset (int, optional): The ONNX opset. Defaults to 13.
+    """
+
+    try:
+        import tf2onnx
+    except ImportError as e:
+        raise ImportError("ONNX export needs the 'tf2onnx' package") from e
+
+    if fold_bn:
+        model = fold_batch_norm(model)
+    module = InferenceModule(model, Psi_lb)
+    tf2onnx.convert.from_function(
+        module.generate, input_signature=module.generate.input_signature,
+        opset=opset, output_path=output_path)
+
+
+def _write_artifact_info(output_dir, fmt, model, Psi_lb):
+    """Writes the description of an exported artifact next to it."""
+
+    info = {
+        'format': fmt,
+        'noise_dim': int(model.input_shape[-1]),
+        'outputs': ['coeffs'] + (['signals'] if Psi_lb is not None else []),
+    }
+    with open(os.path.join(output_dir, ARTIFACT_INFO_NAME), 'w') as f:
+        json.dump(info, f, indent=2)
+
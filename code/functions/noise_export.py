@@ -0,0 +1,361 @@
+import os
+import json
+import shutil
+import hashlib
+import time
+import numpy as np
+
+from generate_temporal_noise_signals import generate_temporal_noise_batches
+
+
+MANIFEST_NAME = 'manifest.json'
+
+# File extension of the shards of each storage format
+SHARD_EXTENSIONS = {'hdf5': '.h5', 'zarr': '.zarr', 'npy': ''}
+
+
+def resolve_format(fmt='auto'):
+    """
+    Returns the storage format to use for the shards. With 'auto', HDF5 is used
+    if h5py is installed, then Zarr, and plain .npy files as a fallback.
+
+    Args:
+        fmt (str, optional): 'auto', 'hdf5', 'zarr' or 'npy'. Defaults to 'auto'.
+
+    Returns:
+        str: The resolved format ('hdf5', 'zarr' or 'npy').
+    """
+
+    if fmt != 'auto':
+        if fmt not in SHARD_EXTENSIONS:
+            raise ValueError(f"Unknown shard format: {fmt}")
+        return fmt
+
+    for candidate in ('hdf5', 'zarr'):
+        try:
+            __import__('h5py' if candidate == 'hdf5' else 'zarr')
+            return candidate
+        except ImportError:
+            continue
+    return 'npy'
+
+
+def file_sha256(path):
+    """
+    Computes the SHA-256 hash of a file (e.g. the generator model), reading it
+    in blocks.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ShardWriter:
+    """
+    Writes one shard of generated samples, one array per output ('coeffs',
+    'signals'), in slices. Each array has shape (samples, rows, time) and is
+    chunked per sample and per row (LB mode or lead), matching per-sample and
+    per-lead reads downstream.
+
+    The shard is written under a temporary name and renamed when closed, so an
+    interrupted job never leaves a partial shard with the final name.
+    """
+
+    def __init__(self, path, fmt, shapes, dtype=np.float32, compression_level=4):
+        """
+        Args:
+            path (str): The final path of the shard.
+            fmt (str): 'hdf5', 'zarr' or 'npy'.
+            shapes (dict): The shape of each output array, e.g.
+                           {'coeffs': (n, 128, 2500), 'signals': (n, leads, 2500)}.
+            dtype (np.dtype, optional): The data type of the stored arrays.
+                                        Defaults to np.float32.
+            compression_level (int, optional): The compression level (HDF5 gzip or
+                                               Zarr Blosc/zstd). Defaults to 4.
+        """
+
+        self.path = path
+        self.tmp_path = path + '.partial'
+        self.fmt = fmt
+        self._file = None
+
+        if os.path.isdir(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+        if fmt == 'hdf5':
+            import h5py
+            self._file = h5py.File(self.tmp_path, 'w')
+            self.arrays = {
+                name: self._file.create_dataset(
+                    name, shape=shape, dtype=dtype, chunks=(1, 1, shape[2]),
+                    compression='gzip', compression_opts=compression_level, shuffle=True)
+                for name, shape in shapes.items()}
+        elif fmt == 'zarr':
+            import zarr
+            from numcodecs import Blosc
+            compressor = Blosc(cname='zstd', clevel=compression_level, shuffle=Blosc.SHUFFLE)
+            group = zarr.open_group(self.tmp_path, mode='w')
+            self.arrays = {
+                name: group.create_dataset(
+                    name, shape=shape, dtype=dtype, chunks=(1, 1, shape[2]),
+                    compressor=compressor)
+                for name, shape in shapes.items()}
+        else:
+            # Plain (uncompressed) .npy files, one per output, in a directory
+            os.makedirs(self.tmp_path)
+            self.arrays = {
+                name: np.lib.format.open_memmap(
+                    os.path.join(self.tmp_path, name + '.npy'), mode='w+',
+                    dtype=dtype, shape=shape)
+                for name, shape in shapes.items()}
+
+    def write(self, name, offset, values):
+        """Writes `values` to the samples `offset:offset + len(values)` of an output."""
+
+        self.arrays[name][offset:offset + len(values)] = values
+
+    def set_attributes(self, attributes):
+        """Stores metadata (e.g. seeds) with the shard, if the format supports it."""
+
+        if self.fmt == 'hdf5':
+            self._file.attrs.update(attributes)
+        elif self.fmt == 'zarr':
+            import zarr
+            zarr.open_group(self.tmp_path, mode='a').attrs.update(attributes)
+
+    def close(self):
+        """Flushes the shard and renames it to its final path."""
+
+        if self.fmt == 'hdf5':
+            self._file.close()
+        elif self.fmt == 'npy':
+            for array in self.arrays.values():
+                array.flush()
+        self.arrays = {}
+        os.replace(self.tmp_path, self.path)
+
+
+def _write_manifest(output_dir, manifest):
+    """Atomically rewrites the manifest of the export job."""
+
+    tmp_path = os.path.join(output_dir, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, os.path.join(output_dir, MANIFEST_NAME))
+
+
+def load_manifest(output_dir, job):
+    """
+    Loads the manifest of an existing export job in `output_dir`, or creates
+    a new one. Raises a ValueError if the existing job was started with
+    different parameters, since its shards could not be resumed consistently.
+
+    Args:
+        output_dir (str): The output directory of the job.
+        job (dict): The job parameters (seed, number of samples, shard size,
+                    model hash, format, outputs...).
+
+    Returns:
+        dict: The manifest, with the job parameters and the finished shards.
+    """
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return dict(job, shards={})
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    mismatched = [key for key, value in job.items() if manifest.get(key) != value]
+    if mismatched:
+        raise ValueError(
+            f"The export job in '{output_dir}' was started with different "
+            f"parameters ({', '.join(mismatched)}). Use a new output directory.")
+    return manifest
+
+
+def pending_shards(manifest, output_dir):
+    """
+    Returns the (shard index, first sample, number of samples) of the shards of
+    a job that are not finished yet.
+    """
+
+    shards = []
+    num_shards = -(-manifest['num_samples'] // manifest['shard_size'])
+    for shard_idx in range(num_shards):
+        entry = manifest['shards'].get(str(shard_idx))
+        if entry and os.path.exists(os.path.join(output_dir, entry['file'])):
+            continue
+        start = shard_idx * manifest['shard_size']
+        count = min(manifest['shard_size'], manifest['num_samples'] - start)
+        shards.append((shard_idx, start, count))
+    return shards
+
+
+def shard_file_name(shard_idx, fmt):
+    """Returns the file name of a shard."""
+
+    return f'shard_{shard_idx:05d}' + SHARD_EXTENSIONS[fmt]
+
+
+def write_shard(model, Psi_lb, output_dir, shard_idx, start, count, seed, model_hash,
+                noise_dim=128, batch_size=64, fmt='hdf5', outputs=('coeffs', 'signals'),
+                dtype=np.float32):
+    """
+    Generates the samples `start` to `start + count - 1` of the seed stream and
+    streams them, one batch at a time, into a new shard.
+
+    Args:
+        model (tf.keras.Model): The trained generator model.
+        Psi_lb (np.ndarray): The Laplace-Beltrami conversion matrix.
+        output_dir (str): The output directory of the job.
+        shard_idx (int): The index of the shard.
+        start (int): Index of the first sample of the shard.
+        count (int): Number of samples of the shard.
+        seed (int): Seed of the stream of latent vectors.
+        model_hash (str): Hash of the generator model file.
+        noise_dim (int, optional): The dimension of the latent space. Defaults to 128.
+        batch_size (int, optional): The number of samples per generator call.
+                                    Defaults to 64.
+        fmt (str, optional): 'hdf5', 'zarr' or 'npy'. Defaults to 'hdf5'.
+        outputs (tuple of str, optional): The arrays to store. Defaults to both.
+        dtype (np.dtype, optional): The data type of the stored arrays.
+                                    Defaults to np.float32.
+
+    Returns:
+        dict: The manifest entry of the shard.
+    """
+
+    rows, cols = model.output_shape[1:3]
+    file_name = shard_file_name(shard_idx, fmt)
+    shapes = {'coeffs': (count, rows, cols), 'signals': (count, Psi_lb.shape[0], cols)}
+    writer = ShardWriter(os.path.join(output_dir, file_name), fmt,
+                         {name: shapes[name] for name in outputs}, dtype=dtype)
+    writer.set_attributes({'seed': seed, 'start': start, 'count': count,
+                           'model_sha256': model_hash})
+
+    # Stream the batches of the shard straight to disk
+    offset = 0
+    for coeffs, signals in generate_temporal_noise_batches(
+            model, Psi_lb, noise_dim, count, batch_size=batch_size,
+            seed=seed, start=start):
+        batch = {'coeffs': coeffs, 'signals': signals}
+        for name in outputs:
+            writer.write(name, offset, batch[name])
+        offset += len(coeffs)
+    writer.close()
+
+    return {'file': file_name, 'start': start, 'count': count}
+
+
+def prepare_export(output_dir, num_samples, model_hash, noise_dim=128, shard_size=1024,
+                   seed=42, fmt='auto', outputs=('coeffs', 'signals'), dtype=np.float32):
+    """
+    Creates or resumes an export job: loads (or creates) its manifest and lists
+    the shards that still have to be generated.
+
+    Returns:
+        tuple: A tuple containing:
+            - manifest (dict): The manifest of the job.
+            - shards (list of tuple): The (shard index, first sample, number of
+                                      samples) of the pending shards.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    fmt = resolve_format(fmt)
+
+    job = {
+        'seed': seed,
+        'num_samples': num_samples,
+        'shard_size': shard_size,
+        'noise_dim': noise_dim,
+        'model_sha256': model_hash,
+        'format': fmt,
+        'outputs': list(outputs),
+        'dtype': np.dtype(dtype).name,
+    }
+    manifest = load_manifest(output_dir, job)
+    _write_manifest(output_dir, manifest)
+
+    shards = pending_shards(manifest, output_dir)
+    num_shards = -(-num_samples // shard_size)
+    print(f"Exporting {num_samples} samples: {len(shards)} shards pending "
+          f"({num_shards - len(shards)} already finished)")
+
+    return manifest, shards
+
+
+def record_shard(output_dir, manifest, shard_idx, entry):
+    """Records a finished shard in the manifest, so it is skipped if the job is resumed."""
+
+    manifest['shards'][str(shard_idx)] = entry
+    _write_manifest(output_dir, manifest)
+
+
+def export_noise(model, Psi_lb, output_dir, num_samples, model_hash, noise_dim=128,
+                 shard_size=1024, batch_size=64, seed=42, fmt='auto',
+                 outputs=('coeffs', 'signals'), dtype=np.float32):
+    """
+    Generates synthetic noise samples and writes them to chunked, compressed
+    shards on disk, without holding more than one batch in memory.
+
+    A manifest in `output_dir` records the seed, the model hash, the job
+    parameters and the finished shards. If the job is interrupted, calling this
+    function again with the same parameters resumes it: finished shards are not
+    regenerated, and since the latent vectors only depend on the seed and the
+    sample index, the resumed job produces the same samples.
+
+    Args:
+        model (tf.keras.Model): The trained generator model.
+        Psi_lb (np.ndarray): The Laplace-Beltrami conversion matrix, of shape
+                             (leads, modes).
+        output_dir (str): The directory where the shards and manifest are written.
+        num_samples (int): The total number of samples to generate.
+        model_hash (str): Hash of the generator model file (see `file_sha256`).
+        noise_dim (int, optional): The dimension of the latent space. Defaults to 128.
+        shard_size (int, optional): The number of samples per shard. Defaults to 1024.
+        batch_size (int, optional): The number of samples per generator call.
+                                    Defaults to 64.
+        seed (int, optional): Seed of the stream of latent vectors. Defaults to 42.
+        fmt (str, optional): 'auto', 'hdf5', 'zarr' or 'npy'. Defaults to 'auto'.
+        outputs (tuple of str, optional): The arrays to store, among 'coeffs'
+                                          (generator output in [0, 1]) and 'signals'
+                                          (temporal noise signals). Defaults to both.
+        dtype (np.dtype, optional): The data type of the stored arrays.
+                                    Defaults to np.float32.
+
+    Returns:
+        dict: The final manifest of the job.
+    """
+
+    start_time = time.time()
+    manifest, shards = prepare_export(
+        output_dir, num_samples, model_hash, noise_dim=noise_dim, shard_size=shard_size,
+        seed=seed, fmt=fmt, outputs=outputs, dtype=dtype)
+
+    generated = 0
+    for shard_idx, start, count in shards:
+        entry = write_shard(
+            model, Psi_lb, output_dir, shard_idx, start, count, seed, model_hash,
+            noise_dim=noise_dim, batch_size=batch_size, fmt=manifest['format'],
+            outputs=outputs, dtype=dtype)
+        record_shard(output_dir, manifest, shard_idx, entry)
+
+        generated += count
+        elapsed = time.time() - start_time
+        print(f"Shard {shard_idx} done ({start}-{start + count - 1}), "
+              f"{generated / elapsed:.1f} samples/s")
+
+    print("Export done in %s seconds" % (time.time() - start_time))
+
+    return manifest
@@ -1,7 +1,171 @@
+import os
+import json
 import numpy as np
 
 
-def split_data(coeffs, seed=42):
+def _shuffled_positions(num_samples, seed):
+    """
+    Returns the position of each sample in the shuffled dataset, so that
+    writing sample i to `positions[i]` is equivalent to shuffling the stacked
+    dataset with `data[np.random.permutation(num_samples)]` after seeding
+    NumPy's global generator with `seed`.
+    """
+
+    np.random.seed(seed)
+    shuffled_indices = np.random.permutation(num_samples)
+    positions = np.empty_like(shuffled_indices)
+    positions[shuffled_indices] = np.arange(num_samples)
+    return positions
+
+
+def _normalize_chunks(chunks):
+    """
+    Normalizes each chunk of a (n_chunks, rows, cols) array to a [0, 1] range
+    in place, with batched reductions and no temporary copies of the data.
+    """
+
+    # max(|x|) computed as max(max(x), -min(x)) to avoid allocating abs(x)
+    scale = np.maximum(chunks.max(axis=(1, 2)), -chunks.min(axis=(1, 2)))
+    chunks /= scale[:, None, None]
+    chunks /= 2
+    chunks += 0.5
+
+
+def _trimmed_decimated(mat, factor=2, pad_threshold=0.0):
+    """
+    Trims the zero padding at both ends of a coefficient matrix and returns a
+    decimated view of it, or None if the matrix is entirely padding. No data is
+    copied.
+
+    Columns whose first-row magnitude is at most `pad_threshold` count as padding.
+    """
+
+    # Search for the first and last non-zero indices in the first row
+    # This assumes zero-padding is indicated by zeros in the first row
+    first_row = mat[0, :]
+    nonzero_indices = np.flatnonzero(
+        first_row if pad_threshold == 0 else np.abs(first_row) > pad_threshold)
+
+    if nonzero_indices.size == 0:
+        return None
+
+    start_idx = nonzero_indices[0]
+    end_idx = nonzero_indices[-1] + 1  # Include the last non-zero index
+
+    # Decimation (by a factor of 2 by default)
+    return mat[:, start_idx:end_idx:factor]
+
+
+def _decimated_chunks(coeffs, factor=2, window=2500, pad_threshold=0.0):
+    """
+    Trims the zero padding of each coefficient matrix and returns, for each
+    non-empty matrix, a view of its decimated `window`-column chunks with shape
+    (n_chunks, rows, window). No data is copied.
+
+    Columns whose first-row magnitude is at most `pad_threshold` count as padding
+    at both ends of a matrix.
+    """
+
+    chunks = []
+
+    # Delete zero padding: identify and remove leading/trailing zeros
+    for mat in coeffs:
+        decimated = _trimmed_decimated(mat, factor, pad_threshold)
+        if decimated is None:
+            # If the matrix is entirely zero-padded, discard it
+            continue
+
+        # Keep only the complete chunks
+        num_chunks = decimated.shape[1] // window
+        decimated = decimated[:, :num_chunks * window]
+
+        # (rows, n_chunks * window) --> (n_chunks, rows, window) view
+        chunks.append(decimated.reshape(
+            mat.shape[0], num_chunks, window).transpose(1, 0, 2))
+
+    return chunks
+
+
+def recording_chunks(mat, factor=2, window=2500, pad_threshold=0.0, dtype=np.float32):
+    """
+    Preprocesses a single recording as `decimate_data` does, without the shuffle:
+    trims its zero padding, decimates it and returns its normalized chunks.
+
+    Since every chunk is normalized on its own, the chunks of each recording can
+    be preprocessed (and cached) independently of the rest of the dataset.
+
+    Args:
+        mat (np.ndarray): The coefficient matrix of the recording, of shape (128, N).
+        factor (int, optional): The decimation factor. Defaults to 2.
+        window (int, optional): The number of columns of each chunk. Defaults to 2500.
+        pad_threshold (float, optional): The first-row magnitude up to which the
+                                         columns at both ends count as padding.
+                                         Defaults to 0.0 (exact zeros).
+        dtype (np.dtype, optional): Data type of the output array. Defaults to np.float32.
+
+    Returns:
+        np.ndarray: The normalized chunks in recording order, of shape
+                    (n_chunks, rows, window).
+    """
+
+    chunks = _decimated_chunks([mat], factor, window, pad_threshold)
+    if not chunks:
+        return np.empty((0, mat.shape[0], window), dtype=dtype)
+    data = np.array(chunks[0], dtype=dtype)
+    _normalize_chunks(data)
+    return data
+
+
+def decimate_recordings(coeffs, factor=2, window=2500, pad_threshold=0.0, dtype=np.float32):
+    """
+    Trims and decimates each coefficient matrix as `decimate_data` does, but keeps
+    every decimated recording whole (instead of cutting it into chunks), for the
+    random windows of `window_sampler.WindowSampler`.
+
+    The recordings are stored once, concatenated along time in a single time-major
+    array, so that a window of any recording is a contiguous block of rows. Each
+    recording gets a normalization scale, its maximum absolute value, which maps
+    all of its windows to [0, 1] with `x / (2 * scale) + 0.5`.
+
+    Args:
+        coeffs (list of np.ndarray): A list of original coefficient matrices, of
+                                     shape (128, N).
+        factor (int, optional): The decimation factor. Defaults to 2.
+        window (int, optional): The minimum length of the kept recordings (the
+                                sampled window length). Defaults to 2500.
+        pad_threshold (float, optional): The first-row magnitude up to which the
+                                         columns at both ends count as padding.
+                                         Defaults to 0.0 (exact zeros).
+        dtype (np.dtype, optional): Data type of the stored recordings. Defaults
+                                    to np.float32.
+
+    Returns:
+        tuple: A tuple containing:
+            - data (np.ndarray): The decimated recordings, of shape (total_length, rows).
+            - offsets (np.ndarray): The first row of each recording in `data`.
+            - lengths (np.ndarray): The length (decimated columns) of each recording.
+            - scales (np.ndarray): The normalization scale of each recording.
+    """
+
+    # Decimated views of the recordings long enough for one window
+    recordings = [d for d in (_trimmed_decimated(mat, factor, pad_threshold) for mat in coeffs)
+                  if d is not None and d.shape[1] >= window]
+    lengths = np.array([d.shape[1] for d in recordings], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    rows = recordings[0].shape[0] if recordings else 128
+
+    # Copy each recording once, transposed to time-major order
+    data = np.empty((int(lengths.sum()), rows), dtype=dtype)
+    scales = np.empty(len(recordings), dtype=np.float64)
+    for d, offset, length, i in zip(recordings, offsets, lengths, range(len(recordings))):
+        block = data[offset:offset + length]
+        block[...] = d.T
+        scales[i] = max(block.max(), -block.min())
+
+    return data, offsets, lengths, scales
+
+
+def split_data(coeffs, seed=42, dtype=np.float32):
     """
     Splits input coefficient matrices into smaller batches, discards
     zero-padded entries, and normalizes the data.
@@ -11,48 +175,58 @@ def split_data(coeffs, seed=42):
     that are predominantly zero-padded, normalizes the remaining segments
     to a [0, 1] range, and then shuffles the entire dataset.
 
+    The segments are reshaped views of the input matrices. They are copied
+    once, directly to their shuffled position in the output array, and then
+    normalized in place with batched reductions.
+
     Args:
         coeffs (list of np.ndarray): A list of original coefficient matrices,
                                      each expected to be of shape (128, 10000).
+                                     The number of columns must be divisible by 4.
         seed (int, optional): Seed for the random number generator to ensure
                               reproducible shuffling. Defaults to 42.
+        dtype (np.dtype, optional): Data type of the output array. Use np.float64
+                                    to reproduce the previous full-precision output.
+                                    Defaults to np.float32.
 
     Returns:
         np.ndarray: A NumPy array containing the processed, normalized,
                     and shuffled coefficient segments, each of shape (128, 2500).
     """
 
-    # Split data into smaller batches (e.g., 128x10000 --> 128x2500)
-    coeffs2 = []
-
-    for mat in np.array(coeffs):
-        split_matrices = np.array_split(mat, 4, axis=1)
-        coeffs2.extend(split_matrices)
-    coeffs2 = np.array(coeffs2)
+    # Split data into smaller batches (e.g., 128x10000 --> 4 x 128x2500 views)
+    segments = []
+    for mat in coeffs:
+        rows, cols = mat.shape
+        if cols % 4:
+            raise ValueError(
+                f"The number of columns ({cols}) must be divisible by 4")
+        segments.append(mat.reshape(rows, 4, cols // 4).transpose(1, 0, 2))
 
     # Discard cases with more than 5% zero-padding (represented as 0.5 after
-    # an initial normalization, if applicable, or actual zeros) and normalize
-    # each valid matrix to a [0, 1] range
+    # an initial normalization, if applicable, or actual zeros)
     # This step helps to avoid training on predominantly empty data
-    data = []
+    keep = [np.count_nonzero(seg == 0, axis=(1, 2)) / seg[0].size <= 0.05
+            for seg in segments]
+    num_samples = int(sum(k.sum() for k in keep))
 
-    for mat in coeffs2:
-        proportion_of_zeros = np.sum(mat == 0) / mat.size
-        if proportion_of_zeros <= 0.05:
-            # Normalize data to a [0, 1] range
-            mat = mat / np.max(abs(mat)) / 2 + 0.5 * np.ones(mat.shape)
-            data.append(mat)
-    data = np.array(data)
+    # Copy the valid segments to their shuffled position in the output array
+    positions = _shuffled_positions(num_samples, seed)
+    shape = segments[0].shape[1:] if segments else (128, 0)
+    data = np.empty((num_samples,) + shape, dtype=dtype)
+    offset = 0
+    for seg, k in zip(segments, keep):
+        n = int(k.sum())
+        data[positions[offset:offset + n]] = seg[k]
+        offset += n
 
-    # Convert to a NumPy array and shuffle the dataset
-    np.random.seed(seed)
-    shuffled_indices = np.random.permutation(len(data))
-    data = data[shuffled_indices]
+    # Normalize each valid matrix to a [0, 1] range
+    _normalize_chunks(data)
 
     return data
 
 
-def decimate_data(coeffs, seed=42):
+def decimate_data(coeffs, seed=42, dtype=np.float32):
     """
     Trims zero-padding from coefficient matrices, decimates them, splits
     them into smaller fixed-size samples, and normalizes the data.
@@ -63,57 +237,142 @@ def decimate_data(coeffs, seed=42):
     matrices into fixed-size chunks (128x2500), normalizes each chunk
     to a [0, 1] range, and shuffles the resulting dataset.
 
+    Trimming, decimation and chunking only create views of the input matrices.
+    The chunks are copied once, directly to their shuffled position in the
+    output array, and then normalized in place with batched reductions.
+
     Args:
         coeffs (list of np.ndarray): A list of original coefficient matrices.
                                      Expected to be of shape (128, N) where N
                                      can vary, but typically includes padding.
         seed (int, optional): Seed for the random number generator to ensure
                               reproducible shuffling. Defaults to 42.
+        dtype (np.dtype, optional): Data type of the output array. Use np.float64
+                                    to reproduce the previous full-precision output.
+                                    Defaults to np.float32.
 
     Returns:
         np.ndarray: A NumPy array containing the processed, decimated, normalized,
                     and shuffled coefficient samples, each of shape (128, 2500).
     """
 
-    trimmed_coeffs = []
+    chunks = _decimated_chunks(coeffs)
+    num_samples = sum(len(c) for c in chunks)
 
-    # Delete zero padding: identify and remove leading/trailing zeros
-    # This assumes zero-padding is indicated by zeros in the first row
-    for mat in np.array(coeffs):
-        first_row = mat[0, :]
+    # Copy the chunks to their shuffled position in the output array
+    positions = _shuffled_positions(num_samples, seed)
+    shape = chunks[0].shape[1:] if chunks else (128, 2500)
+    data = np.empty((num_samples,) + shape, dtype=dtype)
+    offset = 0
+    for c in chunks:
+        data[positions[offset:offset + len(c)]] = c
+        offset += len(c)
 
-        # Search for the first and last non-zero indices in the first row
-        nonzero_indices = np.where(first_row != 0)[0]
+    # Normalize data to a [0, 1] range
+    _normalize_chunks(data)
 
-        if nonzero_indices.size == 0:
-            # If the matrix is entirely zero-padded, discard it
-            continue
+    return data
+
+
+def decimate_data_to_memmap(coeffs, output_dir, seed=42, block_size=256, channel_axis=False):
+    """
+    Out-of-core version of `decimate_data`: trims, decimates, splits and
+    normalizes the coefficient matrices, streaming the chunks straight into a
+    preallocated float32 memory-mapped array on disk.
+
+    The chunks are written in the same shuffled order as `decimate_data`, so
+    the result matches its float32 output. Only the chunks of one recording, or
+    one block of chunks during normalization, are held in memory at a time.
+    The data is stored as a .npy file ('chunks.npy') that can be memory-mapped
+    with `np.load(..., mmap_mode='r')`, together with a small index file
+    ('index.json') recording the source recording and chunk position of each
+    sample.
 
-        start_idx = nonzero_indices[0]
-        end_idx = nonzero_indices[-1] + 1  # Include the last non-zero index
+    Args:
+        coeffs (list of np.ndarray): A list of original coefficient matrices.
+                                     Expected to be of shape (128, N) where N
+                                     can vary, but typically includes padding.
+        output_dir (str): The directory where the memmap and index files are written.
+        seed (int, optional): Seed for the random number generator to ensure
+                              reproducible shuffling. Defaults to 42.
+        block_size (int, optional): The number of chunks normalized at a time.
+                                    Defaults to 256.
+        channel_axis (bool, optional): Whether the returned samples have a trailing
+                                       channel axis, (128, 2500, 1), as expected by
+                                       `training.train_wgan`. Defaults to False.
 
-        trimmed_mat = mat[:, start_idx:end_idx]
-        trimmed_coeffs.append(trimmed_mat)
+    Returns:
+        np.memmap: A read-only memory-mapped array of shape (n_samples, 128, 2500)
+                   (or (n_samples, 128, 2500, 1) with `channel_axis`) with the
+                   processed, decimated, normalized and shuffled samples.
+    """
 
-    # Decimation: downsample the trimmed matrices by a factor of 2
-    coeffs2 = [m[:, ::2] for m in trimmed_coeffs]
+    # Views of the decimated chunks of each recording, without copying any data
+    chunks = []
+    chunk_sources = []
+    for rec_idx, mat in enumerate(coeffs):
+        rec_chunks = _decimated_chunks([mat])
+        if rec_chunks and len(rec_chunks[0]):
+            chunks.append(rec_chunks[0])
+            chunk_sources.extend((rec_idx, i) for i in range(len(rec_chunks[0])))
 
-    # Split into smaller samples (e.g., 128xN --> 128x2500) and normalize
-    data = []
-    for mat in coeffs2:
-        total_cols = mat.shape[1]  # Total number of columns in the matrix
-        num_chunks = total_cols // 2500  # Number of 2500-column chunks
-        for i in range(num_chunks):
-            # Extract a chunk of 2500 columns
-            chunk = mat[:, i*2500: (i+1)*2500]
-            # Normalize data to a [0, 1] range
-            chunk = chunk / np.max(abs(chunk)) / 2 + 0.5 * np.ones(chunk.shape)
-            data.append(chunk)
+    # Shuffled position of each chunk, identical to the shuffling of `decimate_data`
+    positions = _shuffled_positions(len(chunk_sources), seed)
 
-    # Convert to a NumPy array and shuffle the dataset
-    np.random.seed(seed)
-    shuffled_indices = np.random.permutation(len(data))
-    data = np.array(data)
-    data = data[shuffled_indices]
+    # Preallocate the float32 array on disk
+    os.makedirs(output_dir, exist_ok=True)
+    shape = chunks[0].shape[1:] if chunks else (128, 2500)
+    data = np.lib.format.open_memmap(
+        os.path.join(output_dir, 'chunks.npy'), mode='w+', dtype=np.float32,
+        shape=(len(chunk_sources),) + shape)
 
-    return data
+    # Write the chunks of each recording to their shuffled positions
+    offset = 0
+    for c in chunks:
+        data[positions[offset:offset + len(c)]] = c
+        offset += len(c)
+
+    # Normalize data to a [0, 1] range, one block of chunks at a time
+    for start in range(0, len(data), block_size):
+        _normalize_chunks(data[start:start + block_size])
+    data.flush()
+    del data
+
+    # Write the index file with the source of each sample, in storage order
+    sources = [None] * len(chunk_sources)
+    for source, position in zip(chunk_sources, positions):
+        sources[position] = list(source)
+    index = {
+        'data_file': 'chunks.npy',
+        'shape': [len(chunk_sources)] + list(shape),
+        'dtype': 'float32',
+        'seed': seed,
+        'sources': sources,
+    }
+    with open(os.path.join(output_dir, 'index.json'), 'w') as f:
+        json.dump(index, f)
+
+    return load_memmap_data(output_dir, channel_axis)
+
+
+def load_memmap_data(output_dir, channel_axis=False):
+    """
+    Opens the preprocessed samples written by `decimate_data_to_memmap` as a
+    read-only memory-mapped array, without loading them into memory.
+
+    Args:
+        output_dir (str): The directory containing the memmap and index files.
+        channel_axis (bool, optional): Whether the samples have a trailing channel
+                                       axis, (128, 2500, 1). Defaults to False.
+
+    Returns:
+        np.memmap: A read-only memory-mapped array of shape (n_samples, 128, 2500)
+                   (or (n_samples, 128, 2500, 1) with `channel_axis`).
+    """
+
+    with open(os.path.join(output_dir, 'index.json')) as f:
+        index = json.load(f)
+
+    data = np.load(os.path.join(output_dir, index['data_file']), mmap_mode='r')
+    # The channel axis is added as a view, so the data stays memory-mapped
+    return data[..., None] if channel_axis else data
@@ -0,0 +1,196 @@
+import time
+import contextlib
+from collections import defaultdict
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall-clock time spent in named phases (e.g. 'batch',
+    'train_step', 'loss_sync', 'checkpoint') and the number of times each phase
+    was entered.
+
+    TensorFlow runs the operations asynchronously, so the host time of a phase
+    that only dispatches work (such as a compiled training step) does not include
+    the device time, which shows up in the next phase that waits for a result
+    (e.g. reading the losses).
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager timing the enclosed block as phase `name`."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.counts[name] += 1
+
+    def iterate(self, iterable, name):
+        """Yields the items of `iterable`, timing the retrieval of each as phase `name`."""
+
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add(self, other):
+        """Adds the times and counts of another timer to this one."""
+
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+            self.counts[name] += other.counts[name]
+
+    def summary(self):
+        """Returns a one-line summary of the phases, by decreasing time."""
+
+        total = sum(self.seconds.values()) or 1.0
+        return ", ".join(
+            f"{name} {seconds:.2f} s ({100 * seconds / total:.0f}%)"
+            for name, seconds in sorted(self.seconds.items(), key=lambda kv: -kv[1]))
+
+
+class TrainingProfiler:
+    """
+    Instrumentation of the training loop: per-phase timers, steps/s and samples/s
+    counters for each epoch, and an optional `tf.profiler` trace window.
+
+    The trace window starts at step `trace_steps[0]` of epoch `trace_epochs[0]` and
+    stops after step `trace_steps[1]` of epoch `trace_epochs[1]` (epochs are 1-based
+    and inclusive, like the logs; steps are 0-based and inclusive). While tracing,
+    each step is annotated with its global step number, so that TensorBoard's
+    profile plugin shows the step time breakdown, and the name scopes of the
+    training step (generator_forward, critic_backward, ...) label its operations.
+    """
+
+    def __init__(self, trace_dir=None, trace_epochs=None, trace_steps=None):
+        """
+        Args:
+            trace_dir (str, optional): The log directory of the profiler trace.
+            trace_epochs (tuple of int, optional): The first and last epochs of the trace
+                                                   window. Defaults to None (no trace).
+            trace_steps (tuple of int, optional): The first step (of the first epoch) and
+                                                  the last step (of the last epoch) of the
+                                                  window. Defaults to the whole epochs.
+        """
+
+        if trace_epochs is not None and trace_dir is None:
+            raise ValueError("A profiler trace needs a trace directory")
+        self.trace_dir = trace_dir
+        self.trace_epochs = trace_epochs
+        self.trace_steps = trace_steps or (0, float('inf'))
+        self.total = PhaseTimer()
+        self.global_step = 0
+        self._tracing = False
+        self._trace_done = False
+        self._start_epoch(None)
+
+    def _start_epoch(self, epoch):
+        self.epoch = epoch
+        self.timer = PhaseTimer()
+        self.steps = 0
+        self.samples = 0
+        self._epoch_start = time.perf_counter()
+
+    def start_epoch(self, epoch):
+        """Starts the timers and counters of `epoch` (1-based)."""
+
+        self._start_epoch(epoch)
+
+    def phase(self, name):
+        """Context manager timing the enclosed block as phase `name` of the epoch."""
+
+        return self.timer.phase(name)
+
+    def iterate(self, iterable, name='batch'):
+        """Yields the items of `iterable`, timing their retrieval as phase `name`."""
+
+        return self.timer.iterate(iterable, name)
+
+    def _in_trace_window(self):
+        if self.trace_epochs is None or self._trace_done:
+            return False
+        first_epoch, last_epoch = self.trace_epochs
+        first_step, last_step = self.trace_steps
+        after_start = (self.epoch, self.steps) >= (first_epoch, first_step)
+        before_end = (self.epoch, self.steps) <= (last_epoch, last_step)
+        return after_start and before_end
+
+    @contextlib.contextmanager
+    def step(self, num_samples, name='train_step'):
+        """
+        Context manager around one training step: times it as phase `name`, counts
+        it and its `num_samples` samples, and starts, annotates or stops the trace.
+        """
+
+        import tensorflow as tf
+
+        in_window = self._in_trace_window()
+        if in_window and not self._tracing:
+            tf.profiler.experimental.start(self.trace_dir)
+            self._tracing = True
+            print(f"Profiler trace started at epoch {self.epoch}, step {self.steps}")
+        elif not in_window and self._tracing:
+            self.stop_trace()
+
+        with self.timer.phase(name):
+            if self._tracing:
+                with tf.profiler.experimental.Trace(name, step_num=self.global_step, _r=1):
+                    yield
+            else:
+                yield
+
+        self.steps += 1
+        self.samples += num_samples
+        self.global_step += 1
+
+    def stop_trace(self):
+        """Stops the profiler trace, if it is running."""
+
+        if self._tracing:
+            import tensorflow as tf
+            tf.profiler.experimental.stop()
+            self._tracing = False
+            self._trace_done = True
+            print(f"Profiler trace written to {self.trace_dir}")
+
+    def end_epoch(self, **extra):
+        """
+        Ends the epoch and returns its record: the epoch time, the steps/s and
+        samples/s throughput and the time of each phase (s), with the `extra`
+        fields (e.g. the losses).
+
+        Returns:
+            dict: The JSON-serializable record of the epoch.
+        """
+
+        # The trace window ends with the last epoch
+        if self._tracing and self.epoch >= self.trace_epochs[1]:
+            self.stop_trace()
+
+        seconds = time.perf_counter() - self._epoch_start
+        self.total.add(self.timer)
+        record = {
+            'epoch': self.epoch,
+            'seconds': seconds,
+            'steps': self.steps,
+            'samples': self.samples,
+            'steps_per_sec': self.steps / seconds if seconds else 0.0,
+            'samples_per_sec': self.samples / seconds if seconds else 0.0,
+            'phases': dict(self.timer.seconds),
+        }
+        record.update(extra)
+        return record
+
+    def close(self):
+        """Stops the trace if the training ended inside the window."""
+
+        self.stop_trace()
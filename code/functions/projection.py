@@ -0,0 +1,307 @@
+import os
+import contextlib
+import threading
+import numpy as np
+
+
+# Default location of the Laplace-Beltrami conversion matrix
+DEFAULT_PSI_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils', 'Psi_lb.mat')
+
+# Process-wide cache of the projection operators, by path of the conversion matrix
+_operators = {}
+_operators_lock = threading.Lock()
+
+
+def blas_threads(num_threads=None):
+    """
+    Returns a context manager limiting the threads of the BLAS library (used by
+    the matrix products of the projection) to `num_threads`.
+
+    The limit is set at run time with the optional `threadpoolctl` package. If it is
+    not installed (or `num_threads` is None), the context manager has no effect and
+    the BLAS threads can only be set before starting Python (e.g. OMP_NUM_THREADS or
+    OPENBLAS_NUM_THREADS).
+
+    Args:
+        num_threads (int, optional): The maximum number of BLAS threads. Defaults to None.
+
+    Returns:
+        contextlib.AbstractContextManager: The context manager.
+    """
+
+    if num_threads is None:
+        return contextlib.nullcontext()
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return contextlib.nullcontext()
+    return threadpool_limits(limits=num_threads, user_api='blas')
+
+
+def _cached_array(path, cache_path, compute):
+    """
+    Returns the array stored in the .npy file `cache_path` (memory-mapped), computing
+    and writing it with `compute()` if the file is missing or older than `path`.
+    If the cache cannot be written (e.g. read-only directory), the computed array is
+    returned directly.
+    """
+
+    if os.path.exists(cache_path) and \
+            os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        return np.load(cache_path, mmap_mode='r')
+
+    array = compute()
+    try:
+        # Write to a temporary file first, so that concurrent readers never see
+        # a partially written cache
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        return array
+    return np.load(cache_path, mmap_mode='r')
+
+
+def load_psi(path=DEFAULT_PSI_PATH, key='Psi_lb', cache_dir=None):
+    """
+    Loads the Laplace-Beltrami conversion matrix from its .mat file.
+
+    The first call converts the matrix to a float64 .npy file next to the .mat file
+    (or in `cache_dir`), and later calls (from any process) memory-map that file,
+    which avoids parsing the .mat file. The cache is rebuilt if the .mat file is newer.
+
+    Args:
+        path (str, optional): The .mat file. Defaults to utils/Psi_lb.mat.
+        key (str, optional): The variable of the .mat file. Defaults to 'Psi_lb'.
+        cache_dir (str, optional): Directory of the .npy cache. Defaults to the
+                                   directory of the .mat file.
+
+    Returns:
+        np.ndarray: The (read-only, memory-mapped) matrix, of shape (leads, modes).
+    """
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Conversion matrix not found in: {path}")
+
+    def read_mat():
+        import scipy.io as sio
+        return np.asarray(sio.loadmat(path, variable_names=[key])[key], dtype=np.float64)
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    if key != name:
+        name = f"{name}.{key}"
+    cache_path = os.path.join(cache_dir or os.path.dirname(path), f"{name}.npy")
+    return _cached_array(path, cache_path, read_mat)
+
+
+class LBProjection:
+    """
+    Projection between the Laplace-Beltrami coefficients (modes, time) and the
+    temporal signals (leads, time) of the BSPM leads: signals = Psi_lb @ coeffs.
+
+    The matrix is kept in float64 and float32, and the inverse operator (Moore-Penrose
+    pseudo-inverse, or the QR factors of Psi_lb) is computed once, on first use. All
+    transforms are batched: a single matrix product over arrays of shape
+    (batch, modes, time) or (modes, time).
+    """
+
+    def __init__(self, Psi_lb):
+        """
+        Args:
+            Psi_lb (np.ndarray): The conversion matrix, of shape (leads, modes).
+        """
+
+        self.Psi_lb = np.asarray(Psi_lb, dtype=np.float64)
+        self.num_leads, self.num_modes = self.Psi_lb.shape
+        self._matrices = {np.dtype(np.float64): self.Psi_lb}
+        self._pinv = {}
+        self._qr = None
+        self._lock = threading.Lock()
+
+    def matrix(self, dtype=np.float32):
+        """Returns Psi_lb in the given dtype (cached)."""
+
+        dtype = np.dtype(dtype)
+        if dtype not in self._matrices:
+            self._matrices[dtype] = np.ascontiguousarray(self.Psi_lb, dtype=dtype)
+        return self._matrices[dtype]
+
+    def pinv(self, dtype=np.float32):
+        """Returns the pseudo-inverse of Psi_lb, of shape (modes, leads) (cached)."""
+
+        dtype = np.dtype(dtype)
+        with self._lock:
+            if np.dtype(np.float64) not in self._pinv:
+                self._pinv[np.dtype(np.float64)] = np.linalg.pinv(self.Psi_lb)
+            if dtype not in self._pinv:
+                self._pinv[dtype] = self._pinv[np.dtype(np.float64)].astype(dtype)
+        return self._pinv[dtype]
+
+    def _qr_factors(self):
+        """Returns the (reduced) QR factors of Psi_lb (cached)."""
+
+        with self._lock:
+            if self._qr is None:
+                if self.num_leads < self.num_modes:
+                    raise ValueError("The QR inverse needs at least as many leads as modes")
+                self._qr = np.linalg.qr(self.Psi_lb)
+        return self._qr
+
+    def forward(self, coeffs, dtype=np.float32, denormalize=False, out=None,
+                batch_size=None, num_threads=None):
+        """
+        Converts coefficient samples into temporal signals.
+
+        Args:
+            coeffs (np.ndarray): The coefficients, of shape (batch, modes, time),
+                                 (batch, modes, time, 1) or (modes, time). May be a
+                                 memory-mapped array.
+            dtype (np.dtype, optional): The precision of the product and of the result.
+                                        Defaults to np.float32.
+            denormalize (bool, optional): If True, the coefficients are generator
+                                          outputs in [0, 1], scaled to [-1, 1] first.
+                                          Defaults to False.
+            out (np.ndarray, optional): Array (e.g. a memmap) to write the signals to.
+            batch_size (int, optional): Number of samples converted at a time, which
+                                        bounds the temporary memory. Defaults to all.
+            num_threads (int, optional): The BLAS threads (see `blas_threads`).
+
+        Returns:
+            np.ndarray: The signals, of shape (batch, leads, time) or (leads, time).
+        """
+
+        # The denormalization is folded into the operator:
+        # Psi_lb @ ((x - 0.5) * 2) = (2 * Psi_lb) @ x - Psi_lb @ 1
+        matrix, offset = self._affine('forward', dtype, denormalize)
+        return self._apply(matrix, offset, coeffs, self.num_modes, self.num_leads, dtype,
+                           out, batch_size, num_threads)
+
+    def inverse(self, signals, dtype=np.float32, normalize=False, method='pinv', out=None,
+                batch_size=None, num_threads=None):
+        """
+        Converts temporal signals into coefficients (least-squares solution).
+
+        Args:
+            signals (np.ndarray): The signals, of shape (batch, leads, time),
+                                  (batch, leads, time, 1) or (leads, time).
+            dtype (np.dtype, optional): The precision of the result. Defaults to np.float32.
+            normalize (bool, optional): If True, the coefficients are scaled from
+                                        [-1, 1] to [0, 1] (the generator's range).
+                                        Defaults to False.
+            method (str, optional): 'pinv' (a product with the cached pseudo-inverse)
+                                    or 'qr' (Q^T then a triangular solve with the
+                                    cached QR factors, computed in float64, which is
+                                    slower but better conditioned). Defaults to 'pinv'.
+            out (np.ndarray, optional): Array (e.g. a memmap) to write the coefficients to.
+            batch_size (int, optional): Number of samples converted at a time. Defaults to all.
+            num_threads (int, optional): The BLAS threads (see `blas_threads`).
+
+        Returns:
+            np.ndarray: The coefficients, of shape (batch, modes, time) or (modes, time).
+        """
+
+        if method == 'pinv':
+            # pinv @ y / 2 + 0.5 = (pinv / 2) @ y + 0.5
+            matrix, offset = self._affine('inverse', dtype, normalize)
+            return self._apply(matrix, offset, signals, self.num_leads, self.num_modes,
+                               dtype, out, batch_size, num_threads)
+        if method != 'qr':
+            raise ValueError(f"Unknown inverse method: {method}")
+
+        from scipy.linalg import solve_triangular
+        q, r = self._qr_factors()
+
+        # The batches are solved in float64 and only the result is converted to `dtype`
+        def solve(batch):
+            projected = np.matmul(q.T, np.asarray(batch, dtype=np.float64))
+            # Solve R x = Q^T y for all samples and times at once
+            flat = projected.transpose(1, 0, 2).reshape(self.num_modes, -1)
+            solution = solve_triangular(r, flat)
+            solution = solution.reshape(projected.shape[1], projected.shape[0], -1)
+            return solution.transpose(1, 0, 2) / 2 + 0.5 if normalize else \
+                solution.transpose(1, 0, 2)
+
+        return self._apply(solve, None, signals, self.num_leads, self.num_modes, dtype,
+                           out, batch_size, num_threads)
+
+    def _affine(self, direction, dtype, scaled):
+        """
+        Returns the matrix and offset (or None) of the forward or pinv-inverse
+        transform, with the [0, 1] <-> [-1, 1] scaling folded in if `scaled` (cached).
+        """
+
+        dtype = np.dtype(dtype)
+        key = (direction, dtype, scaled)
+        if key not in self._matrices:
+            if direction == 'forward':
+                matrix = self.matrix(np.float64)
+                affine = (2 * matrix, -matrix.sum(axis=1)) if scaled else (matrix, None)
+            else:
+                matrix = self.pinv(np.float64)
+                affine = (matrix / 2, np.full(len(matrix), 0.5)) if scaled else (matrix, None)
+            self._matrices[key] = tuple(
+                None if a is None else np.ascontiguousarray(a, dtype=dtype) for a in affine)
+        return self._matrices[key]
+
+    def _apply(self, matrix, offset, x, in_dim, out_dim, dtype, out, batch_size, num_threads):
+        """
+        Computes `matrix @ x + offset` (or `matrix(x)` if it is a function) batch by
+        batch, with `x` of shape (batch, in_dim, time), writing into `out`. The batches
+        are converted to `dtype` for a matrix, and to float64 for a function (which
+        returns float64 results, converted to `dtype` when written to `out`).
+        """
+
+        if x.ndim == 4:
+            x = x[..., 0]
+        single = x.ndim == 2
+        if single:
+            x = x[None]
+        if x.shape[1] != in_dim:
+            raise ValueError(f"Expected {in_dim} rows, got an array of shape {x.shape}")
+
+        num_samples, _, time_steps = x.shape
+        if out is None:
+            out = np.empty((num_samples, out_dim, time_steps), dtype=dtype)
+        result = out[None] if out.ndim == 2 else out
+        batch_size = batch_size or max(num_samples, 1)
+
+        batch_dtype = np.float64 if callable(matrix) else dtype
+        with blas_threads(num_threads):
+            for first in range(0, num_samples, batch_size):
+                batch = np.asarray(x[first:first + batch_size], dtype=batch_dtype)
+                target = result[first:first + len(batch)]
+                if callable(matrix):
+                    target[...] = matrix(batch)
+                    continue
+                # Write the product directly into the output when possible
+                if target.dtype == dtype:
+                    np.matmul(matrix, batch, out=target)
+                else:
+                    target[...] = np.matmul(matrix, batch)
+                if offset is not None:
+                    target += offset[:, None]
+        return out[0] if single and out.ndim == 3 else out
+
+
+def get_projection(path=DEFAULT_PSI_PATH, key='Psi_lb', cache_dir=None):
+    """
+    Returns the process-wide projection operator of the conversion matrix in `path`,
+    loading it (see `load_psi`) on the first call only.
+
+    Args:
+        path (str, optional): The .mat file. Defaults to utils/Psi_lb.mat.
+        key (str, optional): The variable of the .mat file. Defaults to 'Psi_lb'.
+        cache_dir (str, optional): Directory of the .npy cache. Defaults to the
+                                   directory of the .mat file.
+
+    Returns:
+        LBProjection: The shared operator.
+    """
+
+    cache_key = (os.path.abspath(path), key)
+    with _operators_lock:
+        if cache_key not in _operators:
+            _operators[cache_key] = LBProjection(load_psi(path, key, cache_dir))
+        return _operators[cache_key]
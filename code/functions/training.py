@@ -1,12 +1,318 @@
 import numpy as np
 import tensorflow as tf
 import time
-import matplotlib.pyplot as plt
 import os
-from IPython.display import clear_output
-from visualization import *
-from generators import *
-from discriminators import *
+import json
+import shutil
+import tempfile
+import contextlib
+from generators import build_generator
+from discriminators import (FLOAT16_GP_GRAD_SCALE, build_critic, critic_losses_fused,
+                            disc_model_critic, gradient_penalty, is_batch_dependent)
+from checkpointing import (build_checkpoint, restore_checkpoint, save_checkpoint,
+                           truncate_epoch_log)
+from async_io import AsyncArtifactWriter, FigureRenderer
+from distribution import is_chief, worker_id
+from profiling import TrainingProfiler
+from input_pipeline import make_training_dataset, make_window_dataset
+from chunk_cache import ChunkIndex
+from window_sampler import WindowSampler
+from evaluation import QualityMonitor
+
+
+def _scale_loss(optimizer, loss):
+    """Scales a loss for a loss-scaling (mixed float16) optimizer."""
+
+    if isinstance(optimizer, tf.keras.mixed_precision.LossScaleOptimizer):
+        return optimizer.get_scaled_loss(loss)
+    return loss
+
+
+def _unscale_gradients(optimizer, grads):
+    """Undoes the loss scaling of the gradients for a loss-scaling optimizer."""
+
+    if isinstance(optimizer, tf.keras.mixed_precision.LossScaleOptimizer):
+        return optimizer.get_unscaled_gradients(grads)
+    return grads
+
+
+def make_train_step(
+        generator, discriminator, optimizer_d, optimizer_g, latent_dim,
+        n_critic=5, lambda_gp=10,
+        compile_step=True, jit_compile=False, rng=None, fused_critic=True, strategy=None):
+    """
+    Builds the training step of the WGAN-GP for a single batch of real samples.
+
+    The step runs the `n_critic` critic updates followed by one generator update.
+    If an optimizer is a `tf.keras.mixed_precision.LossScaleOptimizer`, its loss
+    is scaled before differentiation and the gradients are unscaled before they
+    are applied.
+    Losses are not returned to Python: they are added to device-side accumulators
+    (`tf.Variable`) that can be read once per epoch with `read_and_reset_losses`,
+    which avoids a host synchronization after every update.
+
+    With a `tf.distribute` strategy, the step takes a distributed batch and runs
+    on every replica with `strategy.run`. Each replica computes its losses and
+    gradient penalty on its own part of the batch, weighted by its share of the
+    global batch, so that the all-reduced (summed) gradients and losses are those
+    of the mean over the global batch. The models, optimizers and `rng` must then
+    have been created under `strategy.scope()`.
+
+    Args:
+        generator (tf.keras.Model): The generator model.
+        discriminator (tf.keras.Model): The discriminator (critic) model.
+        optimizer_d (tf.keras.optimizers.Optimizer): The optimizer for the critic.
+        optimizer_g (tf.keras.optimizers.Optimizer): The optimizer for the generator.
+        latent_dim (int): The dimension of the latent space (noise vector).
+        n_critic (int, optional): The number of critic updates per generator update.
+                                  Defaults to 5.
+        lambda_gp (float, optional): The gradient penalty coefficient. Defaults to 10.
+        compile_step (bool, optional): If True, the step is compiled with `tf.function`.
+                                       Defaults to True.
+        jit_compile (bool, optional): If True, the compiled step is also compiled with
+                                      XLA. Defaults to False.
+        rng (tf.random.Generator, optional): The random generator for the latent vectors
+                                             and the gradient penalty interpolation. Its
+                                             state can be checkpointed. Defaults to a new
+                                             non-deterministic generator.
+        fused_critic (bool, optional): If True, each critic update evaluates the critic
+                                       once on the concatenated real, fake and interpolated
+                                       samples (see `critic_losses_fused`) instead of three
+                                       separate calls. It is disabled for critics
+                                       with batch statistics (see `is_batch_dependent`).
+                                       Defaults to True.
+        strategy (tf.distribute.Strategy, optional): The data-parallel strategy of the
+                                                     models. XLA compilation is not
+                                                     supported with a strategy.
+                                                     Defaults to None (single device).
+
+    Returns:
+        tuple: A tuple containing:
+            - train_step (callable): Function taking a batch of real samples of shape
+                                     (batch, rows, cols, 1).
+            - loss_accumulators (dict): Dictionary of `tf.Variable` accumulators with the
+                                        summed losses and the number of updates.
+    """
+
+    if strategy is not None and jit_compile:
+        raise ValueError("jit_compile is not supported with a distribution strategy")
+
+    if rng is None:
+        rng = tf.random.Generator.from_non_deterministic_state()
+
+    # A critic with batch statistics must see real and fake samples separately
+    if fused_critic and is_batch_dependent(discriminator):
+        print("The critic depends on batch statistics: the fused critic pass is disabled")
+        fused_critic = False
+
+    # A float16 critic needs its gradient penalty gradients scaled to avoid underflow
+    gp_grad_scale = FLOAT16_GP_GRAD_SCALE if discriminator.compute_dtype == 'float16' else None
+
+    # Device-side accumulators for the losses of the current epoch
+    loss_accumulators = {
+        'disc_loss': tf.Variable(0.0, trainable=False, dtype=tf.float32),
+        'gp_loss': tf.Variable(0.0, trainable=False, dtype=tf.float32),
+        'gen_loss': tf.Variable(0.0, trainable=False, dtype=tf.float32),
+        'critic_updates': tf.Variable(0.0, trainable=False, dtype=tf.float32),
+        'gen_updates': tf.Variable(0.0, trainable=False, dtype=tf.float32),
+    }
+
+    def replica_step(real_images_batch):
+        batch_size = tf.shape(real_images_batch)[0]
+
+        # Share of this replica in the global batch. The losses are weighted by it,
+        # so that summing them (and their gradients) over the replicas gives the
+        # mean over the global batch
+        if strategy is None:
+            weight = 1.0
+        else:
+            local_size = tf.cast(batch_size, tf.float32)
+            weight = local_size / tf.distribute.get_replica_context().all_reduce(
+                tf.distribute.ReduceOp.SUM, local_size)
+
+        disc_loss_sum = 0.0
+        gp_loss_sum = 0.0
+
+        # ## Train the Critic (n_critic times per batch)
+        # The Python loop is unrolled when the step is traced into a graph
+        for _ in range(n_critic):
+            # Generate new noise for each critic update
+            noise_for_critic = rng.normal(shape=(batch_size, latent_dim))
+
+            # The name scopes label the phases of the step in profiler traces
+            with tf.GradientTape() as tape:
+                # Generate fake images using the generator
+                with tf.name_scope('generator_forward'):
+                    generated_imgs = generator(noise_for_critic, training=True)
+
+                if fused_critic:
+                    # Critic loss (Wasserstein distance term) and gradient penalty
+                    # from a single critic pass over real, fake and interpolated samples
+                    with tf.name_scope('critic_forward_gradient_penalty'):
+                        critic_loss, gp = critic_losses_fused(
+                            discriminator, real_images_batch, generated_imgs, lambda_gp,
+                            rng=rng, grad_scale=gp_grad_scale)
+                else:
+                    # Get predictions from discriminator for real and fake images
+                    with tf.name_scope('critic_forward'):
+                        real_predictions = discriminator(real_images_batch, training=True)
+                        fake_predictions = discriminator(generated_imgs, training=True)
+
+                        # Calculate critic loss (Wasserstein distance term)
+                        critic_loss = tf.reduce_mean(
+                            fake_predictions) - tf.reduce_mean(real_predictions)
+
+                    # Calculate gradient penalty
+                    with tf.name_scope('gradient_penalty'):
+                        gp = gradient_penalty(
+                            discriminator, real_images_batch, generated_imgs, lambda_gp,
+                            rng=rng, grad_scale=gp_grad_scale)
+
+                if strategy is not None:
+                    critic_loss = critic_loss * weight
+                    gp = gp * weight
+
+                # Total critic loss is Wasserstein disance term plus Gradient Penalty
+                critic_loss_total = critic_loss + gp
+                scaled_critic_loss = _scale_loss(optimizer_d, critic_loss_total)
+
+            # Compute and apply gradients to the critic's trainable variables
+            with tf.name_scope('critic_backward'):
+                critic_grads = _unscale_gradients(optimizer_d, tape.gradient(
+                    scaled_critic_loss, discriminator.trainable_variables))
+            with tf.name_scope('critic_apply'):
+                optimizer_d.apply_gradients(
+                    zip(critic_grads, discriminator.trainable_variables))
+
+            # Sum the losses of the critic updates
+            disc_loss_sum += critic_loss
+            gp_loss_sum += gp
+
+        # ## Train the Generator (once per batch, after n_critic critic updates)
+        noise_for_generator = rng.normal(shape=(batch_size, latent_dim))
+
+        with tf.GradientTape() as tape, tf.name_scope('generator_update_forward'):
+            generated_imgs = generator(noise_for_generator, training=True)
+            fake_predictions = discriminator(generated_imgs, training=True)
+            # Generator loss: the generator wants to maximize the discriminator's output
+            # for fake images, so it minimizes the negative of this value
+            gen_loss = -tf.reduce_mean(fake_predictions)
+            if strategy is not None:
+                gen_loss = gen_loss * weight
+            scaled_gen_loss = _scale_loss(optimizer_g, gen_loss)
+
+        # Compute and apply gradients to the generator's trainable variables
+        with tf.name_scope('generator_backward'):
+            gen_grads = _unscale_gradients(optimizer_g, tape.gradient(
+                scaled_gen_loss, generator.trainable_variables))
+        with tf.name_scope('generator_apply'):
+            optimizer_g.apply_gradients(
+                zip(gen_grads, generator.trainable_variables))
+
+        return disc_loss_sum, gp_loss_sum, gen_loss
+
+    def train_step(real_images_batch):
+        if strategy is None:
+            disc_loss_sum, gp_loss_sum, gen_loss = replica_step(real_images_batch)
+        else:
+            # Run the step on every replica and sum the weighted losses
+            per_replica_losses = strategy.run(replica_step, args=(real_images_batch,))
+            disc_loss_sum, gp_loss_sum, gen_loss = [
+                strategy.reduce(tf.distribute.ReduceOp.SUM, loss, axis=None)
+                for loss in per_replica_losses]
+
+        # Accumulate the losses of the n_critic critic updates and the generator update
+        loss_accumulators['disc_loss'].assign_add(disc_loss_sum)
+        loss_accumulators['gp_loss'].assign_add(gp_loss_sum)
+        loss_accumulators['critic_updates'].assign_add(float(n_critic))
+        loss_accumulators['gen_loss'].assign_add(gen_loss)
+        loss_accumulators['gen_updates'].assign_add(1.0)
+
+    if compile_step and strategy is not None:
+        # Distributed batches have no fixed input signature
+        train_step = tf.function(train_step, reduce_retracing=True)
+    elif compile_step:
+        # A fixed input signature with an unknown batch dimension avoids retracing
+        # on the last (possibly smaller) batch of each epoch
+        input_signature = [tf.TensorSpec(
+            shape=(None,) + tuple(discriminator.input_shape[1:]), dtype=tf.float32)]
+        train_step = tf.function(
+            train_step, input_signature=input_signature, jit_compile=jit_compile)
+
+    return train_step, loss_accumulators
+
+
+def read_and_reset_losses(loss_accumulators):
+    """
+    Reads the average losses stored in the device-side accumulators and resets them.
+
+    Args:
+        loss_accumulators (dict): The accumulators returned by `make_train_step`.
+
+    Returns:
+        tuple: A tuple containing the average critic loss, generator loss and
+               gradient penalty since the last reset (NaN if no update was run).
+    """
+
+    # Single read-back of all the accumulated values
+    values = {name: float(var.numpy()) for name, var in loss_accumulators.items()}
+    for var in loss_accumulators.values():
+        var.assign(0.0)
+
+    critic_updates = values['critic_updates']
+    gen_updates = values['gen_updates']
+    avg_disc_loss = values['disc_loss'] / critic_updates if critic_updates else float('nan')
+    avg_gp_loss = values['gp_loss'] / critic_updates if critic_updates else float('nan')
+    avg_gen_loss = values['gen_loss'] / gen_updates if gen_updates else float('nan')
+
+    return avg_disc_loss, avg_gen_loss, avg_gp_loss
+
+
+def iterate_batches(X_train, batch_size, steps_per_epoch, num_training_samples):
+    """
+    Yields the batches of real samples for one training epoch.
+
+    Args:
+        X_train (tf.data.Dataset or np.ndarray): The training data, either as an
+                                                 input pipeline that yields batches
+                                                 (see `input_pipeline.make_training_dataset`),
+                                                 a distributed pipeline or an array of
+                                                 samples.
+        batch_size (int): The number of samples per training batch.
+        steps_per_epoch (int): The number of training steps (batches) per epoch.
+        num_training_samples (int): The total number of samples in the training dataset.
+
+    Yields:
+        tf.Tensor: A float32 batch of real samples.
+    """
+
+    if isinstance(X_train, tf.distribute.DistributedDataset):
+        # Distributed pipelines are already limited to `steps_per_epoch` batches
+        yield from X_train
+        return
+
+    if isinstance(X_train, tf.data.Dataset):
+        # Batches are already shuffled, gathered and prefetched by the pipeline
+        yield from X_train.take(steps_per_epoch)
+        return
+
+    if isinstance(X_train, WindowSampler):
+        # Random windows of the recordings, drawn with NumPy's global generator
+        for step in range(steps_per_epoch):
+            yield tf.constant(X_train.sample(batch_size))
+        return
+
+    # Shuffle the indices of the dataset for random batching at the start of each epoch
+    shuffled_indices = np.random.permutation(num_training_samples)
+
+    for step in range(steps_per_epoch):
+        # Get indices for the current batch.
+        batch_indices = shuffled_indices[step * batch_size: (step + 1) * batch_size]
+
+        # Handle potential empty last batch
+        if len(batch_indices) == 0:
+            continue
+        yield tf.constant(X_train[batch_indices])
 
 
 def train_wgan(
@@ -16,7 +322,14 @@ def train_wgan(
         sample_interval=5,
         n_critic=5, lambda_gp=10,
         start_epoch=0,
-        scheduler=1):
+        scheduler=1,
+        compile_step=True, jit_compile=False,
+        resume=False, checkpoint_dir=None, checkpoint_interval=1, max_checkpoints=3,
+        save_interval=1, mixed_precision=None, fused_critic=True, strategy=None,
+        generator_arch='wcgan', critic_kwargs=None,
+        profile_epochs=None, profile_steps=None, profile_dir=None,
+        eval_interval=None, eval_data=None, eval_samples=256, eval_metric='sliced_wasserstein',
+        early_stopping_patience=None, eval_min_delta=0.0):
     """
     Trains a Wasserstein Generative Adversarial Network with Gradient Penalty (WGAN-GP).
 
@@ -24,9 +337,48 @@ def train_wgan(
     discriminator (critic) and generator updates, gradient penalty calculation,
     learning rate scheduling, model saving, and visualization of training progress.
 
+    Models and logs are written by a background thread from snapshots of the
+    weights, and sample figures are rendered in separate processes, so neither
+    blocks the training steps. The per-epoch losses are appended to
+    'results/loss_history.csv', and 'results/loss_history.npz' is written at the
+    end of training.
+
+    Every epoch is instrumented (see `profiling.TrainingProfiler`): the time spent
+    in each phase of the loop (batch retrieval, training steps, loss read-back,
+    model saving, sample generation, checkpointing), the steps/s and the samples/s
+    are appended as a JSON line to 'results/profile.jsonl'. A `tf.profiler` trace
+    of a range of epochs and steps can be recorded with `profile_epochs`.
+
+    With `eval_interval`, the quality of the generator is measured every
+    `eval_interval` epochs (see `evaluation.QualityMonitor`): the distance between a
+    fixed subset of real samples and the samples generated from fixed latent vectors.
+    The metrics are appended to 'results/quality.csv', 'best_generator.h5' is then
+    the generator with the lowest `eval_metric` (instead of the lowest generator
+    loss after epoch 1500), and training optionally stops early when the metric has
+    not improved for `early_stopping_patience` evaluations.
+
+    With a `tf.distribute` strategy, the models, optimizers and random generator
+    are created under its scope and every global batch is split across the
+    replicas (see `make_train_step`). `batch_size` is then the global batch size.
+    In a multi-worker cluster, every worker runs this function with the same
+    arguments; only the chief writes the models, logs, figures and checkpoints,
+    while the other workers write theirs to a temporary directory that is deleted
+    at the end of training.
+
     Args:
-        X_train (tf.Tensor or np.ndarray): The training data (real images/samples).
-                                           Expected to be normalized to [0, 1].
+        X_train (tf.Tensor, np.ndarray or tf.data.Dataset): The training data (real
+                                           images/samples), expected to be normalized to
+                                           [0, 1], of shape (n, rows, cols, 1). It can
+                                           also be a memory-mapped array (see
+                                           `preprocessing.decimate_data_to_memmap` with
+                                           `channel_axis=True`) or a
+                                           `chunk_cache.ChunkIndex` (with
+                                           `with_channel_axis()`), which are read one
+                                           batch at a time, a
+                                           `window_sampler.WindowSampler`, which samples
+                                           random windows at batch time, or a batched
+                                           input pipeline built with
+                                           `input_pipeline.make_training_dataset`.
         type_gan (str): A string indicating the type of GAN, used for directory naming
                         (in this case, only 'wgan' is considered valid. Previous versions
                         of the code also accepted 'dcgan' as an option).
@@ -40,16 +392,93 @@ def train_wgan(
         num_training_samples (int): The total number of samples in the training dataset.
         optimizer_d (tf.keras.optimizers.Optimizer): The optimizer for the discriminator (critic).
         optimizer_g (tf.keras.optimizers.Optimizer): The optimizer for the generator.
+                                                     With a strategy, both optimizers are
+                                                     recreated from their configuration
+                                                     under the strategy scope.
         sample_interval (int, optional): The frequency (in epochs) at which to
                                          generate and save sample images. Defaults to 5.
         n_critic (int, optional): The number of discriminator updates per generator update.
                                   Defaults to 5.
         lambda_gp (float, optional): The gradient penalty coefficient. Defaults to 10.
-        start_epoch (int, optional): The epoch number to start training from. Useful for
-                                     resuming training. Defaults to 0.
+        start_epoch (int, optional): The epoch number to start training from. Training
+                                     runs until epoch `start_epoch + epochs`. Defaults to 0.
         scheduler (int, optional): Flag to enable (1) or disable (0) the
                                    manual learning rate scheduler for the generator.
                                    Defaults to 1.
+        compile_step (bool, optional): If True, the training step (critic and generator
+                                       updates) is compiled into a graph with `tf.function`.
+                                       If False, it runs eagerly. Defaults to True.
+        jit_compile (bool, optional): If True, the compiled training step is also
+                                      compiled with XLA. Ignored when `compile_step`
+                                      is False. Defaults to False.
+        resume (bool, optional): If True and a checkpoint exists in `checkpoint_dir`,
+                                 training resumes from it: models, optimizers, LR
+                                 scheduler state, loss histories, best generator loss
+                                 and RNG states are restored, and training continues
+                                 after the last checkpointed epoch. Defaults to False.
+        checkpoint_dir (str, optional): The directory of the training checkpoints.
+                                        Defaults to a 'checkpoints' folder in the
+                                        model directory.
+        checkpoint_interval (int, optional): The frequency (in epochs) at which the
+                                             training state is checkpointed. Defaults to 1.
+        max_checkpoints (int, optional): The number of most recent checkpoints to keep.
+                                         Defaults to 3.
+        save_interval (int, optional): The frequency (in epochs) at which the generator
+                                       and discriminator models are saved. Defaults to 1.
+        mixed_precision (str, optional): Keras mixed-precision policy for the models,
+                                         'mixed_float16' or 'mixed_bfloat16'. The output
+                                         layers and the gradient penalty norm stay in
+                                         float32. With 'mixed_float16', both optimizers
+                                         are wrapped in a `LossScaleOptimizer` for dynamic
+                                         loss scaling. Defaults to None (float32).
+        fused_critic (bool, optional): If True, each critic update runs a single critic
+                                       forward pass over the concatenated real, fake and
+                                       interpolated samples. Defaults to True.
+        strategy (tf.distribute.Strategy, optional): The data-parallel strategy, e.g.
+                                                     from `distribution.make_strategy`
+                                                     (`MirroredStrategy` or
+                                                     `MultiWorkerMirroredStrategy`). A
+                                                     `tf.data` pipeline should drop its
+                                                     last incomplete batch and, with
+                                                     several workers, be shuffled with a
+                                                     fixed seed; arrays are wrapped in
+                                                     such a pipeline. XLA is not supported.
+                                                     Defaults to None (single device).
+        generator_arch (str, optional): The generator architecture, 'wcgan' (original)
+                                        or 'subpixel' (parameter-efficient, see
+                                        `generators.gen_model_subpixel`).
+                                        Defaults to 'wcgan'.
+        critic_kwargs (dict, optional): Arguments of `discriminators.build_critic`
+                                        (depth, widths, head, normalization...) to
+                                        build a configurable critic. Defaults to None
+                                        (the original `disc_model_critic`).
+        profile_epochs (tuple of int, optional): The first and last epochs (1-based,
+                                                 inclusive) of a `tf.profiler` trace,
+                                                 viewable in TensorBoard. Defaults to
+                                                 None (no trace).
+        profile_steps (tuple of int, optional): The first step of the first traced
+                                                epoch and the last step of the last
+                                                one (0-based, inclusive). Defaults to
+                                                None (whole epochs).
+        profile_dir (str, optional): The log directory of the trace. Defaults to
+                                     'results/profile'.
+        eval_interval (int, optional): The frequency (in epochs) of the quality
+                                       evaluation. Defaults to None (no evaluation,
+                                       loss-based selection of the best generator).
+        eval_data (np.ndarray, optional): The fixed real subset of the evaluation, of
+                                          shape (samples, rows, cols[, 1]). Defaults
+                                          to None (`eval_samples` samples of `X_train`,
+                                          drawn with a fixed seed).
+        eval_samples (int, optional): The number of real and generated samples of
+                                      each evaluation. Defaults to 256.
+        eval_metric (str, optional): The metric selecting the best generator,
+                                     'sliced_wasserstein' or 'psd_log_rmse'.
+                                     Defaults to 'sliced_wasserstein'.
+        early_stopping_patience (int, optional): The number of evaluations without
+                                                 improvement after which training stops.
+                                                 Defaults to None (no early stopping).
+        eval_min_delta (float, optional): Minimum decrease of the metric that counts
+                                          as an improvement. Defaults to 0.0.
 
     Returns:
         tuple: A tuple containing lists of average losses per epoch:
@@ -61,10 +490,55 @@ def train_wgan(
     start_time = time.time()
     print("Training WGAN...")
 
+    # A tf.data input pipeline can be given instead of the raw training array
+    use_dataset = isinstance(X_train, tf.data.Dataset)
+
     # Store original data range for visualization purposes (assuming 0-1 normalization)
-    original_data_min = np.min(X_train)
-    original_data_max = np.max(X_train)
-    X_train = X_train.astype(np.float32)
+    # Memory-mapped, chunk-cached and window-sampled data is consumed lazily, one
+    # batch at a time, so it is neither scanned nor copied here
+    if use_dataset or isinstance(X_train, (np.memmap, ChunkIndex, WindowSampler)):
+        original_data_min, original_data_max = 0.0, 1.0
+    else:
+        original_data_min = np.min(X_train)
+        original_data_max = np.max(X_train)
+        X_train = X_train.astype(np.float32, copy=False)
+
+    # Fixed real subset of the quality evaluation (drawn before the data is
+    # distributed, without touching the global NumPy RNG used for shuffling)
+    quality_monitor = None
+    if eval_interval:
+        if eval_data is None and use_dataset:
+            eval_data = np.concatenate([np.asarray(batch) for batch in X_train.unbatch().batch(
+                eval_samples).take(1)])
+        elif eval_data is None and isinstance(X_train, WindowSampler):
+            eval_data = X_train.sample(eval_samples, np.random.default_rng(0))
+        elif eval_data is None:
+            eval_idx = np.sort(np.random.default_rng(0).choice(
+                len(X_train), min(eval_samples, len(X_train)), replace=False))
+            eval_data = X_train[eval_idx]
+        quality_monitor = QualityMonitor(eval_data, latent_dim, num_samples=eval_samples,
+                                         metric=eval_metric)
+
+    # Distribute the global batches across the replicas
+    if strategy is not None:
+        if isinstance(X_train, WindowSampler):
+            # The fixed seed gives the same windows on every worker
+            X_train = make_window_dataset(X_train, batch_size, seed=0)
+        elif not use_dataset:
+            # The fixed seed gives the same shuffling on every worker
+            X_train = make_training_dataset(X_train, batch_size, seed=0, drop_remainder=True)
+        X_train = strategy.experimental_distribute_dataset(X_train.take(steps_per_epoch))
+
+    # Only the chief writes the training artifacts. The other workers of a
+    # cluster write theirs to a temporary directory, but resume from the
+    # chief's checkpoints
+    chief = strategy is None or is_chief(strategy)
+    if checkpoint_dir is None:
+        checkpoint_dir = os.path.join(BASE_DIR, 'models', type_gan, 'checkpoints')
+    restore_dir = checkpoint_dir
+    if not chief:
+        BASE_DIR = tempfile.mkdtemp(prefix=f'wgan_worker_{worker_id(strategy)[1]}_')
+        checkpoint_dir = os.path.join(BASE_DIR, 'checkpoints')
 
     # Setup directories for saving trained models and generated figures
     models_path = os.path.join(BASE_DIR, 'models')
@@ -72,14 +546,75 @@ def train_wgan(
     specific_models_path = os.path.join(models_path, type_gan)
     os.makedirs(specific_models_path, exist_ok=True)  # Create if doesn't exist
     print(f"Model directory '{specific_models_path}' ready!")
-
-    # Initialize generator and discriminator models
-    generator = gen_model_wcgan(latent_dim)
-    discriminator = disc_model_critic(rows, cols)
+    results_path = os.path.join(BASE_DIR, 'results')
+    os.makedirs(results_path, exist_ok=True)
+
+    # Background model/log writer and figure renderer
+    artifact_writer = AsyncArtifactWriter()
+    figure_renderer = FigureRenderer()
+
+    # Per-phase timers and the optional profiler trace window
+    profiler = TrainingProfiler(
+        trace_dir=profile_dir or os.path.join(results_path, 'profile'),
+        trace_epochs=profile_epochs, trace_steps=profile_steps)
+
+    # All the variables of the training state are created under the strategy
+    # scope (a no-op scope without strategy)
+    scope = strategy.scope() if strategy is not None else contextlib.nullcontext()
+    with scope:
+        # Optimizers created outside the strategy scope cannot hold its variables
+        if strategy is not None:
+            optimizer_d = optimizer_d.__class__.from_config(optimizer_d.get_config())
+            optimizer_g = optimizer_g.__class__.from_config(optimizer_g.get_config())
+
+        # Initialize generator and discriminator models, under the mixed-precision
+        # policy if enabled (the global policy is restored afterwards)
+        previous_policy = tf.keras.mixed_precision.global_policy()
+        if mixed_precision:
+            tf.keras.mixed_precision.set_global_policy(mixed_precision)
+        try:
+            generator = build_generator(generator_arch, latent_dim)
+            if critic_kwargs is None:
+                discriminator = disc_model_critic(rows, cols)
+            else:
+                discriminator = build_critic(rows, cols, **critic_kwargs)
+        finally:
+            tf.keras.mixed_precision.set_global_policy(previous_policy)
+
+        # Dynamic loss scaling, to avoid float16 gradient underflow
+        if mixed_precision == 'mixed_float16':
+            optimizer_d = tf.keras.mixed_precision.LossScaleOptimizer(optimizer_d)
+            optimizer_g = tf.keras.mixed_precision.LossScaleOptimizer(optimizer_g)
+
+        # Random generator of the training step (its state is checkpointed)
+        rng = tf.random.Generator.from_non_deterministic_state()
+
+        # Training checkpoint state
+        checkpoint, loop_state = build_checkpoint(
+            generator, discriminator, optimizer_g, optimizer_d, rng)
+
+    # Build the (optionally graph-compiled) training step and its loss accumulators
+    train_step, loss_accumulators = make_train_step(
+        generator, discriminator, optimizer_d, optimizer_g, latent_dim,
+        n_critic=n_critic, lambda_gp=lambda_gp,
+        compile_step=compile_step, jit_compile=jit_compile, rng=rng,
+        fused_critic=fused_critic, strategy=strategy)
+
+    # Training checkpoints, keeping the last `max_checkpoints`
+    checkpoint_manager = tf.train.CheckpointManager(
+        checkpoint, checkpoint_dir, max_to_keep=max_checkpoints)
+    restore_manager = checkpoint_manager if chief else tf.train.CheckpointManager(
+        checkpoint, restore_dir, max_to_keep=max_checkpoints)
 
     # Initialize variable to keep track of the best generator loss for saving
     best_gen_loss = float('inf')
 
+    # Best quality metric and number of evaluations without improvement
+    best_quality = float('inf')
+    evals_without_improvement = 0
+    quality_history = []
+    stop_training = False
+
     # Initialize lists to store average metrics for the entire training duration
     avg_disc_real_losses = []  # Stores average critic loss for each epoch
     avg_gen_losses = []       # Stores average generator loss for each epoch
@@ -94,94 +629,51 @@ def train_wgan(
     previous_loss = float('inf')
     patience_counter = 0  # Counter for non-improving epochs
 
-    for epoch in range(start_epoch, start_epoch + epochs):
+    # Restore the full training state from the latest checkpoint
+    first_epoch = start_epoch
+    histories = restore_checkpoint(restore_manager) if resume else None
+    if histories is not None:
+        first_epoch = int(loop_state['epoch'].numpy())
+        best_gen_loss = float(loop_state['best_gen_loss'].numpy())
+        previous_loss = float(loop_state['previous_loss'].numpy())
+        patience_counter = int(loop_state['patience_counter'].numpy())
+        avg_disc_real_losses = histories['disc_loss']
+        avg_gen_losses = histories['gen_loss']
+        avg_gp_losses = histories['gp_loss']
+        lr_history = histories['lr']
+        best_quality = float(loop_state['best_quality'].numpy())
+        evals_without_improvement = int(loop_state['evals_without_improvement'].numpy())
+        quality_history = histories.get('quality', [])
+
+        # Drop the epochs logged after the checkpoint (they are trained again)
+        for log_name in ('loss_history.csv', 'quality.csv', 'profile.jsonl'):
+            truncate_epoch_log(os.path.join(results_path, log_name), first_epoch)
+        print(f"Resuming training at epoch {first_epoch + 1}")
+
+    for epoch in range(first_epoch, start_epoch + epochs):
         print(f"###### @ Epoch {epoch + 1}/{epochs}")
-
-        # Initialize lists to store metrics for the current epoch's batches.
-        epoch_disc_losses_local = []
-        epoch_gen_losses_local = []
-        epoch_gp_losses_local = []
-
-        # Shuffle the indices of the dataset for random batching at the start of each epoch
-        shuffled_indices = np.random.permutation(num_training_samples)
-
-        # Iterate over batches for the current epoch.
-        for step in range(steps_per_epoch):
-            # Get indices for the current batch.
-            batch_indices = shuffled_indices[step *
-                                             batch_size: (step + 1) * batch_size]
-
-            # Handle potential empty last batch
-            if len(batch_indices) == 0:
-                continue
-            real_images_batch = tf.constant(X_train[batch_indices])
-
-            # ## Train the Critic (n_critic times per batch)
-            for _ in range(n_critic):
-                # Generate new noise for each critic update
-                noise_for_critic = tf.random.normal(
-                    shape=(tf.shape(real_images_batch)[0], latent_dim))
-
-                with tf.GradientTape() as tape:
-                    # Generate fake images using the generator
-                    generated_imgs = generator(noise_for_critic, training=True)
-
-                    # Get predictions from discriminator for real and fake images
-                    real_predictions = discriminator(
-                        real_images_batch, training=True)
-                    fake_predictions = discriminator(
-                        generated_imgs, training=True)
-
-                    # Calculate critic loss (Wasserstein distance term)
-                    critic_loss = tf.reduce_mean(
-                        fake_predictions) - tf.reduce_mean(real_predictions)
-
-                    # Calculate gradient penalty
-                    gp = gradient_penalty(
-                        discriminator, real_images_batch, generated_imgs, lambda_gp)
-
-                    # Total critic loss is Wasserstein disance term plus Gradient Penalty
-                    critic_loss_total = critic_loss + gp
-
-                # Compute and apply gradients to the critic's trainable variables
-                critic_grads = tape.gradient(
-                    critic_loss_total, discriminator.trainable_variables)
-                optimizer_d.apply_gradients(
-                    zip(critic_grads, discriminator.trainable_variables))
-
-                # Store losses for this critic update
-                epoch_disc_losses_local.append(critic_loss.numpy())
-                epoch_gp_losses_local.append(gp.numpy())
-
-            # ## Train the Generator (once per batch, after n_critic critic updates)
-            # Generate new noise for the generator update
-            noise_for_generator = tf.random.normal(
-                shape=(tf.shape(real_images_batch)[0], latent_dim))
-
-            with tf.GradientTape() as tape:
-                generated_imgs = generator(noise_for_generator, training=True)
-                fake_predictions = discriminator(generated_imgs, training=True)
-                # Generator loss: the generator wants to maximize the discriminator's output
-                # for fake images, so it minimizes the negative of this value
-                gen_loss = -tf.reduce_mean(fake_predictions)
-
-            # Compute and apply gradients to the generator's trainable variables
-            gen_grads = tape.gradient(gen_loss, generator.trainable_variables)
-            # Prevents exploding gradients
-            optimizer_g.apply_gradients(
-                zip(gen_grads, generator.trainable_variables))
-
-            # Store loss for this generator update
-            epoch_gen_losses_local.append(gen_loss.numpy())
+        profiler.start_epoch(epoch + 1)
+
+        # Iterate over batches for the current epoch (timing their retrieval)
+        for real_images_batch in profiler.iterate(iterate_batches(
+                X_train, batch_size, steps_per_epoch, num_training_samples)):
+            # Run the n_critic critic updates and the generator update. Losses
+            # are accumulated on the device and only read back once per epoch
+            num_samples = batch_size if strategy is not None else \
+                int(real_images_batch.shape[0] or batch_size)
+            with profiler.step(num_samples):
+                train_step(real_images_batch)
 
         # ## Show and Store Metrics (once per epoch)
-        avg_disc_loss_epoch = np.mean(epoch_disc_losses_local)
-        avg_gen_loss_epoch = np.mean(epoch_gen_losses_local)
-        avg_gp_loss_epoch = np.mean(epoch_gp_losses_local)
+        # This is the only host synchronization of the epoch, so it also waits for
+        # the training steps still running on the device
+        with profiler.phase('loss_sync'):
+            avg_disc_loss_epoch, avg_gen_loss_epoch, avg_gp_loss_epoch = \
+                read_and_reset_losses(loss_accumulators)
 
         # ## Apply learning rate scheduler if enabled
         if scheduler:
-            current_lr = float(tf.keras.backend.get_value(optimizer_g.lr))
+            current_lr = float(tf.keras.backend.get_value(optimizer_g.learning_rate))
 
             # Check if the generator's loss has improved
             if avg_gen_loss_epoch > previous_loss - DELTA:
@@ -193,16 +685,18 @@ def train_wgan(
             # If patience limit is reached, reduce learning rate
             if patience_counter >= PATIENCE_LIMIT:
                 new_lr = max(current_lr * 0.9, MIN_LR)
-                tf.keras.backend.set_value(optimizer_g.lr, new_lr)
+                tf.keras.backend.set_value(optimizer_g.learning_rate, new_lr)
                 print(f"Generator learning rate reduced to {new_lr:.6f}")
                 patience_counter = 0
 
         # Save the weights of the best generator based on its loss
         # Only start saving after a certain number of epochs to allow for initial convergence
-        if avg_gen_loss_epoch < best_gen_loss and epoch > 1500:
+        # (with a quality evaluation, the best generator is selected by its metric instead)
+        if quality_monitor is None and avg_gen_loss_epoch < best_gen_loss and epoch > 1500:
             best_gen_loss = avg_gen_loss_epoch
-            generator.save(os.path.join(
-                specific_models_path, 'best_generator.h5'))
+            with profiler.phase('model_saving'):
+                artifact_writer.save_model(generator, os.path.join(
+                    specific_models_path, 'best_generator.h5'))
 
         # Print current epoch's average losses
         print(f"Epoch {epoch + 1}/{epochs} - Losses: "
@@ -215,50 +709,123 @@ def train_wgan(
         avg_gen_losses.append(avg_gen_loss_epoch)
         avg_gp_losses.append(avg_gp_loss_epoch)
 
-        # Save the loss history per epoch to a file
-        results_path = os.path.join(BASE_DIR, 'results')
-        os.chdir(results_path)
-        np.savez('loss_history.npz',
-                 disc_loss=np.array(avg_disc_real_losses),
-                 gen_loss=np.array(avg_gen_losses),
-                 gp_loss=np.array(avg_gp_losses)
-                 )
+        # Check and save updated generator learning rate
+        current_lr = float(tf.keras.backend.get_value(optimizer_g.learning_rate))
+        lr_history.append(current_lr)
+        print(f"Generator LR after epoch {epoch+1}: {current_lr:.6f}")
+
+        # Append the epoch's losses to the loss log (in the background)
+        artifact_writer.append_line(
+            os.path.join(results_path, 'loss_history.csv'),
+            f"{epoch + 1},{avg_disc_loss_epoch},{avg_gen_loss_epoch},"
+            f"{avg_gp_loss_epoch},{current_lr}",
+            header="epoch,disc_loss,gen_loss,gp_loss,lr")
+
+        # ## Quality evaluation, selection of the best generator and early stopping
+        quality = None
+        if quality_monitor is not None and (epoch + 1) % eval_interval == 0:
+            with profiler.phase('evaluation'):
+                quality = quality_monitor.score(generator)
+            value = quality[eval_metric]
+            quality_history.append(value)
+            print(f"Epoch {epoch + 1} - Quality: " + ", ".join(
+                f"{name}: {metric:.4f}" for name, metric in quality.items()))
+            artifact_writer.append_line(
+                os.path.join(results_path, 'quality.csv'),
+                f"{epoch + 1}," + ",".join(str(metric) for metric in quality.values()),
+                header="epoch," + ",".join(quality))
+
+            if value < best_quality - eval_min_delta:
+                best_quality = value
+                evals_without_improvement = 0
+                with profiler.phase('model_saving'):
+                    artifact_writer.save_model(generator, os.path.join(
+                        specific_models_path, 'best_generator.h5'))
+            else:
+                evals_without_improvement += 1
+                if early_stopping_patience and \
+                        evals_without_improvement >= early_stopping_patience:
+                    print(f"Early stopping: no improvement of {eval_metric} in "
+                          f"{evals_without_improvement} evaluations "
+                          f"(best {best_quality:.4f})")
+                    stop_training = True
 
         # ## Monitor Results (sample generation and saving)
         if (epoch + 1) % sample_interval == 0:
-            # Clears output in notebooks for cleaner display
+            # Clears output in notebooks for cleaner display (IPython is only
+            # imported when samples are generated)
+            from IPython.display import clear_output
             clear_output(wait=True)
             print(f"Generating sample images at Epoch {epoch + 1}...")
-            # Generate sample images using a new random noise for visualization
-            sample_noise = tf.random.normal(
-                shape=(4, latent_dim))  # Using new noise for now
-            generated_samples = generator.predict(sample_noise, verbose=0)
-            generated_samples_display = generated_samples
-
-            # Plot and save generated samples
-            plt.figure(figsize=(10, 8))
-            for i in range(generated_samples_display.shape[0]):
-                plt.subplot(2, 2, i + 1)
-                plt.imshow(generated_samples_display[i, :, :, 0], cmap='turbo', origin='lower', aspect='auto',
-                           vmin=original_data_min, vmax=original_data_max)
-                plt.title(f"Generated (Epoch {epoch + 1})")
-                plt.colorbar()
-                plt.xlabel("Tiempo (s)")
-                plt.ylabel("Modo LB")
-            plt.tight_layout()
-            plt.savefig(os.path.join(specific_models_path,
-                        f'generated_epoch_{epoch+1:04d}.png'))
-            plt.show()
-
-        # Save curent state of generator and discriminator models after each epoch
-        generator.save(os.path.join(specific_models_path, 'generator.h5'))
-        discriminator.save(os.path.join(
-            specific_models_path, 'discriminator.h5'))
-
-        # Check and save updated generator learning rate
-        current_lr = float(tf.keras.backend.get_value(optimizer_g.lr))
-        lr_history.append(current_lr)
-        print(f"Generator LR after epoch {epoch+1}: {current_lr:.6f}")
+            with profiler.phase('samples'):
+                # Generate sample images using a new random noise for visualization
+                sample_noise = tf.random.normal(
+                    shape=(4, latent_dim))  # Using new noise for now
+                generated_samples = generator(sample_noise, training=False).numpy()
+
+                # Plot and save generated samples in a separate process
+                figure_renderer.submit(
+                    generated_samples, epoch + 1,
+                    os.path.join(specific_models_path, f'generated_epoch_{epoch+1:04d}.png'),
+                    vmin=original_data_min, vmax=original_data_max)
+
+        # Save curent state of generator and discriminator models (in the background)
+        last_epoch = epoch + 1 == start_epoch + epochs or stop_training
+        if (epoch + 1) % save_interval == 0 or last_epoch:
+            with profiler.phase('model_saving'):
+                artifact_writer.save_model(
+                    generator, os.path.join(specific_models_path, 'generator.h5'))
+                artifact_writer.save_model(
+                    discriminator, os.path.join(specific_models_path, 'discriminator.h5'))
+
+        # Checkpoint the full training state, to be able to resume after this epoch
+        if (epoch + 1) % checkpoint_interval == 0 or last_epoch:
+            with profiler.phase('checkpoint'):
+                loop_state['epoch'].assign(epoch + 1)
+                loop_state['best_gen_loss'].assign(best_gen_loss)
+                loop_state['previous_loss'].assign(previous_loss)
+                loop_state['patience_counter'].assign(patience_counter)
+                loop_state['best_quality'].assign(best_quality)
+                loop_state['evals_without_improvement'].assign(evals_without_improvement)
+                save_checkpoint(checkpoint_manager, epoch, {
+                    'disc_loss': avg_disc_real_losses,
+                    'gen_loss': avg_gen_losses,
+                    'gp_loss': avg_gp_losses,
+                    'lr': lr_history,
+                    'quality': quality_history,
+                })
+
+        # Append the epoch's timing record to the profile log (in the background)
+        record = profiler.end_epoch(disc_loss=avg_disc_loss_epoch, gen_loss=avg_gen_loss_epoch,
+                                    gp_loss=avg_gp_loss_epoch, lr=current_lr,
+                                    **({'quality': quality} if quality else {}))
+        artifact_writer.append_line(
+            os.path.join(results_path, 'profile.jsonl'), json.dumps(record))
+        print(f"Epoch {epoch + 1} took {record['seconds']:.2f} s "
+              f"({record['steps_per_sec']:.2f} steps/s, "
+              f"{record['samples_per_sec']:.1f} samples/s)")
+
+        if stop_training:
+            break
+
+    # Stop the profiler trace if the window was still open
+    profiler.close()
+
+    # Wait for the pending models, logs and figures
+    artifact_writer.close()
+    figure_renderer.close()
+
+    # Non-chief workers only wrote temporary artifacts
+    if not chief:
+        shutil.rmtree(BASE_DIR, ignore_errors=True)
+        return avg_disc_real_losses, avg_gen_losses, avg_gp_losses
+
+    # Save the loss history per epoch to a file
+    np.savez(os.path.join(results_path, 'loss_history.npz'),
+             disc_loss=np.array(avg_disc_real_losses),
+             gen_loss=np.array(avg_gen_losses),
+             gp_loss=np.array(avg_gp_losses)
+             )
 
     # Save the history of generator learning rates across all epochs
     np.save(os.path.join(specific_models_path,
@@ -266,6 +833,7 @@ def train_wgan(
 
     final_end_time = time.time()
     print(f"Training done in {final_end_time - start_time:.2f} seconds")
+    print(f"Time per phase: {profiler.total.summary()}")
 
     # ## Visualize Results (Loss Plots)
     # Setup directory for saving figures
@@ -273,6 +841,7 @@ def train_wgan(
     os.makedirs(figures_path, exist_ok=True)
 
     # Plot all losses on a single graph
+    from matplotlib import pyplot as plt
     plt.figure(figsize=(10, 5))
     plt.plot(avg_disc_real_losses, label="Critic Loss (Wasserstein)")
     plt.plot(avg_gen_losses, label="Generator Loss")
@@ -1,4 +1,3 @@
-from matplotlib import pyplot as plt
 import numpy as np
 import os
 
@@ -24,6 +23,9 @@ def plot_LB_coefficients(coeffs, case_index, BASE_DIR, save_mode=0):
         Displays the plot and optionally saves it to disk.
     """
 
+    # Import matplotlib only when plotting
+    from matplotlib import pyplot as plt
+
     # Define modes and time array
     modes = np.linspace(1, 128, 128)
     t = np.linspace(1, 5, coeffs.shape[case_index])
@@ -71,6 +73,9 @@ def plot_temporal_signal(signal, case_index, BASE_DIR, save_mode=0):
         Displays the plot and optionally saves it to disk.
     """
 
+    # Import matplotlib only when plotting
+    from matplotlib import pyplot as plt
+
     # Renormalization to [-1, 1]
     min_val = np.min(signal)
     max_val = np.max(signal)
@@ -98,3 +103,64 @@ def plot_temporal_signal(signal, case_index, BASE_DIR, save_mode=0):
 
     plt.tight_layout()
     plt.show()
+
+
+def plot_generated_samples(samples, epoch, path, vmin=0.0, vmax=1.0):
+    """
+    Plot a 2x2 grid of generated LB coefficient samples and save it to disk.
+
+    Parameters:
+    -----------
+    samples : ndarray
+        4D array of generated samples with shape (n, modes, time, 1), n <= 4.
+    epoch : int
+        Training epoch (1-based) at which the samples were generated.
+    path : str
+        Path of the PNG file where the figure is saved.
+    vmin, vmax : float, optional (default=0.0, 1.0)
+        Limits of the color scale.
+
+    Returns:
+    --------
+    None
+        Saves the figure and closes it.
+    """
+
+    from matplotlib import pyplot as plt
+
+    plt.figure(figsize=(10, 8))
+    for i in range(samples.shape[0]):
+        plt.subplot(2, 2, i + 1)
+        plt.imshow(samples[i, :, :, 0], cmap='turbo', origin='lower', aspect='auto',
+                   vmin=vmin, vmax=vmax)
+        plt.title(f"Generated (Epoch {epoch})")
+        plt.colorbar()
+        plt.xlabel("Tiempo (s)")
+        plt.ylabel("Modo LB")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def render_generated_samples(data_path, path):
+    """
+    Render the samples stored by the training loop in a .npz file with
+    `plot_generated_samples` and delete the .npz file. Used to render figures
+    in a separate process.
+
+    Parameters:
+    -----------
+    data_path : str
+        Path of the .npz file with the 'samples', 'epoch', 'vmin' and 'vmax' entries.
+    path : str
+        Path of the PNG file where the figure is saved.
+
+    Returns:
+    --------
+    None
+    """
+
+    with np.load(data_path) as data:
+        plot_generated_samples(data['samples'], int(data['epoch']), path,
+                               vmin=float(data['vmin']), vmax=float(data['vmax']))
+    os.remove(data_path)
@@ -0,0 +1,184 @@
+import os
+import json
+import numpy as np
+
+from preprocessing import decimate_recordings
+
+
+class WindowSampler:
+    """
+    Training data source sampling random `window`-column windows of the decimated
+    recordings at batch time, instead of the fixed non-overlapping chunks of
+    `preprocessing.decimate_data`.
+
+    Each recording is stored once (see `preprocessing.decimate_recordings`), with
+    its normalization scale. A window can start at any multiple of `stride` (1:
+    any column; `window`: the chunk grid of `decimate_data`), optionally shifted by
+    a random jitter of up to `jitter` columns, and the windows are drawn uniformly
+    over all the possible windows of all recordings. A batch is gathered with a
+    single vectorized indexing operation and normalized to [0, 1] with the scale
+    of its recording.
+
+    Its length is the number of non-overlapping chunks of the recordings (the
+    number of samples of `decimate_data`), so that an epoch sees as many samples
+    as before. It can be passed to `training.train_wgan` or
+    `input_pipeline.make_window_dataset`.
+    """
+
+    def __init__(self, data, offsets, lengths, scales, window=2500, stride=1, jitter=0,
+                 channel_axis=False):
+        """
+        Args:
+            data (np.ndarray): The decimated recordings, of shape (total_length, rows).
+            offsets (np.ndarray): The first row of each recording in `data`.
+            lengths (np.ndarray): The length of each recording.
+            scales (np.ndarray): The normalization scale of each recording.
+            window (int, optional): The number of columns of each window. Defaults to 2500.
+            stride (int, optional): The spacing of the window starts. Defaults to 1.
+            jitter (int, optional): The maximum random shift of the window starts
+                                    (columns, either way). Defaults to 0.
+            channel_axis (bool, optional): Whether the samples have a trailing channel
+                                           axis, (rows, window, 1). Defaults to False.
+        """
+
+        self.data = data
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.scales = np.asarray(scales, dtype=np.float32)
+        self.window = window
+        self.stride = stride
+        self.jitter = jitter
+        self.channel_axis = channel_axis
+
+        if np.any(self.lengths < window):
+            raise ValueError("All recordings must be at least one window long")
+
+        # Number of window starts of each recording, and their cumulative counts
+        self.num_starts = (self.lengths - window) // stride + 1
+        self._cum_starts = np.cumsum(self.num_starts)
+
+        rows = data.shape[1]
+        self.sample_shape = (rows, window) + ((1,) if channel_axis else ())
+        self.dtype = np.dtype(np.float32)
+
+    @classmethod
+    def from_coeffs(cls, coeffs, factor=2, window=2500, pad_threshold=0.0, **kwargs):
+        """Builds a sampler from the coefficient matrices (see `decimate_recordings`)."""
+
+        data, offsets, lengths, scales = decimate_recordings(
+            coeffs, factor, window, pad_threshold)
+        return cls(data, offsets, lengths, scales, window=window, **kwargs)
+
+    def save(self, output_dir):
+        """
+        Writes the decimated recordings ('recordings.npy') and their index and
+        window configuration ('index.json') to a directory, to be memory-mapped by
+        `load`.
+        """
+
+        os.makedirs(output_dir, exist_ok=True)
+        np.save(os.path.join(output_dir, 'recordings.npy'), self.data)
+        index = {
+            'window': self.window,
+            'stride': self.stride,
+            'jitter': self.jitter,
+            'offsets': self.offsets.tolist(),
+            'lengths': self.lengths.tolist(),
+            'scales': self.scales.tolist(),
+        }
+        with open(os.path.join(output_dir, 'index.json'), 'w') as f:
+            json.dump(index, f)
+
+    @classmethod
+    def load(cls, output_dir, **kwargs):
+        """
+        Opens the recordings written by `save` (memory-mapped, read-only), with the
+        saved window, stride and jitter unless overridden by keyword arguments.
+        """
+
+        with open(os.path.join(output_dir, 'index.json')) as f:
+            index = json.load(f)
+        data = np.load(os.path.join(output_dir, 'recordings.npy'), mmap_mode='r')
+        for key in ('window', 'stride', 'jitter'):
+            if key in index:
+                kwargs.setdefault(key, index[key])
+        return cls(data, index['offsets'], index['lengths'], index['scales'], **kwargs)
+
+    @property
+    def num_recordings(self):
+        return len(self.lengths)
+
+    @property
+    def num_windows(self):
+        """The number of distinct windows (without jitter)."""
+        return int(self._cum_starts[-1]) if len(self._cum_starts) else 0
+
+    @property
+    def shape(self):
+        return (len(self),) + self.sample_shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __len__(self):
+        return int(np.sum(self.lengths // self.window))
+
+    def with_channel_axis(self):
+        """Returns a sampler over the same recordings whose samples have a channel axis."""
+
+        return WindowSampler(self.data, self.offsets, self.lengths, self.scales, self.window,
+                             self.stride, self.jitter, channel_axis=True)
+
+    def sample_positions(self, batch_size, rng):
+        """
+        Draws random windows.
+
+        Args:
+            batch_size (int): The number of windows.
+            rng (np.random.Generator): The random generator.
+
+        Returns:
+            tuple: The recording and the start column of each window.
+        """
+
+        # Uniform over all the windows of all recordings
+        window_ids = rng.integers(0, self.num_windows, batch_size)
+        recs = np.searchsorted(self._cum_starts, window_ids, side='right')
+        starts = (window_ids - (self._cum_starts[recs] - self.num_starts[recs])) * self.stride
+
+        if self.jitter:
+            starts = starts + rng.integers(-self.jitter, self.jitter + 1, batch_size)
+            starts = np.clip(starts, 0, self.lengths[recs] - self.window)
+        return recs, starts
+
+    def gather(self, recs, starts):
+        """
+        Returns the normalized windows of the given recordings and start columns, of
+        shape (batch, rows, window[, 1]).
+        """
+
+        # (batch, window) row indices of the time-major recordings, gathered at once
+        time_idx = (self.offsets[recs] + starts)[:, None] + np.arange(self.window)
+        windows = self.data[time_idx]
+
+        # (batch, window, rows) --> (batch, rows, window), normalized to [0, 1]
+        out = np.empty((len(recs), self.data.shape[1], self.window), dtype=np.float32)
+        np.multiply(windows.transpose(0, 2, 1), (0.5 / self.scales[recs])[:, None, None],
+                    out=out)
+        out += 0.5
+        return out[..., None] if self.channel_axis else out
+
+    def sample(self, batch_size, rng=None):
+        """
+        Returns a batch of random normalized windows, of shape (batch, rows, window[, 1]).
+
+        Args:
+            batch_size (int): The number of windows.
+            rng (np.random.Generator, optional): The random generator. Defaults to
+                                                 NumPy's global generator.
+        """
+
+        if rng is None:
+            rng = np.random.default_rng(np.random.randint(2**31))
+        return self.gather(*self.sample_positions(batch_size, rng))
@@ -0,0 +1,97 @@
+"""
+This script launches a multi-worker training run on the local machine, to test or use
+data-parallel training with `tf.distribute.MultiWorkerMirroredStrategy` without a cluster.
+
+It starts N copies of a training script (main.py by default), each one with the
+`TF_CONFIG` environment variable of one worker of an N-worker cluster on localhost.
+Scripts that select their strategy with `distribution.default_strategy_kind()` (such as
+main.py) then train with `MultiWorkerMirroredStrategy`; worker 0 is the chief and writes
+the models, logs and checkpoints.
+
+To train across several Linux nodes, run the training script once per node instead, with
+a `TF_CONFIG` listing the host:port of every node (see `distribution.local_tf_config`).
+
+Example:
+    python launch_multiworker.py --num-workers 2 --threads-per-worker 4 -- main.py
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Define directories
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(SCRIPT_DIR, 'functions')
+
+
+def worker_env(num_workers, worker_index, base_port, threads_per_worker=None):
+    """
+    Returns the environment of one local worker process.
+
+    Args:
+        num_workers (int): The number of worker processes.
+        worker_index (int): The index of the worker.
+        base_port (int): The port of worker 0.
+        threads_per_worker (int, optional): The intra-op threads of each worker.
+                                            Defaults to None (TensorFlow's default).
+
+    Returns:
+        dict: The environment variables of the worker.
+    """
+
+    # Import here, so that TensorFlow is only loaded by the workers
+    sys.path.append(FUNCTIONS_DIR)
+    from distribution import local_tf_config
+
+    env = dict(os.environ, TF_CONFIG=local_tf_config(num_workers, worker_index, base_port))
+    if threads_per_worker:
+        env.update({'OMP_NUM_THREADS': str(threads_per_worker),
+                    'TF_NUM_INTRAOP_THREADS': str(threads_per_worker)})
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Launch a local multi-worker (MultiWorkerMirroredStrategy) training run.")
+    parser.add_argument('--num-workers', type=int, default=2)
+    parser.add_argument('--base-port', type=int, default=12345,
+                        help="Port of worker 0; worker i listens on base-port + i.")
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help="Intra-op threads per worker (default: TensorFlow's default).")
+    parser.add_argument('script', nargs='?', default=os.path.join(SCRIPT_DIR, 'main.py'),
+                        help="Training script run by every worker.")
+    parser.add_argument('script_args', nargs=argparse.REMAINDER,
+                        help="Arguments passed to the training script.")
+    args = parser.parse_args()
+
+    # Start one process per worker
+    processes = []
+    for worker_index in range(args.num_workers):
+        env = worker_env(args.num_workers, worker_index, args.base_port,
+                         args.threads_per_worker)
+        processes.append(subprocess.Popen(
+            [sys.executable, args.script] + args.script_args, env=env))
+    print(f"Started {args.num_workers} workers on ports "
+          f"{args.base_port}-{args.base_port + args.num_workers - 1}")
+
+    # Wait for all the workers. If one fails, the others cannot make progress
+    return_codes = [None] * len(processes)
+    try:
+        for i, process in enumerate(processes):
+            return_codes[i] = process.wait()
+            if return_codes[i] != 0:
+                print(f"Worker {i} failed with exit code {return_codes[i]}")
+                break
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    sys.exit(max(abs(code) for code in return_codes if code is not None))
+
+
+if __name__ == '__main__':
+    main()
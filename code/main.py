@@ -3,9 +3,9 @@ This script implements a training pipeline for a Wasserstein Generative Adversar
 with Gradient Penalty (GP) for generating synthetic noise BSPM signals.
 
 The pipeline includes:
-1.  **Libraries and Environment Setup**: Imports necessary libraries (TensorFlow, NumPy, Matplotlib, SciPy, MATLAB engine)
+1.  **Libraries and Environment Setup**: Imports necessary libraries (TensorFlow, NumPy, Matplotlib, SciPy)
     and custom utility functions for data loading, preprocessing, training, and visualization.
-2.  **Dataset Loading and Preprocessing**: Loads coefficient data and noise signals from MATLAB .mat files.
+2.  **Dataset Loading and Preprocessing**: Loads coefficient data and lead status from MATLAB .mat files.
     It applies either decimation or simple splitting to the data based on a configuration flag,
     preparing it for training.
 3.  **Hyperparameter Definition**: Defines key parameters for the GAN training, including:
@@ -23,53 +23,104 @@ The pipeline includes:
 # Import necessary libraries for TensorFlow, numerical operations,
 # file system interactions, plotting, and signal processing.
 
-from preprocessing import *
-from visualization import *
-from load_data import load_data
-from training import *
-import matlab.engine
 import tensorflow as tf
 import numpy as np
 from tensorflow.keras.optimizers import Adam
 import os
 import sys
 
-# Don't forget to change directory to the MATLAB engine path to ensure it can be imported.
-os.chdir(r'C:\Users\ITACA_2025_1\anaconda3\Lib\site-packages\matlabengine-24.2-py3.12.egg')
-
 # Define directories
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FUNCTIONS_DIR = os.path.join(BASE_DIR, 'functions')
 
-# Load customized functions
+# Load customized functions (explicit names, so that only what the pipeline
+# uses is imported; plotting and IPython are imported lazily where needed)
 sys.path.append(FUNCTIONS_DIR)
+from preprocessing import decimate_data, decimate_data_to_memmap, split_data  # noqa: E402
+from load_data import load_data  # noqa: E402
+from chunk_cache import build_chunk_cache  # noqa: E402
+from training import train_wgan  # noqa: E402
+from input_pipeline import make_training_dataset, make_window_dataset  # noqa: E402
+from window_sampler import WindowSampler  # noqa: E402
+from distribution import make_strategy, default_strategy_kind  # noqa: E402
+
+
+# %% ---- Distribution strategy ----
+# Data-parallel training: None (single device), 'mirrored' (replicas on this
+# machine, splitting the CPU into NUM_CPU_REPLICAS devices if there is no GPU) or
+# 'multi_worker' (several processes or nodes, configured by TF_CONFIG).
+# By default, 'multi_worker' is used when the script is started with a TF_CONFIG,
+# e.g. by launch_multiworker.py. The strategy must be created before any other
+# TensorFlow operation.
+
+DISTRIBUTE = default_strategy_kind()
+NUM_CPU_REPLICAS = 2
+strategy = make_strategy(DISTRIBUTE, num_cpu_replicas=NUM_CPU_REPLICAS)
 
 
 # %% ---- Load dataset ----
-# Load the dataset using a custom function. The function returns LB
-# coefficients, noise, and lead status information.
+# Load the dataset using a custom function. Only the LB coefficients and the
+# lead status information are read from the .mat files, in parallel. They are
+# cached in a consolidated format, so repeated runs read them from the cache.
+# NOTE: when running this file as a script on Windows, the worker processes
+# re-import it, so use n_workers=1 or run it cell by cell.
 
 # Define seed for reproducibility
 seed = 42
 
 # Path where the data files are located
 dataset_path = os.path.join(BASE_DIR, 'data', 'LBcoeffs')
-os.chdir(dataset_path)
-
-# Load the coefficients, noise signal, and lead status variables
-coeffs, noise, _, leadStatus, _ = load_data(dataset_path)
+cache_path = os.path.join(BASE_DIR, 'data', 'cache')
 
 # Determine preprocessing technique based on the decimation flag
 decimate = 1
 
-if decimate:
-    data = decimate_data(coeffs, seed)
-    noise_2 = decimate_data(noise, seed)
+# If enabled, the decimated chunks of each recording are cached on disk, keyed by
+# the content of its .mat file and the preprocessing parameters, so that only new
+# or changed recordings are loaded and preprocessed. The samples are read from the
+# cache one batch at a time, and shuffled through an index (same order as
+# decimate_data)
+incremental_cache = 1
+chunk_cache_path = os.path.join(BASE_DIR, 'data', 'chunk_cache')
+
+# If enabled, the decimated samples are streamed to a float32 memmap on disk
+# instead of being stacked in memory (for datasets larger than the RAM)
+out_of_core = 0
+preprocessed_path = os.path.join(BASE_DIR, 'data', 'preprocessed')
+
+# If enabled, each decimated recording is kept once (with its normalization
+# scale) and random 2500-column windows are sampled at batch time, instead of
+# the fixed non-overlapping chunks. WINDOW_STRIDE spaces the window starts (1:
+# any column) and WINDOW_JITTER shifts them randomly by up to that many columns
+random_crop = 0
+WINDOW_STRIDE = 1
+WINDOW_JITTER = 0
+
+if decimate and random_crop:
+    coeffs, = load_data(dataset_path, fields=('coeffs_lb',), cache_dir=cache_path)
+    num_recordings = len(coeffs)
+    data = WindowSampler.from_coeffs(
+        coeffs, stride=WINDOW_STRIDE, jitter=WINDOW_JITTER).with_channel_axis()
+    del coeffs
+elif decimate and incremental_cache:
+    chunk_index = build_chunk_cache(dataset_path, chunk_cache_path)
+    num_recordings = chunk_index.num_recordings
+    data = chunk_index.shuffled(seed).with_channel_axis()
 else:
-    data = split_data(coeffs, seed)
+    # Load the coefficients and lead status variables
+    coeffs, leadStatus = load_data(
+        dataset_path, fields=('coeffs_lb', 'lead_status'), cache_dir=cache_path)
+    num_recordings = len(coeffs)
 
-# Adapt the dimension of the data samples
-data = np.expand_dims(data, axis=-1)
+    if decimate and out_of_core:
+        data = decimate_data_to_memmap(coeffs, preprocessed_path, seed)
+    elif decimate:
+        data = decimate_data(coeffs, seed)
+    else:
+        data = split_data(coeffs, seed)
+
+    # Adapt the dimension of the data samples (a view, also for memory-mapped data)
+    data = np.expand_dims(data, axis=-1)
 
 
 # %% ---- Hyperparameters ----
@@ -77,12 +128,12 @@ data = np.expand_dims(data, axis=-1)
 # Number of epochs for training
 EPOCHS = 2500
 
-# Batch size for training
+# Batch size for training (global batch size, split across the replicas)
 BATCH_SIZE = 32
 
 # Calculate the number of steps per epoch
-steps_per_epoch = len(coeffs) // BATCH_SIZE
-if steps_per_epoch == 0 and coeffs.shape[0] > 0:
+steps_per_epoch = num_recordings // BATCH_SIZE
+if steps_per_epoch == 0 and num_recordings > 0:
     steps_per_epoch = 1
 
 # Optimizers for the generator and discriminator
@@ -97,6 +148,22 @@ ROWS, COLS = 128,  2500
 NOISE_DIM = 128
 
 
+# %% ---- Input pipeline ----
+# Shuffled batches are gathered and prefetched by tf.data in the background,
+# overlapping batch preparation with the training steps. With a distribution
+# strategy, every replica needs a full share of the batch, so the last
+# incomplete batch is dropped. Random windows are sampled by tf.data in the
+# same way, always in full batches.
+
+if isinstance(data, WindowSampler):
+    train_dataset = make_window_dataset(data, BATCH_SIZE, seed=seed)
+    eval_data = data.sample(256, np.random.default_rng(seed))
+else:
+    train_dataset = make_training_dataset(
+        data, BATCH_SIZE, seed=seed, drop_remainder=strategy is not None)
+    eval_data = data[:256]
+
+
 # %% ---- Training ----
 
 tf.keras.backend.clear_session()
@@ -105,11 +172,26 @@ sample_interval = 10
 
 # Train the model
 avg_disc_real_losses, avg_disc_fake_losses, avg_gen_losses, avg_gp_losses = train_wgan(
-    data, TYPE_GAN, ROWS, COLS, NOISE_DIM,
+    train_dataset, TYPE_GAN, ROWS, COLS, NOISE_DIM,
     EPOCHS, BATCH_SIZE, steps_per_epoch, len(data), optimizer_d, optimizer_g,
     BASE_DIR,
     sample_interval=sample_interval,
     n_critic=5, lambda_gp=5,
     start_epoch=0,
-    scheduler=1
+    scheduler=1,
+    # Set to True to resume an interrupted run from its latest checkpoint
+    resume=False,
+    # Reduced-precision training: None, 'mixed_bfloat16' or 'mixed_float16'
+    mixed_precision=None,
+    # Data-parallel training (see the distribution strategy cell)
+    strategy=strategy,
+    # tf.profiler trace of a range of epochs, e.g. (2, 2), written to
+    # results/profile for TensorBoard (per-epoch timings are always in
+    # results/profile.jsonl)
+    profile_epochs=None,
+    # Sample-quality evaluation every eval_interval epochs on a fixed real subset
+    # (the first shuffled samples, or fixed random windows): it selects best_generator.h5 and, with a
+    # patience, stops the training early (results/quality.csv)
+    eval_interval=25, eval_data=eval_data, eval_metric='sliced_wasserstein',
+    early_stopping_patience=None
 )
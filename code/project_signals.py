@@ -0,0 +1,106 @@
+"""
+This script projects stored Laplace-Beltrami coefficient samples (e.g. generated
+offline, or exported by export_noise.py) into temporal noise signals with the Psi_lb
+conversion matrix, without loading the generator. With --inverse, it converts
+recorded signals into LB coefficients instead (least squares, with the cached
+pseudo-inverse or QR factors of Psi_lb).
+
+It only needs NumPy (and SciPy the first time Psi_lb.mat is read; see
+functions/projection.py), and TensorFlow, matplotlib and IPython are never imported,
+so it starts in a fraction of a second; see benchmarks/check_import_time.py for the
+import-time budget.
+
+The input is read from a .npy file (memory-mapped) or a .npz file (--key), of shape
+(batch, modes/leads, time) or (batch, modes/leads, time, 1), and the output is written
+batch by batch to a .npy file.
+
+Example:
+    python project_signals.py coeffs.npy --output signals.npy --batch-size 64
+    python project_signals.py signals.npy --inverse --output coeffs.npy
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# Define directories
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, 'utils')
+FUNCTIONS_DIR = os.path.join(SCRIPT_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+from projection import get_projection  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Project stored LB coefficient samples into temporal noise signals.")
+    parser.add_argument('input', help="The .npy or .npz file with the samples.")
+    parser.add_argument('--key', default=None,
+                        help="Array of the .npz file ('coeffs', or 'signals' with --inverse).")
+    parser.add_argument('--psi', default=os.path.join(DATA_DIR, 'Psi_lb.mat'),
+                        help="Path to the Psi_lb conversion matrix.")
+    parser.add_argument('--output', required=True, help="The output .npy file.")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--raw', action='store_true',
+                        help="The coefficients are in [-1, 1] instead of the generator's [0, 1].")
+    parser.add_argument('--inverse', action='store_true',
+                        help="Convert signals into coefficients.")
+    parser.add_argument('--method', choices=['pinv', 'qr'], default='pinv',
+                        help="Inverse operator of Psi_lb (with --inverse).")
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float32')
+    parser.add_argument('--threads', type=int, default=None,
+                        help="BLAS threads (needs threadpoolctl).")
+    return parser.parse_args()
+
+
+def load_samples(path, key='coeffs'):
+    """
+    Opens the samples without reading them into memory if possible.
+
+    Args:
+        path (str): The .npy (memory-mapped) or .npz file.
+        key (str, optional): The array of a .npz file. Defaults to 'coeffs'.
+
+    Returns:
+        np.ndarray: The samples, of shape (batch, rows, time) or (batch, rows, time, 1).
+    """
+
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return data[key]
+    return np.load(path, mmap_mode='r')
+
+
+def main():
+    args = parse_args()
+
+    # %% ---- Load the samples and conversion matrix ----
+    projection = get_projection(args.psi)
+    samples = load_samples(args.input, args.key or ('signals' if args.inverse else 'coeffs'))
+    if samples.ndim == 4:
+        samples = samples[..., 0]
+    num_samples, _, time_steps = samples.shape
+    rows = projection.num_modes if args.inverse else projection.num_leads
+
+    # %% ---- Project batch by batch into the output memmap ----
+    output = np.lib.format.open_memmap(
+        args.output, mode='w+', dtype=args.dtype, shape=(num_samples, rows, time_steps))
+    if args.inverse:
+        projection.inverse(samples, dtype=args.dtype, normalize=not args.raw,
+                           method=args.method, out=output, batch_size=args.batch_size,
+                           num_threads=args.threads)
+    else:
+        projection.forward(samples, dtype=args.dtype, denormalize=not args.raw, out=output,
+                           batch_size=args.batch_size, num_threads=args.threads)
+    output.flush()
+    print(f"Projected {num_samples} samples -> {args.output} {output.shape}")
+
+
+if __name__ == '__main__':
+    main()
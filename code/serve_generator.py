@@ -0,0 +1,99 @@
+"""
+This script serves the trained generator to local simulation jobs, so that they do not
+have to load the generator and the Psi_lb conversion matrix themselves.
+
+The model and Psi_lb stay resident in the server. Concurrent requests are coalesced into
+micro-batches (up to --max-batch-size samples, waiting at most --max-wait-ms for other
+requests), which keeps the latency of small requests low while using the generator
+efficiently under load.
+
+Endpoints (HTTP on a localhost TCP port, or on a Unix socket with --unix-socket):
+    GET /generate?seed=42&start=0&count=4&outputs=coeffs,signals
+        Returns an .npz file with 'coeffs' (count, 128, 2500) and/or 'signals'
+        (count, leads, 2500), float32. Samples come from the same seed stream as
+        export_noise.py: sample i of a seed is always the same.
+    GET /metrics
+        Returns JSON with p50/p99 latency, queue wait, mean micro-batch size and throughput.
+    GET /health
+
+Example:
+    python serve_generator.py --port 8765 --max-batch-size 32 --max-wait-ms 5
+    curl "http://127.0.0.1:8765/generate?seed=42&count=2" -o noise.npz
+"""
+
+# %% ---- Libraries and Environment Setup ----
+
+import argparse
+import os
+import signal
+import sys
+
+import numpy as np
+
+# Define directories
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, 'models')
+DATA_DIR = os.path.join(SCRIPT_DIR, 'utils')
+FUNCTIONS_DIR = os.path.join(SCRIPT_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+from generator_server import MicroBatcher, make_server  # noqa: E402
+from projection import get_projection  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Serve generated BSPM noise samples over HTTP with micro-batching.")
+    parser.add_argument('--model', default=os.path.join(MODELS_DIR, 'generator.h5'),
+                        help="Path to the trained generator.")
+    parser.add_argument('--psi', default=os.path.join(DATA_DIR, 'Psi_lb.mat'),
+                        help="Path to the Psi_lb conversion matrix.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', default=None,
+                        help="Listen on this Unix socket path instead of a TCP port.")
+    parser.add_argument('--noise-dim', type=int, default=128)
+    parser.add_argument('--max-batch-size', type=int, default=32,
+                        help="Maximum number of samples per generator call.")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help="Maximum time a request waits for others to join its batch.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # %% ---- Load the generator model and conversion matrix ----
+    if not os.path.exists(args.model):
+        raise FileNotFoundError(f"Model not found in: {args.model}")
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.model, compile=False)
+    Psi_lb = get_projection(args.psi).matrix(np.float32)
+
+    # %% ---- Serve ----
+    batcher = MicroBatcher(model, Psi_lb, noise_dim=args.noise_dim,
+                           max_batch_size=args.max_batch_size,
+                           max_wait=args.max_wait_ms / 1e3)
+    batcher.warmup()
+    server = make_server(batcher, args.host, args.port, args.unix_socket)
+
+    address = args.unix_socket or f"http://{args.host}:{args.port}"
+    # Stop cleanly (and remove the Unix socket) on SIGTERM too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Serving the generator on {address} "
+          f"(max batch {args.max_batch_size}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == '__main__':
+    main()
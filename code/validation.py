@@ -7,8 +7,7 @@ with Gradient Penalty (GP) for generating synthetic noise BSPM signals.
 
 import numpy as np
 import os
-from tensorflow.keras.models import load_model
-import scipy.io as sio
+import sys
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -16,40 +15,55 @@ warnings.filterwarnings("ignore")
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 MODELS_DIR = os.path.join(SCRIPT_DIR, 'models')
 DATA_DIR = os.path.join(SCRIPT_DIR, 'utils')
+FUNCTIONS_DIR = os.path.join(SCRIPT_DIR, 'functions')
+
+# Load customized functions
+sys.path.append(FUNCTIONS_DIR)
+from generate_temporal_noise_signals import latent_vectors
+from projection import get_projection
+from visualization import plot_temporal_signal
 
 
 # %% ---- Load the generator model ----
 # NOTE: due to privacy policies, the trained generator cannot be shared publicly.
+# The TFLite artifact written by export_inference_model.py is preferred if it exists,
+# since it is run without importing TensorFlow (with tflite_runtime). Otherwise the
+# Keras model is loaded, importing TensorFlow only here.
 
+artifact_path = os.path.join(MODELS_DIR, 'inference', 'generator.tflite')
 model_path = os.path.join(MODELS_DIR, 'generator.h5')
-if not os.path.exists(model_path):
+if os.path.exists(artifact_path):
+    from inference_artifact import load_inference_artifact
+    artifact = load_inference_artifact(artifact_path)
+    model = None
+elif os.path.exists(model_path):
+    from tensorflow.keras.models import load_model
+    model = load_model(model_path)
+else:
     raise FileNotFoundError(f"Model not found in: {model_path}")
-model = load_model(model_path)
 
 
 # %% ---- Load conversion matrix ----
 
-mat_file = os.path.join(DATA_DIR, 'Psi_lb.mat')
-if not os.path.exists(mat_file):
-    raise FileNotFoundError(f"Conversion matrix not found in: {mat_file}")
-mat_contents = sio.loadmat(mat_file)
-Psi_lb = np.array(mat_contents['Psi_lb'])
+# The matrix is cached as a .npy file next to the .mat file after the first run
+projection = get_projection(os.path.join(DATA_DIR, 'Psi_lb.mat'))
 
 
 # %% ---- Generate noise using the generator ----
 
-# Define the noise dimension and the random latent vector.
+# Define the noise dimension and pick a random sample of the latent seed stream.
 NOISE_DIM = 128
-rnd_latent_vec = np.random.normal(0, 1, (100, NOISE_DIM))
-
-# Generate noise samples (Laplace-Beltrami coefficients)
-samples = model(rnd_latent_vec, training=False)
-idx = np.random.randint(0, samples.shape[0])
-samples = np.squeeze(np.array(samples[idx]))
-samples_dn = (samples - 0.5) * 2
+SEED = 42
+idx = np.random.randint(0, 100)
 
-# Convert the LB coefficients to temporal signals using the conversion matrix
-signal = Psi_lb @ np.squeeze(samples_dn)
+# Generate the noise sample (Laplace-Beltrami coefficients) and convert it to a
+# temporal signal using the conversion matrix. Only the selected sample is generated
+latents = latent_vectors(SEED, idx, 1, NOISE_DIM)
+if model is None:
+    samples = artifact(latents)['coeffs']
+else:
+    samples = np.asarray(model(latents, training=False))
+signal = projection.forward(samples, dtype=np.float64, denormalize=True)[0]
 
 # Visualize the obtained signal
 plot_temporal_signal(signal, idx, SCRIPT_DIR, save_mode=0)